@@ -329,16 +329,47 @@ app.directive('subjectArea', ['Global', 'Metadata', function(Global, Metadata) {
 			scope.presSearch = '';
 			scope.loading = false;
 
+			function setSubjectAreas(results) {
+				scope.subjectAreas = results.map(function(r) { return r.displayName; });
+				Global.subjectAreas = scope.subjectAreas;
+			}
+
 			if (scope.subjectAreas.length == 0) {
 				scope.loading = true;
 				obiee.getSubjectAreas(function(results) {
-					scope.subjectAreas = results.map(function(r) { return r.displayName; });
-					Global.subjectAreas = scope.subjectAreas;
+					setSubjectAreas(results);
 					scope.subjectArea = scope.subjectAreas[0];
 					Metadata.popPresTables(scope.subjectArea, scope.metadata, function() {
 						scope.loading = false;
 						scope.$apply();
 					});
+				}, undefined, function(results) { // Subject areas have changed since they were cached
+					setSubjectAreas(results);
+					scope.$apply();
+				});
+			}
+
+			// Fetch the metadata from OBIEE again, discarding the cached copy
+			scope.refreshMetadata = function() {
+				scope.loading = true;
+				var previous = scope.metadata[scope.subjectArea];
+				obiee.clearMetadataCache(function() {
+					obiee.fetchVariables();
+					obiee.getSubjectAreas(function(results) {
+						setSubjectAreas(results);
+						if ($.inArray(scope.subjectArea, scope.subjectAreas) == -1)
+							scope.subjectArea = scope.subjectAreas[0];
+						delete scope.metadata[scope.subjectArea];
+						Metadata.popPresTables(scope.subjectArea, scope.metadata, function() {
+							if (previous && previous.SubjectArea == scope.subjectArea) {
+								previous.AddedColumns.forEach(function(c) { // Keep custom columns
+									scope.metadata[scope.subjectArea].addColumn(c);
+								});
+							}
+							scope.loading = false;
+							scope.$apply();
+						});
+					});
 				});
 			}
 
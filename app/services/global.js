@@ -457,7 +457,7 @@ app.factory('Global', ['ModalService', 'UIConfig', '$timeout', '$window', functi
 }]);
 
 // Service for retrieving and manipulating BI metadata
-app.factory('Metadata', ['Global', function(Global) {
+app.factory('Metadata', ['Global', '$rootScope', function(Global, $rootScope) {
 	var Metadata = {
 		// Populate presentation table hierarchy
 		popPresTables: function(sa, metadata, callback) {
@@ -470,6 +470,15 @@ app.factory('Metadata', ['Global', function(Global) {
 						Global.biMetadata = metadata;
 						if (callback)
 							callback();
+					}, function(presObj) { // Cached metadata was shown and OBIEE has since returned different metadata
+						if (metadata[sa]) {
+							metadata[sa].AddedColumns.forEach(function(c) { // Keep custom columns
+								presObj.addColumn(c);
+							});
+						}
+						metadata[sa] = presObj;
+						Global.biMetadata = metadata;
+						$rootScope.$evalAsync();
 					})
 				} else {
 					if (callback)
@@ -611,36 +620,14 @@ app.filter('filterDBs', function() {
 	};
 });
 
-// Search function library
+// Search function library, keeping categories and functions matched by the index search
 app.filter('filterFunctions', function() {
-	return function(objs, search) {
-		if (!search || !objs) return objs;
-		var result = {};
-
-		function checkValue(val) {
-			if (val && val.Name)
-				return val.Name.toLowerCase().indexOf(search.toLowerCase()) > -1;
-		}
-
-		function checkChild(obj) {
-			var keep = false;
-			angular.forEach(obj, function(value, key) {
-				if (checkValue(value))
-					keep = true;
-			});
-			return keep;
-		}
-
-		angular.forEach(objs, function(value, key) {
-			if (value.hasOwnProperty('expand')) { // Parent
-				if (checkChild(value))
-					result[key] = value;
-			} else {
-				if (checkValue(value)) {
-					result[key] = value;
-				}
-			}
+	return function(objs, matches) {
+		if (!matches || !objs) return objs;
+		return objs.filter(function(obj) {
+			if (obj.functions) // Category
+				return obj.functions.some(function(f) { return matches[f.index]; });
+			return matches[obj.index];
 		});
-		return result;
 	};
 });
@@ -8,33 +8,80 @@ app.controller('ConfirmModalController', function($scope, msg, width, close) {
 	$scope.cancel = function() { close(false); };
 });
 
-// Controller for confirmation modal window
+// Controller for function library modal window
 app.controller('FunctionsModalController', function($scope, $http, $sce, Global, close) {
+	var url = '/insights/metadata/functions/', index;
 	$scope.selected = {};
+	$scope.matches = null;
 
-	// Fetch icons from JSON file
+	// Fetch the function index. Details are loaded a category at a time when a function is selected.
 	Global.loadingOn();
 	$http({
 		method: 'GET',
-		url: '/insights/metadata/bi-functions.json'
+		url: url + 'index.json'
 	}).then(function (response) { // Success
 		Global.loadingOff();
-		angular.forEach(response.data, function(v) { v.expand = false; });
-		$scope.functions = response.data;
+		index = response.data;
+		$scope.functions = index.categories.map(function(c) {
+			return { Name: c[0], file: c[1], expand: false, functions: [] };
+		});
+		index.functions.forEach(function(f, i) {
+			$scope.functions[f[0]].functions.push({ index: i, id: f[1], Name: f[2], Syntax: f[3] });
+		});
+		updateMatches();
 	}, function (response) { // Failure
 		Global.loadingOff();
 		$scope.cancel();
 	});
 
+	// Functions with a keyword beginning with each word of the search, or failing that a name containing it.
+	// Returns null, so that no filter is applied, if the search has no words.
+	function searchIndex(search) {
+		var words = search.toLowerCase().match(/[a-z0-9]+/g) || [], matches = null;
+		if (words.length == 0) return null;
+
+		words.forEach(function(word) {
+			var found = {}, any = false;
+			(index.prefixes[word.substr(0, index.prefixLength)] || []).forEach(function(keyword) {
+				if (keyword.indexOf(word) == 0) {
+					index.keywords[keyword].forEach(function(i) { found[i] = any = true; });
+				}
+			});
+			if (!any) { // e.g. 'string' for Substring
+				index.functions.forEach(function(f, i) {
+					if (f[2].toLowerCase().indexOf(word) > -1) found[i] = true;
+				});
+			}
+			if (matches) {
+				for (var i in matches) {
+					if (!found[i]) delete matches[i];
+				}
+			} else
+				matches = found;
+		});
+		return matches;
+	}
+
+	function updateMatches() {
+		$scope.matches = index && $scope.search ? searchIndex($scope.search) : null;
+	}
+	$scope.$watch('search', updateMatches);
+
 	$scope.expand = function(folder) {
 		folder.expand = !folder.expand;
 	}
 
-	$scope.select = function(file) {
+	$scope.select = function(file, folder) {
 		$scope.selected.selected = false;
 		file.selected = true;
 		$scope.selected = file;
 		$scope.showDesc = true;
+
+		if (!file.Desc) {
+			$http({ method: 'GET', url: url + folder.file, cache: true }).then(function (response) {
+				angular.extend(file, response.data[file.id]);
+			});
+		}
 	}
 
 	$scope.accept = function() { close($scope.selected); };
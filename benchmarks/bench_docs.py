@@ -0,0 +1,243 @@
+#!/usr/bin/python
+#
+# Benchmark suite for the documentation toolchain
+#
+# Generates a synthetic corpus of markdown pages, each with a deep tree of headings and a number
+# of screenshots, and of JSDoc module pages with thousands of members. The corpus is run through
+# the pipeline stages used by private-docs/gendoc.py: md_to_html.py for the markdown and
+# mod_doc.py for the JSDoc pages. Throughput is reported in pages/s and MB/s of output, along
+# with peak memory, and the results can be saved and compared against an earlier run.
+#
+# Pandoc can be swapped for benchmarks/pandoc_stub.py with --stub, to measure the Python
+# overhead of the build on its own.
+#
+# Usage:
+#	python bench_docs.py --stub -n 100 -m 5 -o results.json
+#	python bench_docs.py --stub -n 100 -m 5 -b results.json
+#
+# Prerequisites:
+#	Pandoc, unless --stub is used
+#	lxml, for the JSDoc stage
+#
+
+# Standard python distribution libraries:
+import os, sys
+import json, time, zlib, struct, random, shutil, argparse, platform, tempfile, subprocess
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_DIR = os.path.normpath(os.path.join(BENCH_DIR, os.pardir))
+sys.path.insert(0, os.path.join(MAIN_DIR, 'private-docs'))
+import md_to_html
+import build_report
+
+try:
+	import bench_mod_doc
+except ImportError:
+	bench_mod_doc = None # lxml is not installed
+
+MOD_DOC = os.path.join(MAIN_DIR, 'docs', 'api', 'scripts', 'mod_doc.py')
+PANDOC_STUB = os.path.join(BENCH_DIR, 'pandoc_stub.py')
+
+# Write a PNG image that compresses like a screenshot: mostly flat rows with some detailed ones
+def writePNG(filename, width, height, rng):
+	detail = [''.join(chr(rng.randint(0, 255)) for i in range(width * 3)) for j in range(16)]
+	flat = [chr(c) * (width * 3) for c in (255, 240, 221, 51)]
+
+	rows = []
+	for y in range(height):
+		row = rng.choice(detail) if rng.random() < 0.2 else rng.choice(flat)
+		rows.append('\x00' + row)
+
+	def chunk(type, data):
+		return struct.pack('>I', len(data)) + type + data + struct.pack('>I', zlib.crc32(type + data) & 0xffffffff)
+
+	with open(filename, 'wb') as f:
+		f.write('\x89PNG\r\n\x1a\n')
+		f.write(chunk('IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+		f.write(chunk('IDAT', zlib.compress(''.join(rows), 6)))
+		f.write(chunk('IEND', ''))
+
+# Create a markdown page with a heading tree of the given depth and a number of screenshots
+def syntheticMarkdown(title, images, depth, breadth):
+	lines = ['%% %s\n' % title]
+	sections = []
+
+	def addSection(level, number):
+		sections.append(len(lines))
+		lines.append('%s Section %s\n' % ('#' * level, number))
+		lines.append('Text for section %s, describing a feature of *Insights* and how to use it in a dashboard.\n' % number)
+		if level == depth:
+			lines.append('```\nvar query = new obiee.BIQuery(columns, filters);\n```\n')
+		else:
+			for i in range(1, breadth + 1):
+				addSection(level + 1, '%s.%d' % (number, i))
+
+	for i in range(1, breadth + 1):
+		addSection(1, str(i))
+
+	# Spread the screenshots through the sections
+	for i, image in reversed(list(enumerate(images))):
+		at = sections[i * len(sections) // max(len(images), 1)] + 2
+		lines.insert(at, '![Screenshot %d](%s)\n' % (i + 1, image))
+	return '\n'.join(lines)
+
+# Generate the corpus in a folder, returning the markdown files and the JSDoc folder
+def generateCorpus(folder, args):
+	rng = random.Random(args.seed)
+	mdDir = os.path.join(folder, 'markdown')
+	os.makedirs(os.path.join(mdDir, 'images'))
+
+	pages = []
+	for p in range(args.pages):
+		images = []
+		for i in range(args.screenshots):
+			image = 'images/page%d-%d.png' % (p, i)
+			writePNG(os.path.join(mdDir, image), args.width, args.height, rng)
+			images.append(image)
+
+		page = os.path.join(mdDir, 'Page %d.md' % p)
+		with open(page, 'wb') as f:
+			f.write(syntheticMarkdown('Page %d' % p, images, args.depth, args.breadth))
+		pages.append(page)
+
+	jsDir = os.path.join(folder, 'api')
+	os.makedirs(jsDir)
+	if bench_mod_doc:
+		for p in range(args.jsdoc_pages):
+			with open(os.path.join(jsDir, 'module-synthetic%d.html' % p), 'wb') as f:
+				f.write(bench_mod_doc.syntheticPage(args.members, args.members))
+	return pages, jsDir
+
+# Convert the markdown pages as gendoc.py does, with one converter shared by a pool of threads
+def convertPages(report, pages, outDir, args):
+	pandoc = [sys.executable, PANDOC_STUB] if args.stub else args.pandoc.split()
+	assets = os.path.join(outDir, 'assets') if args.assets else None
+	failed = []
+
+	with md_to_html.Converter(assets=assets, pandoc=pandoc) as converter:
+		def convert(page):
+			out = os.path.join(outDir, os.path.splitext(os.path.basename(page))[0].lower().replace(' ', '-') + '.html')
+			start, error = time.time(), None
+			try:
+				converter.convert(page, out)
+			except md_to_html.ConversionError, err:
+				error = str(err)
+			report.addFile('Markdown conversion', page, out, time.time() - start, error=error)
+			return out, error
+
+		with report.stage('Markdown conversion') as stage:
+			stage['outputs'] = [outDir]
+			pool = ThreadPool(args.jobs)
+			try:
+				for out, error in pool.imap_unordered(convert, pages):
+					if error:
+						failed.append(error)
+			finally:
+				pool.close()
+				pool.join()
+	return failed
+
+# Post-process the JSDoc pages with mod_doc.py, as gendoc.py does
+def processJSDoc(report, jsDir, args):
+	with report.stage('JSDoc post-processing') as stage:
+		stage['outputs'] = [jsDir]
+		return subprocess.call([sys.executable, MOD_DOC, jsDir, '-j', str(args.jobs)], stdout=open(os.devnull, 'wb'))
+
+# Summarise a stage as throughput figures
+def stageResult(stage, pages):
+	wall = stage['wall'] or 1e-6
+	return {
+		'pages' : pages,
+		'wall' : stage['wall'],
+		'cpu' : stage['cpu'],
+		'pages_per_s' : round(pages / wall, 2),
+		'mb_per_s' : round(stage['output_bytes'] / 1048576.0 / wall, 3),
+		'output_bytes' : stage['output_bytes'],
+		'peak_rss' : max(stage['peak_rss'], stage['peak_rss_children']) if stage['peak_rss'] else None
+	}
+
+# Print the results, with the change in throughput against a baseline if one is given
+def printResults(results, baseline):
+	print '\n%-24s %7s %9s %9s %9s %11s %9s' % ('Stage', 'Pages', 'Wall (s)', 'Pages/s', 'MB/s', 'Peak RSS', 'vs base')
+	for name, r in sorted(results['stages'].items()):
+		rss = '%.1f MB' % (r['peak_rss'] / 1048576.0) if r['peak_rss'] else '-'
+		change = ''
+		base = baseline['stages'].get(name) if baseline else None
+		if base and base['pages_per_s']:
+			change = '%+.1f%%' % (100.0 * (r['pages_per_s'] - base['pages_per_s']) / base['pages_per_s'])
+		print '%-24s %7d %9.2f %9.1f %9.2f %11s %9s' % (name, r['pages'], r['wall'], r['pages_per_s'], r['mb_per_s'], rss, change)
+
+	if baseline and baseline['params'] != results['params']:
+		print '\nWarning: the baseline was run with different parameters, so the figures may not be comparable.'
+
+def main():
+	parser = argparse.ArgumentParser(description="Insights documentation toolchain benchmark")
+	parser.add_argument('-n', '--pages', action='store', type=int, default=50, help='Number of markdown pages to generate.')
+	parser.add_argument('-m', '--screenshots', action='store', type=int, default=5, help='Number of screenshots in each page.')
+	parser.add_argument('-d', '--depth', action='store', type=int, default=4, help='Depth of the heading tree in each page.')
+	parser.add_argument('--breadth', action='store', type=int, default=3, help='Number of subsections under each heading.')
+	parser.add_argument('--width', action='store', type=int, default=1280, help='Width of the screenshots in pixels.')
+	parser.add_argument('--height', action='store', type=int, default=720, help='Height of the screenshots in pixels.')
+	parser.add_argument('--jsdoc-pages', action='store', type=int, default=4, help='Number of JSDoc module pages to generate.')
+	parser.add_argument('--members', action='store', type=int, default=2000, help='Number of members (and methods) in each JSDoc page.')
+	parser.add_argument('-j', '--jobs', action='store', type=int, default=0, help='Number of pages to process in parallel. Use 0 for one per CPU core.')
+	parser.add_argument('-e', '--assets', action='store_true', default=False, help='Store images and CSS in a shared asset folder instead of embedding them.')
+	parser.add_argument('--stub', action='store_true', default=False, help='Use pandoc_stub.py in place of Pandoc, to measure the Python overhead alone.')
+	parser.add_argument('--pandoc', action='store', default='pandoc', help='Command used to run Pandoc.')
+	parser.add_argument('--seed', action='store', type=int, default=1, help='Seed for the generated screenshots.')
+	parser.add_argument('-o', '--output', action='store', help='Save the results to this JSON file.')
+	parser.add_argument('-b', '--baseline', action='store', help='Compare the results with those saved in this JSON file.')
+	args = parser.parse_args()
+	args.jobs = args.jobs or multiprocessing.cpu_count()
+
+	baseline = None
+	if args.baseline:
+		with open(args.baseline, 'r') as f:
+			baseline = json.load(f)
+
+	tempDir = tempfile.mkdtemp(prefix='bench_docs-')
+	try:
+		print 'Generating corpus of %d pages with %d screenshots each...' % (args.pages, args.screenshots)
+		pages, jsDir = generateCorpus(tempDir, args)
+
+		report = build_report.BuildReport(tempDir)
+		results = {
+			'params' : dict((k, v) for k, v in vars(args).items() if k not in ('output', 'baseline', 'jobs')),
+			'environment' : {
+				'python' : platform.python_version(),
+				'platform' : platform.platform(),
+				'cpus' : multiprocessing.cpu_count(),
+				'jobs' : args.jobs
+			},
+			'date' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+			'stages' : {}
+		}
+
+		print 'Converting markdown pages...'
+		failed = convertPages(report, pages, os.path.join(tempDir, 'html'), args)
+		if failed:
+			print '\n%d page(s) failed to convert, the first error was:\n%s' % (len(failed), failed[0])
+		results['stages']['Markdown conversion'] = stageResult(report.stages[-1], len(pages) - len(failed))
+
+		if bench_mod_doc and args.jsdoc_pages:
+			print 'Post-processing JSDoc pages...'
+			if processJSDoc(report, jsDir, args) != 0:
+				print '\nmod_doc.py failed.'
+			results['stages']['JSDoc post-processing'] = stageResult(report.stages[-1], args.jsdoc_pages)
+		else:
+			print 'Skipping JSDoc pages, as lxml is not installed.'
+
+		results['files'] = sorted(report.files, key=lambda f: -f['wall'])[:10]
+	finally:
+		shutil.rmtree(tempDir)
+
+	printResults(results, baseline)
+	if args.output:
+		with open(args.output, 'wb') as f:
+			f.write(json.dumps(results, indent=1, sort_keys=True, separators=(',', ': ')))
+		print '\nResults saved to:\t%s' % args.output
+
+if __name__ == "__main__":
+	main()
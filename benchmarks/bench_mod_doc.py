@@ -0,0 +1,77 @@
+#!/usr/bin/python
+#
+# Micro-benchmark for the JSDoc post-processor (docs/api/scripts/mod_doc.py)
+#
+# Generates synthetic module pages with thousands of members and methods and times the
+# navigation index built by mod_doc.indexDoc against the XPath query it replaced, as well
+# as the whole of processDoc. Times should grow linearly with the number of members.
+#
+# Prerequisites:
+#	lxml
+#
+
+# Standard python distribution libraries:
+import os, sys
+import time, shutil, argparse, tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'docs', 'api', 'scripts'))
+import mod_doc
+from mod_doc import ET
+
+# Create a JSDoc style module page with the given number of members and methods
+def syntheticPage(members, methods):
+	html = ['<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n<title>JSDoc: Module: synthetic</title>']
+	html.append('<link type="text/css" rel="stylesheet" href="styles/jsdoc-default.css">\n</head>\n<body>\n<div id="main">')
+	html.append('<h1 class="page-title">Module: synthetic</h1>\n<section>\n<article>')
+
+	for heading, count, name in [('Members', members, 'member'), ('Methods', methods, 'method')]:
+		html.append('<h3 class="subsection-title">%s</h3>' % heading)
+		for i in range(count):
+			html.append('<h4 class="name" id=".%s%d"><span class="type-signature">(static) </span>%s%d</h4>' % (name, i, name, i))
+			html.append('<div class="description">Description of %s %d &rarr; with <code>a &lt; b</code></div>' % (name, i))
+			html.append('<dl class="details"><dt class="tag-see">See:</dt><dd class="tag-see"><ul><li>%s%d</li></ul></dd></dl>' % (name, (i + 1) % count))
+
+	html.append('</article>\n</section>\n</div>')
+	html.append('<nav><h2><a href="index.html">Home</a></h2><h3>Modules</h3><ul><li><a href="module-synthetic.html">synthetic</a></li></ul></nav>')
+	html.append('<br class="clear">\n<footer>Documentation generated by JSDoc</footer>\n</body>\n</html>')
+	return '\n'.join(html)
+
+# Time a function, returning the best of a number of runs in milliseconds
+def timeIt(func, repeat):
+	best = None
+	for i in range(repeat):
+		start = time.time()
+		func()
+		elapsed = (time.time() - start) * 1000
+		best = elapsed if best is None else min(best, elapsed)
+	return best
+
+def main():
+	parser = argparse.ArgumentParser(description="mod_doc.py micro-benchmark")
+	parser.add_argument('-n', '--members', action='store', type=int, nargs='+', default=[500, 1000, 2000, 4000], help='Numbers of members (and methods) to generate pages with.')
+	parser.add_argument('-r', '--repeat', action='store', type=int, default=3, help='Number of runs to take the best time from.')
+	parser.add_argument('--skip-xpath', action='store_true', default=False, help='Do not time the old XPath query, which is slow on large pages.')
+	args = parser.parse_args()
+
+	tempDir = tempfile.mkdtemp(prefix='bench_mod_doc-')
+	try:
+		print '%10s %14s %14s %16s' % ('Members', 'XPath (ms)', 'indexDoc (ms)', 'processDoc (ms)')
+		for count in args.members:
+			page = os.path.join(tempDir, 'module-synthetic.html')
+			with open(page, 'wb') as f:
+				f.write(syntheticPage(count, count))
+
+			root = ET.fromstring(mod_doc.readFile(page), ET.HTMLParser(remove_blank_text=True, encoding='utf-8'))
+			if args.skip_xpath:
+				xpath = float('nan')
+			else:
+				xpath = timeIt(lambda: [root.xpath('.//h4[preceding-sibling::h3[1] = "%s"]' % t) for t in ['Members', 'Methods']], args.repeat)
+			index = timeIt(lambda: mod_doc.indexDoc(root), args.repeat)
+			process = timeIt(lambda: mod_doc.processDoc(page, os.path.join(tempDir, 'output.html')), args.repeat)
+
+			print '%10d %14.1f %14.1f %16.1f' % (count, xpath, index, process)
+	finally:
+		shutil.rmtree(tempDir)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,627 @@
+#!/usr/bin/python3
+#
+# Stand-in for the OBIEE web services, used to benchmark the Insights data layer without a BI server
+#
+# Answers the SOAP calls js/obiee.js makes through wsCall, on the same paths as OBIEE
+# (/analytics-ws/saw.dll?SOAPImpl=<service>) and the /insights/obi-ws mapping in WEB-INF/web.xml:
+#
+#	logon, logoff, getCurUser, getGroups				Sessions are accepted for any user and password
+#	getSubjectAreas, describeSubjectArea			Synthetic subject areas, tables and columns
+#	executeSQLQuery, executeXMLQuery				Synthetic rowsets, shaped by the query's select list
+#	fetchNext, cancelQuery							Pages of results larger than maxRowsPerPage, or run asynchronously
+#	getSubItems, getItemInfo, readObjects, writeObjects	In-memory web catalogue with generated dashboards
+#
+# Rowsets have one column per item in the select list, typed from the subject area metadata (or
+# from any CAST), and --rows rows, or fewer if the query has a FETCH FIRST clause. Queries that
+# cannot be parsed get --width columns of --types. Data is generated from --seed and the query
+# text, so the same query always returns the same rows. Every call waits --latency ms, plus
+# --row-latency us per row returned, before answering.
+#
+# The catalogue holds --dashboards published dashboards under /shared/Benchmark, each with --pages
+# pages of --visuals table visualisations. Request counts and timings are served as JSON from
+# /stats, and printed when the server stops. With --root, the application is also served from
+# /insights/, so pages can be loaded in a browser against the stand-in.
+#
+# Usage:
+#	python3 obiee_stub.py --rows 50000 --latency 200 --root ..
+#
+# Requires Python 3, for asyncio. Only the standard library is used.
+#
+
+# Standard python distribution libraries:
+import os, sys, re, signal
+import html, json, time, zlib, random, fnmatch, asyncio, argparse, datetime, mimetypes
+from functools import lru_cache
+from urllib.parse import urlsplit, unquote
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+SOAP_PATHS = ['/analytics-ws/saw.dll', '/insights/obi-ws'] # The obi-ws servlet is mapped within the Insights web app
+TYPES = ['varchar', 'integer', 'double', 'date', 'timestamp']
+CAST_TYPES = {'double' : 'double', 'float' : 'double', 'numeric' : 'double', 'integer' : 'integer', 'int' : 'integer', 'smallint' : 'integer',
+	'char' : 'varchar', 'varchar' : 'varchar', 'date' : 'date', 'timestamp' : 'timestamp'}
+ROLES = ['AuthenticatedUser', 'BIConsumer', 'BIAuthor']
+
+CATALOGUE_ROOT = '/shared/Benchmark'
+PUBLISHED_LIST = '/shared/RM-Insights/Published-Dashboards'
+RM_VERSION = '1.0'
+BASE_DATE = datetime.date(2015, 1, 1)
+
+ENVELOPE = '<?xml version="1.0" encoding="UTF-8"?>\n<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/" ' \
+	'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema" ' \
+	'xmlns:sawsoap="urn://oracle.bi.webservices/v6"><soap:Body>%s</soap:Body></soap:Envelope>'
+ROWSET = '<rowset xmlns="urn:schemas-microsoft-com:xml-analysis:rowset">%s</rowset>'
+
+# Raised by an operation to answer with a SOAP fault
+class SOAPFault(Exception):
+	pass
+
+# Tag name without its namespace
+def localName(tag):
+	return tag.split('}')[-1]
+
+# Element with the given children, which are either markup or (tag, value) pairs to be escaped
+def element(tag, *children, **attrs):
+	attrs = ''.join(' %s="%s"' % (k.replace('_', ':'), v) for k, v in attrs.items())
+	content = ''.join(c if isinstance(c, str) else '<sawsoap:%s>%s</sawsoap:%s>' % (c[0], escape(str(c[1])), c[0]) for c in children)
+	return '<sawsoap:%s%s>%s</sawsoap:%s>' % (tag, attrs, content, tag)
+
+# Read the operation name and parameters from a SOAP request. Repeated parameters become lists,
+# nested ones are kept as elements.
+def parseRequest(body):
+	try:
+		root = ElementTree.fromstring(body)
+	except ElementTree.ParseError as err:
+		raise SOAPFault('Could not parse request: %s' % err)
+	bodies = [e for e in root if localName(e.tag) == 'Body']
+	if not bodies or len(bodies[0]) == 0:
+		raise SOAPFault('No operation in request')
+	op = bodies[0][0]
+
+	params = {}
+	for child in op:
+		name = localName(child.tag)
+		value = child if len(child) else (child.text or '')
+		if name in params:
+			if not isinstance(params[name], list):
+				params[name] = [params[name]]
+			params[name].append(value)
+		else:
+			params[name] = value
+	return localName(op.tag), params
+
+# Values of a parameter that can be repeated
+def paramList(params, name):
+	value = params.get(name, [])
+	return value if isinstance(value, list) else [value]
+
+# Child text of a nested parameter, by local name
+def childText(elem, name, default=''):
+	for child in elem.iter():
+		if localName(child.tag) == name:
+			return child.text or ''
+	return default
+
+# Split a select list on the commas outside brackets and quotes
+def splitColumns(select):
+	columns, depth, quote, start = [], 0, None, 0
+	for i, char in enumerate(select):
+		if quote:
+			if char == quote:
+				quote = None
+		elif char in '\'"':
+			quote = char
+		elif char == '(':
+			depth += 1
+		elif char == ')':
+			depth -= 1
+		elif char == ',' and depth == 0:
+			columns.append(select[start:i].strip())
+			start = i + 1
+	columns.append(select[start:].strip())
+	return [c for c in columns if c]
+
+# Synthetic subject areas, each with dimension tables of attributes and a fact table of measures
+def buildModel(options):
+	rng = random.Random(options.seed)
+	model = {}
+	for s in range(options.subject_areas):
+		tables = []
+		for t in range(options.tables):
+			columns = [{'name' : 'Attribute %d' % (c + 1), 'dataType' : 'varchar' if c == 0 else rng.choice(TYPES), 'aggrRule' : 'none'}
+				for c in range(options.columns)]
+			tables.append({'name' : 'Dimension %d' % (t + 1), 'columns' : columns})
+		measures = [{'name' : 'Measure %d' % (c + 1), 'dataType' : rng.choice(['double', 'integer']), 'aggrRule' : 'sum'} for c in range(options.columns)]
+		tables.append({'name' : 'Facts', 'columns' : measures})
+		model['Benchmark %d' % (s + 1)] = tables
+	return model
+
+# Data type of each column code in each subject area
+def columnTypes(model):
+	types = {}
+	for subjectArea, tables in model.items():
+		for table in tables:
+			for column in table['columns']:
+				types[(subjectArea, '"%s"."%s"' % (table['name'], column['name']))] = column['dataType']
+	return types
+
+# Visualisation as saved by obiee.js, a table of the given columns
+def tableVisual(id, subjectArea, columns, x, y):
+	criteria = [{'Code' : '"%s"."%s"' % (table, column['name']), 'Name' : column['name'], 'DataType' : column['dataType'], 'Table' : table,
+		'Measure' : column['aggrRule'], 'SubjectArea' : subjectArea, 'SortKey' : False} for table, column in columns]
+	return {
+		'Plugin' : 'table', 'Config' : {}, 'ColumnMap' : {'columns' : criteria, 'hidden' : []},
+		'Query' : {'SubjectArea' : subjectArea, 'Criteria' : criteria, 'Filters' : [], 'Sort' : []},
+		'X' : x, 'Y' : y, 'ID' : id, 'Name' : 'Table (%d)' % (id + 1), 'ConditionalFormats' : [], 'DisplayName' : 'Table %d' % (id + 1)
+	}
+
+# Analysis XML holding a block of script in its static text view, as written by obiee.js
+def analysisXML(subjectArea, script):
+	return '<?xml version="1.0"?><saw:report xmlns:saw="com.siebel.analytics.web/report/v1.1" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" ' \
+		'xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlVersion="201201160" xmlns:sawx="com.siebel.analytics.web/expression/v1.1">' \
+		'<saw:criteria xsi:type="saw:simpleCriteria" subjectArea="&quot;%s&quot;"><saw:columns><saw:column xsi:type="saw:regularColumn" columnID="c0">' \
+		'<saw:columnFormula><sawx:expr xsi:type="sawx:sqlExpression">\'Dummy\'</sawx:expr></saw:columnFormula></saw:column></saw:columns></saw:criteria>' \
+		'<saw:views currentView="0"><saw:view xsi:type="saw:htmlview" name="rmvppView"><saw:staticText><saw:caption fmt="html"><saw:text>%s</saw:text>' \
+		'</saw:caption></saw:staticText></saw:view><saw:view xsi:type="saw:compoundView" name="compoundView!1"><saw:cvTable><saw:cvRow>' \
+		'<saw:cvCell viewName="rmvppView"/></saw:cvRow></saw:cvTable></saw:view></saw:views></saw:report>' % (escape(subjectArea), escape(script))
+
+# In-memory catalogue of folders and objects, with published dashboards generated from the model
+def buildCatalogue(model, options):
+	catalogue = {'/shared' : {'type' : 'Folder', 'properties' : {}}, '/shared/RM-Insights' : {'type' : 'Folder', 'properties' : {}},
+		CATALOGUE_ROOT : {'type' : 'Folder', 'properties' : {}}}
+	subjectArea = sorted(model)[0]
+	columns = [(table['name'], column) for table in model[subjectArea] for column in table['columns']]
+	dimensions = [c for c in columns if c[0] != 'Facts']
+	measures = [c for c in columns if c[0] == 'Facts']
+
+	published = []
+	for d in range(options.dashboards):
+		folder = '%s/Dashboard %d' % (CATALOGUE_ROOT, d + 1)
+		catalogue[folder] = {'type' : 'Folder', 'properties' : {'RM-Dashboard' : '1'}}
+		published.append({'path' : folder, 'icon' : 'table', 'desc' : 'Generated benchmark dashboard', 'tags' : ['benchmark'], 'name' : 'Dashboard %d' % (d + 1)})
+		for p in range(options.pages):
+			script = ['<script id="insightsLogic">', '\tvar biVisArray = [], biHiddenVisArray = [], biSelectors = [], biVisSelectors = [], biInteractions = [], ' \
+				'biDrilldowns = [], biUtilities = [], biPrompt = {}, biDB = new obiee.BIDashboardPage();']
+			for v in range(options.visuals):
+				n = options.vis_columns
+				visColumns = [dimensions[(v + i) % len(dimensions)] for i in range(max(n - 1, 1))] + [measures[v % len(measures)]]
+				visual = tableVisual(v, subjectArea, visColumns, 20 + (v % 2) * 440, 20 + (v // 2) * 420)
+				script.append('\t/* Visualisation %d */ var biVis%d = %s/* End of Visualisation %d */' % (v + 1, v + 1, json.dumps(visual), v + 1))
+			script.append('\tbiDB.Visuals = biVisArray;')
+			script.append('</script>')
+			catalogue['%s/Page %d' % (folder, p + 1)] = {'type' : 'Object', 'properties' : {'RM-Version' : RM_VERSION},
+				'xml' : analysisXML(subjectArea, '\n'.join(script))}
+
+	script = '<script>\n\t/* Dashboard List */ var res1 = %s/* End of Dashboard List */</script>' % json.dumps(published)
+	catalogue[PUBLISHED_LIST] = {'type' : 'Object', 'properties' : {'RM-Version' : RM_VERSION}, 'xml' : analysisXML('Dummy', script)}
+	return catalogue
+
+# Generated value for a column of a data type
+def columnValue(rng, dataType, index, distinct):
+	if dataType == 'integer':
+		return str(rng.randrange(1000))
+	elif dataType == 'double':
+		return '%.2f' % rng.uniform(0, 10000)
+	elif dataType == 'date':
+		return (BASE_DATE + datetime.timedelta(days=rng.randrange(distinct))).isoformat()
+	elif dataType == 'timestamp':
+		return (BASE_DATE + datetime.timedelta(minutes=rng.randrange(distinct * 1440))).isoformat()
+	return 'Value %d.%d' % (index + 1, rng.randrange(distinct))
+
+# Row XML for columns of the given data types, or constant values given as (None, value)
+def buildRows(columns, rows, seed, nulls, distinct):
+	rng = random.Random(seed)
+	lines = []
+	for r in range(rows):
+		cells = []
+		for i, (dataType, constant) in enumerate(columns):
+			if dataType is None:
+				value = constant
+			elif nulls and rng.random() < nulls:
+				continue # Null values are left out, as OBIEE does
+			else:
+				value = columnValue(rng, dataType, i, distinct)
+			cells.append('<Column%d>%s</Column%d>' % (i, escape(value), i))
+		lines.append('<Row>%s</Row>' % ''.join(cells))
+	return tuple(lines)
+
+# Parse the SOAP requests made by obiee.js and answer them from the synthetic model and catalogue
+class OBIEEStub(object):
+	def __init__(self, options):
+		self.options = options
+		self.model = buildModel(options)
+		self.types = columnTypes(self.model)
+		self.catalogue = buildCatalogue(self.model, options)
+		self.sessions = {}
+		self.queries = {} # Paged queries with rows still to fetch, by query ID
+		self.queryCount = 0
+		self.latency = random.Random(options.seed) # Jitter sequence, repeated on each run
+		self.stats = {'started' : time.time(), 'operations' : {}}
+		self.rows = lru_cache(maxsize=options.cache)(self.rows)
+
+	# Record a call in the statistics
+	def record(self, op, seconds, size, rows, fault):
+		stat = self.stats['operations'].setdefault(op, {'calls' : 0, 'faults' : 0, 'seconds' : 0.0, 'bytes' : 0, 'rows' : 0})
+		stat['calls'] += 1
+		stat['faults'] += 1 if fault else 0
+		stat['seconds'] += seconds
+		stat['bytes'] += size
+		stat['rows'] += rows
+
+	# Answer a SOAP request, returning the response XML and number of rows
+	async def call(self, body):
+		start = time.time()
+		op, rows, fault = 'unknown', 0, False
+		try:
+			op, params = parseRequest(body)
+			if op != 'logon' and params.get('sessionID') not in self.sessions:
+				raise SOAPFault('Invalid session ID or session expired')
+			handler = getattr(self, 'op_' + op, None)
+			result, rows = handler(params) if handler else (element(op + 'Result'), 0)
+		except SOAPFault as err:
+			fault = True
+			result = '<soap:Fault><faultcode>soap:Server</faultcode><faultstring>%s</faultstring></soap:Fault>' % escape(str(err))
+
+		wait = self.options.latency / 1000.0 + self.options.row_latency * rows / 1000000.0
+		if self.options.jitter:
+			wait += self.latency.uniform(0, self.options.jitter / 1000.0)
+		if wait > 0:
+			await asyncio.sleep(wait)
+
+		response = (ENVELOPE % result).encode('utf-8')
+		self.record(op, time.time() - start, len(response), rows, fault)
+		return response
+
+	# Cached rows for a query, keyed by the query text and its columns
+	def rows(self, sql, columns, rows):
+		seed = zlib.crc32(('%s:%s' % (self.options.seed, sql)).encode('utf-8'))
+		return buildRows(columns, rows, seed, self.options.nulls, self.options.distinct)
+
+	# Column types for a list of select expressions from a subject area
+	def selectTypes(self, subjectArea, expressions):
+		columns = []
+		for i, expr in enumerate(expressions):
+			cast = re.match(r'CAST\s*\(.*\s+AS\s+(\w+)\s*(?:\(\s*\d+\s*\))?\s*\)$', expr, re.IGNORECASE | re.DOTALL)
+			literal = re.match(r"'(.*)'$", expr, re.DOTALL)
+			number = re.match(r'-?\d+(\.\d+)?$', expr)
+			if cast:
+				columns.append((CAST_TYPES.get(cast.group(1).lower(), 'varchar'), None))
+			elif literal:
+				columns.append((None, literal.group(1).replace("''", "'")))
+			elif number:
+				columns.append((None, expr))
+			elif re.match(r'COUNT\s*\(', expr, re.IGNORECASE):
+				columns.append(('integer', None))
+			else:
+				column = re.sub(r'^(SUM|AVG|MIN|MAX)\s*\((.*)\)$', r'\2', expr, flags=re.IGNORECASE | re.DOTALL).strip()
+				dataType = self.types.get((subjectArea, column))
+				columns.append((dataType or self.options.types[i % len(self.options.types)], None))
+		return tuple(columns)
+
+	# Columns and row count for a logical SQL query
+	def queryShape(self, sql):
+		rows = self.options.rows
+		fetch = re.search(r'FETCH\s+FIRST\s+(\d+)\s+ROWS?\s+ONLY', sql, re.IGNORECASE)
+		if fetch:
+			rows = min(rows, int(fetch.group(1)))
+
+		select = re.match(r'\s*SELECT\s+(?:DISTINCT\s+)?(.*?)\s+FROM\s+"([^"]*)"', sql, re.IGNORECASE | re.DOTALL)
+		if select:
+			return self.selectTypes(select.group(2), splitColumns(select.group(1))), rows
+		return tuple((self.options.types[i % len(self.options.types)], None) for i in range(self.options.width)), rows
+
+	# Session and repository variables, in the form returned by NQSGetSessionValues
+	def sessionValues(self, user):
+		values = [('NQ_SESSION.USER', 'VARCHAR', user), ('NQ_SESSION.DISPLAYNAME', 'VARCHAR', user),
+			('NQ_SESSION.ROLES', 'VARCHAR', ';'.join(ROLES)), ('NQ_SESSION.GROUP', 'VARCHAR', ';'.join(ROLES)),
+			('CURRENT_YEAR', 'INTEGER', str(BASE_DATE.year)), ('BENCHMARK_NAME', 'VARCHAR', "'Benchmark'")]
+		return tuple('<Row><Column0>%s</Column0><Column1>%s</Column1><Column2>%d</Column2><Column3>%s</Column3></Row>' %
+			(name, dataType, len(value), escape(value)) for name, dataType, value in values)
+
+	# Query result in the form returned by the XML view service
+	def queryResult(self, op, rows, queryID='', finished=True):
+		return element(op + 'Result', element('return', ('rowset', ROWSET % ''.join(rows)), ('queryID', queryID),
+			('finished', 'true' if finished else 'false'), xsi_type='sawsoap:QueryResults'))
+
+	# Next page of a paged query, removing the query once its last page is returned
+	def nextPage(self, op, queryID):
+		query = self.queries[queryID]
+		rows = query['rows'][query['offset']:query['offset'] + query['pageSize']]
+		query['offset'] += len(rows)
+		finished = query['offset'] >= len(query['rows'])
+		if finished:
+			del self.queries[queryID]
+		return self.queryResult(op, rows, queryID, finished), len(rows)
+
+	# Catalogue item information, with the permissions each role has
+	def itemInfo(self, path, includeACL=True, tag='itemInfo'):
+		item = self.catalogue[path]
+		properties = ''.join(element('itemProperties', ('name', k), ('value', v)) for k, v in sorted(item['properties'].items()))
+		acl = ''
+		if includeACL:
+			tokens = ''.join(element('accessControlTokens', element('account', ('name', role), ('accountType', 4), ('guid', role)),
+				('permissionMask', 65535)) for role in ROLES)
+			acl = element('acl', tokens)
+		return element(tag, ('path', path), ('type', item['type']), ('caption', path.rsplit('/', 1)[-1]),
+			('signature', 'queryitem1' if item['type'] == 'Object' else 'folder'), ('attributes', 4 if item['type'] == 'Object' else 0),
+			properties, acl)
+
+	# Add a catalogue folder and any missing parents
+	def addFolder(self, path):
+		while path and path not in self.catalogue:
+			self.catalogue[path] = {'type' : 'Folder', 'properties' : {}}
+			path = path.rsplit('/', 1)[0]
+
+	def op_logon(self, params):
+		user = params.get('name') or 'benchmark'
+		sessionID = '%08x%08x' % (zlib.crc32(user.encode('utf-8')), len(self.sessions) + 1)
+		self.sessions[sessionID] = user
+		return element('logonResult', element('sessionID', escape(sessionID), xsi_type='xsd:string')), 0
+
+	def op_logoff(self, params):
+		self.sessions.pop(params.get('sessionID'), None)
+		for queryID in [q for q in self.queries if self.queries[q]['sessionID'] == params.get('sessionID')]:
+			del self.queries[queryID]
+		return element('logoffResult'), 0
+
+	def op_getCurUser(self, params):
+		return element('getCurUserResult', element('return', escape(self.sessions[params['sessionID']]), xsi_type='xsd:string')), 0
+
+	def op_getGroups(self, params):
+		return element('getGroupsResult', *[element('account', ('name', role), ('displayName', role), ('accountType', 4), ('guid', role))
+			for role in ROLES]), 0
+
+	def op_getSubjectAreas(self, params):
+		return element('getSubjectAreasResult', *[element('subjectArea', ('name', name), ('displayName', name), ('description', ''))
+			for name in sorted(self.model)]), 0
+
+	def op_describeSubjectArea(self, params):
+		name = params.get('subjectAreaName', '')
+		if name not in self.model:
+			raise SOAPFault('Subject area %s not found' % name)
+		tables = []
+		for table in self.model[name]:
+			columns = [element('columns', ('name', '"%s"' % c['name']), ('displayName', c['name']), ('description', ''),
+				('dataType', c['dataType']), ('aggrRule', c['aggrRule'])) for c in table['columns']]
+			tables.append(element('tables', ('name', '"%s"' % table['name']), ('displayName', table['name']), ('description', ''), *columns))
+		return element('describeSubjectAreaResult', element('subjectArea', ('name', name), ('displayName', name), *tables)), 0
+
+	def op_executeSQLQuery(self, params):
+		sql = params.get('sql', '')
+		if re.match(r'\s*CALL\s+NQSGetSessionValues', sql, re.IGNORECASE):
+			rows = self.sessionValues(self.sessions[params['sessionID']])
+		else:
+			columns, count = self.queryShape(sql)
+			rows = self.rows(sql, columns, count)
+
+		# Results larger than a page, or run asynchronously, are fetched with fetchNext
+		options = params.get('executionOptions')
+		pageSize = childText(options, 'maxRowsPerPage') if options is not None else ''
+		pageSize = int(pageSize) if pageSize.isdigit() and int(pageSize) > 0 else len(rows)
+		asynchronous = options is not None and childText(options, 'async').upper() == 'TRUE'
+		if not asynchronous and len(rows) <= pageSize:
+			return self.queryResult('executeSQLQuery', rows), len(rows)
+
+		self.queryCount += 1
+		queryID = 'RS%d' % self.queryCount
+		self.queries[queryID] = {'sessionID' : params['sessionID'], 'rows' : rows, 'offset' : 0, 'pageSize' : pageSize}
+		if asynchronous: # The first response of an asynchronous query has no rows
+			return self.queryResult('executeSQLQuery', (), queryID, False), 0
+		return self.nextPage('executeSQLQuery', queryID)
+
+	def op_fetchNext(self, params):
+		queryID = params.get('queryID', '')
+		if self.queries.get(queryID, {}).get('sessionID') != params['sessionID']:
+			raise SOAPFault('Query %s not found' % queryID)
+		return self.nextPage('fetchNext', queryID)
+
+	def op_cancelQuery(self, params):
+		queryID = params.get('queryID', '')
+		if self.queries.get(queryID, {}).get('sessionID') == params['sessionID']:
+			del self.queries[queryID]
+		return element('cancelQueryResult'), 0
+
+	def op_executeXMLQuery(self, params):
+		report = params.get('report')
+		xml = childText(report, 'reportXml') if report is not None else ''
+		subjectArea = re.search(r'subjectArea="(?:&quot;|")?([^"&]*)', xml)
+		expressions = [html.unescape(e).strip() for e in re.findall(r'<sawx:expr[^>]*>(.*?)</sawx:expr>', xml, re.DOTALL)]
+		columns = self.selectTypes(subjectArea.group(1) if subjectArea else '', expressions) if expressions else self.queryShape('')[0]
+		rows = min(self.options.rows, 2500) # OBIEE limits XML queries to 2500 rows
+		return self.queryResult('executeXMLQuery', self.rows(xml, columns, rows)), rows
+
+	def op_getSubItems(self, params):
+		path = params.get('path', '').rstrip('/')
+		mask = params.get('mask') or '*'
+		options = params.get('options')
+		includeACL = options is None or childText(options, 'includeACL', 'False').lower() == 'true'
+		items = [p for p in sorted(self.catalogue) if p.rsplit('/', 1)[0] == path and fnmatch.fnmatch(p.rsplit('/', 1)[-1], mask)]
+		return element('getSubItemsResult', *[self.itemInfo(p, includeACL) for p in items]), 0
+
+	def op_getItemInfo(self, params):
+		path = params.get('path', '')
+		if path not in self.catalogue:
+			raise SOAPFault('Path not found (%s)' % path)
+		return element('getItemInfoResult', self.itemInfo(path, tag='return')), 0
+
+	def op_readObjects(self, params):
+		objects = []
+		withObject = params.get('returnOptions', 'ObjectAsString') != 'NoObject'
+		for path in paramList(params, 'paths'):
+			item = self.catalogue.get(path)
+			if item is None or item['type'] != 'Object':
+				error = element('errorInfo', ('code', 'PathNotFound'), ('message', 'Path not found (%s)' % path))
+				objects.append(element('catalogObject', element('catalogObject'), error))
+			else:
+				xml = element('catalogObject', escape(item['xml'])) if withObject else element('catalogObject')
+				objects.append(element('catalogObject', xml, self.itemInfo(path)))
+		return element('readObjectsResult', *objects), 0
+
+	def op_writeObjects(self, params):
+		for obj in paramList(params, 'catalogObjects'):
+			info = [e for e in obj if localName(e.tag) == 'itemInfo']
+			path = childText(info[0], 'path') if info else ''
+			if not path:
+				raise SOAPFault('No path given for catalogue object')
+			properties = {}
+			if info:
+				for prop in info[0]:
+					if localName(prop.tag) == 'itemProperties':
+						properties[childText(prop, 'name')] = childText(prop, 'value')
+			self.addFolder(path.rsplit('/', 1)[0])
+			old = self.catalogue.get(path, {}).get('properties', {})
+			old.update(properties)
+			self.catalogue[path] = {'type' : 'Object', 'properties' : old, 'xml' : childText(obj, 'catalogObject')}
+		return element('writeObjectsResult'), 0
+
+	def op_createFolder(self, params):
+		self.addFolder(params.get('path', '').rstrip('/'))
+		return element('createFolderResult'), 0
+
+	def op_removeFolder(self, params):
+		path = params.get('path', '').rstrip('/')
+		for p in [p for p in self.catalogue if p == path or p.startswith(path + '/')]:
+			del self.catalogue[p]
+		return element('removeFolderResult'), 0
+
+	def op_setItemProperty(self, params):
+		path = params.get('path', '')
+		if path not in self.catalogue:
+			raise SOAPFault('Path not found (%s)' % path)
+		self.catalogue[path]['properties'][params.get('name', '')] = params.get('value', '')
+		return element('setItemPropertyResult'), 0
+
+# Read an HTTP request from a stream, returning the method, target, headers and body
+async def readRequest(reader):
+	line = await reader.readline()
+	if not line:
+		return None
+	method, target, version = line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+	headers = {}
+	while True:
+		line = await reader.readline()
+		if line in (b'\r\n', b'\n', b''):
+			break
+		name, value = line.decode('latin-1').split(':', 1)
+		headers[name.strip().lower()] = value.strip()
+	length = int(headers.get('content-length', 0))
+	body = await reader.readexactly(length) if length else b''
+	return method, target, version, headers, body
+
+# Write an HTTP response
+async def writeResponse(writer, status, contentType, body, keepAlive):
+	reason = {200 : 'OK', 404 : 'Not Found', 405 : 'Method Not Allowed'}.get(status, 'Error')
+	head = 'HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n' % \
+		(status, reason, contentType, len(body), 'keep-alive' if keepAlive else 'close')
+	writer.write(head.encode('latin-1'))
+	writer.write(body)
+	await writer.drain()
+
+# File from the application folder, for a path under /insights/
+def staticFile(root, path):
+	filename = os.path.normpath(os.path.join(root, unquote(path[len('/insights/'):])))
+	if not filename.startswith(os.path.normpath(root)):
+		return None, None
+	if os.path.isdir(filename):
+		filename = os.path.join(filename, 'index.html')
+	if not os.path.isfile(filename):
+		return None, None
+	with open(filename, 'rb') as f:
+		return f.read(), mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+# Serve requests on one connection until the client closes it
+async def handleConnection(stub, reader, writer):
+	try:
+		while True:
+			request = await readRequest(reader)
+			if request is None:
+				break
+			method, target, version, headers, body = request
+			keepAlive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+			path = urlsplit(target).path
+
+			if path in SOAP_PATHS and method == 'POST':
+				response = await stub.call(body)
+				await writeResponse(writer, 200, 'text/xml; charset=utf-8', response, keepAlive)
+			elif path == '/stats':
+				stats = dict(stub.stats, uptime=time.time() - stub.stats['started'], sessions=len(stub.sessions))
+				await writeResponse(writer, 200, 'application/json', json.dumps(stats, indent=1, sort_keys=True).encode('utf-8'), keepAlive)
+			elif stub.options.root and path.startswith('/insights/') and method == 'GET':
+				data, contentType = staticFile(stub.options.root, path)
+				if data is None:
+					await writeResponse(writer, 404, 'text/plain', b'Not found', keepAlive)
+				else:
+					await writeResponse(writer, 200, contentType, data, keepAlive)
+			else:
+				await writeResponse(writer, 404 if method in ('GET', 'POST') else 405, 'text/plain', b'Not found', keepAlive)
+
+			if not keepAlive:
+				break
+	except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+		pass
+	finally:
+		writer.close()
+
+# Print the calls made to each operation
+def printStats(stats):
+	print('\n%-24s %8s %8s %12s %12s %12s' % ('Operation', 'Calls', 'Faults', 'Rows', 'MB', 'Mean (ms)'))
+	for op in sorted(stats['operations']):
+		s = stats['operations'][op]
+		print('%-24s %8d %8d %12d %12.2f %12.1f' % (op, s['calls'], s['faults'], s['rows'], s['bytes'] / 1048576.0, 1000.0 * s['seconds'] / s['calls']))
+
+# Serve until interrupted or terminated
+async def serve(stub, host, port):
+	stop = asyncio.Event()
+	for sig in (signal.SIGINT, signal.SIGTERM):
+		try:
+			asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+		except NotImplementedError:
+			pass # Windows, where Ctrl+C raises KeyboardInterrupt instead
+
+	server = await asyncio.start_server(lambda r, w: handleConnection(stub, r, w), host, port)
+	print('OBIEE stand-in listening on http://%s:%d%s' % (host, port, SOAP_PATHS[0]))
+	sys.stdout.flush()
+	async with server:
+		await stop.wait()
+
+def main():
+	parser = argparse.ArgumentParser(description="Rittman Mead Insights OBIEE Web Service Stand-in")
+	parser.add_argument('-H', '--host', action='store', default='127.0.0.1', help='Address to listen on.')
+	parser.add_argument('-p', '--port', action='store', type=int, default=9704, help='Port to listen on.')
+	parser.add_argument('-r', '--rows', action='store', type=int, default=1000, help='Rows returned by each query, unless it fetches fewer.')
+	parser.add_argument('-w', '--width', action='store', type=int, default=5, help='Columns returned by queries whose select list cannot be parsed.')
+	parser.add_argument('-t', '--types', action='store', default=','.join(TYPES), help='Comma separated data types used for columns not in the metadata.')
+	parser.add_argument('-l', '--latency', action='store', type=float, default=0, help='Milliseconds to wait before answering each call.')
+	parser.add_argument('--jitter', action='store', type=float, default=0, help='Up to this many milliseconds are added to the latency of each call.')
+	parser.add_argument('--row-latency', action='store', type=float, default=0, help='Microseconds to wait for each row returned.')
+	parser.add_argument('--nulls', action='store', type=float, default=0, help='Fraction of values returned as null.')
+	parser.add_argument('--distinct', action='store', type=int, default=100, help='Number of distinct values in attribute columns.')
+	parser.add_argument('--subject-areas', action='store', type=int, default=3, help='Number of subject areas.')
+	parser.add_argument('--tables', action='store', type=int, default=4, help='Dimension tables in each subject area.')
+	parser.add_argument('--columns', action='store', type=int, default=8, help='Columns in each table.')
+	parser.add_argument('--dashboards', action='store', type=int, default=2, help='Published dashboards in the catalogue.')
+	parser.add_argument('--pages', action='store', type=int, default=2, help='Pages in each dashboard.')
+	parser.add_argument('--visuals', action='store', type=int, default=4, help='Visualisations on each page.')
+	parser.add_argument('--vis-columns', action='store', type=int, default=4, help='Columns in each visualisation.')
+	parser.add_argument('--cache', action='store', type=int, default=16, help='Number of generated rowsets kept in memory. 0 generates every rowset.')
+	parser.add_argument('--seed', action='store', type=int, default=1, help='Seed for the generated metadata and data.')
+	parser.add_argument('--root', action='store', help='Application folder to serve from /insights/.')
+	args = parser.parse_args()
+
+	args.types = [t.strip().lower() for t in args.types.split(',') if t.strip()]
+	unknown = [t for t in args.types if t not in TYPES]
+	if unknown or not args.types:
+		print('\n\tError: data types must be from %s. Exiting.' % ', '.join(TYPES))
+		sys.exit(1)
+	if args.root:
+		args.root = os.path.abspath(args.root)
+
+	stub = OBIEEStub(args)
+	try:
+		asyncio.run(serve(stub, args.host, args.port))
+	except KeyboardInterrupt:
+		pass
+	printStats(stub.stats)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,138 @@
+#!/usr/bin/python
+#
+# Minimal stand-in for Pandoc, used by the benchmarks to measure the Python side of the docs
+# build on its own
+#
+# Accepts the options md_to_html.py passes to Pandoc and writes a standalone HTML page with the
+# same structure: headings with ids, a #TOC list, the -B header, the stylesheet and, with
+# --self-contained, images and CSS embedded as data URIs. Only headings, images, code blocks
+# and paragraphs are understood, so the output is not a faithful conversion.
+#
+# Usage:
+#	python pandoc_stub.py -s page.md -c styles.css --toc --self-contained
+#
+
+# Standard python distribution libraries:
+import os, sys
+import re, cgi, base64, mimetypes
+
+# Convert a local file to a data URI
+def dataURI(filename):
+	with open(filename, 'rb') as f:
+		return 'data:%s;base64,%s' % (mimetypes.guess_type(filename)[0], base64.b64encode(f.read()))
+
+# Build the nested contents list from (level, id, text) headings
+def contentsList(headings):
+	html, depth = [], 0
+	for level, id, text in headings:
+		while depth < level:
+			html.append('<ul>\n<li>')
+			depth += 1
+		while depth > level:
+			html.append('</li>\n</ul>')
+			depth -= 1
+		if html and html[-1] != '<ul>\n<li>':
+			html.append('</li>\n<li>')
+		html.append('<a href="#%s">%s</a>' % (id, text))
+	while depth > 0:
+		html.append('</li>\n</ul>')
+		depth -= 1
+	return '\n'.join(html)
+
+# Convert the markdown subset to HTML, returning the body and the headings found
+def convert(markdown, numbered, selfContained):
+	body, headings, ids, counters = [], [], set(), [0] * 6
+	inCode = False
+	for line in markdown.splitlines():
+		if line.startswith('```'):
+			body.append('</code></pre>' if inCode else '<pre class="sourceCode"><code>')
+			inCode = not inCode
+			continue
+		if inCode:
+			body.append(cgi.escape(line))
+			continue
+
+		heading = re.match(r'(#{1,6})\s+(.*)', line)
+		image = re.match(r'!\[([^\]]*)\]\(([^)\s]+)\)', line)
+		if heading:
+			level = len(heading.group(1))
+			text = cgi.escape(heading.group(2).strip())
+			id = re.sub(r'[^\w-]+', '-', heading.group(2).lower()).strip('-') or 'section'
+			base, n = id, 1
+			while id in ids:
+				id = '%s-%d' % (base, n)
+				n += 1
+			ids.add(id)
+
+			if numbered:
+				counters[level - 1] += 1
+				counters[level:] = [0] * (6 - level)
+				text = '<span class="header-section-number">%s</span> %s' % ('.'.join(str(c) for c in counters[:level]), text)
+			headings.append((level, id, text))
+			body.append('<h%d id="%s">%s</h%d>' % (level, id, text, level))
+		elif image:
+			src = image.group(2)
+			if selfContained and ':' not in src and os.path.isfile(src):
+				src = dataURI(src)
+			body.append('<figure>\n<img src="%s" alt="%s" />\n<figcaption>%s</figcaption>\n</figure>' % (src, cgi.escape(image.group(1), True), cgi.escape(image.group(1))))
+		elif line.strip() and not line.startswith('%'):
+			body.append('<p>%s</p>' % cgi.escape(line))
+	return '\n'.join(body), headings
+
+def main():
+	args = sys.argv[1:]
+	source, output, css, before = None, None, [], []
+	numbered = contents = selfContained = False
+
+	i = 0
+	while i < len(args):
+		arg = args[i]
+		if arg in ('-c', '-B', '-o'):
+			value = args[i + 1]
+			if arg == '-c':
+				css.append(value)
+			elif arg == '-B':
+				before.append(open(value).read())
+			else:
+				output = value
+			i += 2
+			continue
+		if arg == '--toc':
+			contents = True
+		elif arg == '--number-sections':
+			numbered = True
+		elif arg == '--self-contained':
+			selfContained = True
+		elif not arg.startswith('-'):
+			source = arg
+		i += 1
+
+	markdown = open(source).read() if source else sys.stdin.read()
+	body, headings = convert(markdown, numbered, selfContained)
+
+	links = []
+	for c in css:
+		if selfContained and os.path.isfile(c):
+			links.append('<link rel="stylesheet" href="%s" type="text/css" />' % dataURI(c))
+		else:
+			links.append('<link rel="stylesheet" href="%s" type="text/css" />' % c)
+
+	html = ['<!DOCTYPE html>\n<html>\n<head>\n<meta http-equiv="Content-Type" content="text/html; charset=utf-8" />']
+	html.append('<meta name="generator" content="pandoc" />\n<title></title>')
+	html.extend(links)
+	html.append('</head>\n<body>')
+	html.extend(before)
+	if contents:
+		html.append('<div id="TOC">\n%s\n</div>' % contentsList(headings))
+	html.append(body)
+	html.append('</body>\n</html>\n')
+	html = '\n'.join(html)
+
+	if output:
+		with open(output, 'wb') as f:
+			f.write(html)
+	else:
+		sys.stdout.write(html)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,244 @@
+#!/usr/bin/python
+#
+# Script to build a copy of Insights for deployment, with fingerprinted and precompressed assets
+#
+# Every asset gets a copy with a hash of its contents in the filename, e.g. js/obiee.3f2a1b9c0d.js,
+# and the script and stylesheet references in the application pages are rewritten to use them.
+# As these files never change, the server can send them with far-future cache headers. Gzip and
+# Brotli versions are written next to each compressible file, so the server does not need to
+# compress on the fly. Files are only processed again when they change.
+#
+# Output, in the output folder:
+#	<path>				Copy of each file, referenced by anything not rewritten (e.g. templates, map files)
+#	<name>.<hash>.<ext>	Fingerprinted copy of each asset
+#	<file>.gz, <file>.br	Compressed versions of each compressible file
+#	asset-manifest.json	Fingerprinted path and sizes of each file, e.g. for setting cache headers
+#
+# Prerequisites:
+#	Brotli (pip install brotli), optional
+#
+
+# Standard python distribution libraries:
+import os, sys, re
+import json, glob, gzip, shutil, hashlib, argparse
+import multiprocessing
+from cStringIO import StringIO
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(sys.argv[0]))
+
+# Folders served as static assets, to be fingerprinted and compressed
+ASSET_DIRS = ['app', 'css', 'docs', 'fonts', 'icons', 'images', 'js', 'metadata', 'plugins', 'topojson']
+
+# Application pages whose asset references are rewritten
+PAGES = ['index.html', 'app/states/*/index.html']
+
+# Not deployed
+EXCLUDE = ['.git', '.gitignore', 'benchmarks', 'private-docs', 'proxy', 'README.md', 'requests.jsonl']
+EXCLUDE_TYPES = ['.py', '.pyc']
+
+# Assets always referenced by their own name: HTML is loaded by name (templates, documentation)
+# and customConfig.js is expected to be edited on the server
+NO_FINGERPRINT = ['js/customConfig.js']
+NO_FINGERPRINT_TYPES = ['.html']
+
+COMPRESS_TYPES = ['.js', '.css', '.html', '.json', '.svg', '.txt', '.xml', '.map', '.eot', '.ttf', '.otf']
+MIN_COMPRESS = 512 # Smaller files are not worth compressing
+
+# Hash the contents of a file
+def hashData(data):
+	return hashlib.sha1(data).hexdigest()[:10]
+
+# Format a number of bytes for the report
+def formatBytes(size):
+	for unit in ['B', 'KB', 'MB']:
+		if abs(size) < 1024 or unit == 'MB':
+			break
+		size = size / 1024.0
+	return '%.1f %s' % (size, unit)
+
+# Fingerprinted path of a file, with the hash before the extension
+def fingerprint(rel, sha):
+	base, ext = os.path.splitext(rel)
+	return '%s.%s%s' % (base, sha, ext)
+
+def gzipData(data):
+	buf = StringIO()
+	f = gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=buf, mtime=0) # No timestamp, so output is reproducible
+	f.write(data)
+	f.close()
+	return buf.getvalue()
+
+# Write the gzip and Brotli versions of a file's contents next to each of its paths, if they are smaller.
+# Returns the compressed sizes.
+def compress(data, paths):
+	sizes = {'gzip' : None, 'br' : None}
+	methods = [('gzip', '.gz', gzipData)]
+	if brotli:
+		methods.append(('br', '.br', lambda d: brotli.compress(d, quality=11)))
+
+	for name, ext, method in methods:
+		compressed = method(data) if len(data) >= MIN_COMPRESS else None
+		for path in paths:
+			if compressed and len(compressed) < len(data):
+				with open(path + ext, 'wb') as f:
+					f.write(compressed)
+			elif os.path.exists(path + ext):
+				os.remove(path + ext)
+		if compressed and len(compressed) < len(data):
+			sizes[name] = len(compressed)
+	return sizes
+
+# Remove a file and its compressed versions
+def removeOutput(path):
+	for filename in [path, path + '.gz', path + '.br']:
+		if os.path.exists(filename):
+			os.remove(filename)
+
+# Copy, fingerprint and compress a single file, returning its manifest entry
+def buildFile(job):
+	src, rel, outDir, options = job
+	with open(src, 'rb') as f:
+		data = f.read()
+
+	out = os.path.join(outDir, rel)
+	if not os.path.exists(os.path.dirname(out)):
+		os.makedirs(os.path.dirname(out))
+	shutil.copy2(src, out)
+
+	stat = os.stat(src)
+	entry = {'mtime' : stat.st_mtime, 'size' : len(data), 'hash' : hashData(data), 'path' : None, 'gzip' : None, 'br' : None}
+	paths = [out]
+	if options['fingerprint']:
+		entry['path'] = fingerprint(rel, entry['hash'])
+		hashed = os.path.join(outDir, entry['path'])
+		if not os.path.exists(hashed):
+			shutil.copyfile(src, hashed)
+		paths.append(hashed)
+
+	if options['compress']:
+		entry.update(compress(data, paths))
+	return rel, entry
+
+# Rewrite the asset references in a page to their fingerprinted paths
+def rewritePage(html, manifest):
+	def replace(match):
+		entry = manifest.get(match.group(2))
+		if entry and entry['path']:
+			return match.group(1) + entry['path']
+		return match.group(0)
+	return re.sub(r'''((?:src|href)\s*=\s*["']/insights/)([^"'?#]+)''', replace, html)
+
+# Print the size of the files, and their compressed versions, in each folder
+def printReport(manifest):
+	folders = {}
+	for rel, entry in manifest.items():
+		folder = rel.split('/')[0] if '/' in rel else '.'
+		totals = folders.setdefault(folder, [0, 0, 0, 0, 0])
+		totals[0] += 1
+		totals[1] += 1 if entry['path'] else 0
+		totals[2] += entry['size']
+		totals[3] += entry['gzip'] or entry['size']
+		totals[4] += entry['br'] or entry['gzip'] or entry['size']
+
+	print '\n%-20s %8s %8s %12s %12s %12s' % ('Folder', 'Files', 'Hashed', 'Size', 'Gzip', 'Brotli')
+	overall = [0, 0, 0, 0, 0]
+	for folder in sorted(folders):
+		totals = folders[folder]
+		overall = [a + b for a, b in zip(overall, totals)]
+		print '%-20s %8d %8d %12s %12s %12s' % (folder, totals[0], totals[1], formatBytes(totals[2]), formatBytes(totals[3]), formatBytes(totals[4]))
+	print '%-20s %8d %8d %12s %12s %12s' % ('Total', overall[0], overall[1], formatBytes(overall[2]), formatBytes(overall[3]), formatBytes(overall[4]))
+
+def main():
+	parser = argparse.ArgumentParser(description="Rittman Mead Insights Asset Builder")
+	parser.add_argument('-o', '--output', action='store', default=os.path.join(SCRIPT_DIR, 'dist'), help='Directory to write the deployable application to.')
+	parser.add_argument('-f', '--force', action='store_true', default=False, help='Rebuild every file, even if unchanged.')
+	parser.add_argument('-j', '--jobs', action='store', type=int, default=0, help='Number of files to compress in parallel. 0 uses one per CPU core.')
+	args = parser.parse_args()
+
+	srcDir = SCRIPT_DIR
+	outDir = os.path.abspath(args.output)
+	manifestFile = os.path.join(outDir, 'asset-manifest.json')
+	if brotli is None:
+		print 'Brotli is not installed (pip install brotli), only writing gzip versions.'
+
+	if os.path.isfile(manifestFile):
+		with open(manifestFile, 'r') as f:
+			manifest = json.load(f)
+	else:
+		manifest = {}
+
+	pages = set()
+	for pattern in PAGES:
+		pages.update(os.path.relpath(p, srcDir).replace('\\', '/') for p in glob.glob(os.path.join(srcDir, pattern)))
+
+	# Find files that are new or changed, or whose output is missing
+	jobs, found = [], set()
+	for root, subDirs, files in os.walk(srcDir):
+		subDirs[:] = [d for d in subDirs if os.path.join(root, d) != outDir and not (root == srcDir and d in EXCLUDE)]
+		for file in files:
+			src = os.path.join(root, file)
+			rel = os.path.relpath(src, srcDir).replace('\\', '/')
+			ext = os.path.splitext(file)[1].lower()
+			if (root == srcDir and file in EXCLUDE) or ext in EXCLUDE_TYPES or rel in pages:
+				continue
+			found.add(rel)
+
+			stat = os.stat(src)
+			entry = manifest.get(rel)
+			if not args.force and entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size and os.path.exists(os.path.join(outDir, rel)) and \
+				(not entry['path'] or os.path.exists(os.path.join(outDir, entry['path']))):
+				continue
+
+			asset = rel.split('/')[0] in ASSET_DIRS
+			jobs.append((src, rel, outDir, {
+				'fingerprint' : asset and rel not in NO_FINGERPRINT and ext not in NO_FINGERPRINT_TYPES,
+				'compress' : asset and ext in COMPRESS_TYPES
+			}))
+
+	print 'Building %d of %d files...' % (len(jobs), len(found))
+	if jobs:
+		pool = multiprocessing.Pool(args.jobs or None)
+		try:
+			for rel, entry in pool.imap_unordered(buildFile, jobs):
+				old = manifest.get(rel)
+				if old and old['path'] and old['path'] != entry['path']:
+					removeOutput(os.path.join(outDir, old['path']))
+				manifest[rel] = entry
+		finally:
+			pool.close()
+			pool.join()
+
+	# Remove the output of files that no longer exist
+	for rel in list(manifest):
+		if rel not in found and rel not in pages:
+			removeOutput(os.path.join(outDir, rel))
+			if manifest[rel]['path']:
+				removeOutput(os.path.join(outDir, manifest[rel]['path']))
+			del manifest[rel]
+
+	# Pages depend on the fingerprints of everything they reference, so are rewritten every time
+	for rel in sorted(pages):
+		with open(os.path.join(srcDir, rel), 'rb') as f:
+			html = rewritePage(f.read(), manifest)
+		out = os.path.join(outDir, rel)
+		if not os.path.exists(os.path.dirname(out)):
+			os.makedirs(os.path.dirname(out))
+		if not args.force and os.path.isfile(out) and rel in manifest and manifest[rel]['hash'] == hashData(html):
+			continue
+		with open(out, 'wb') as f:
+			f.write(html)
+		manifest[rel] = {'mtime' : None, 'size' : len(html), 'hash' : hashData(html), 'path' : None, 'gzip' : None, 'br' : None}
+		manifest[rel].update(compress(html, [out]))
+
+	with open(manifestFile, 'wb') as f:
+		f.write(json.dumps(manifest, indent=1, sort_keys=True, separators=(',', ': ')))
+
+	printReport(manifest)
+
+if __name__ == "__main__":
+	main()
@@ -7,31 +7,37 @@
 
 # Standard Python distribution libraries
 import os, sys, argparse, re
-from lxml import etree as ET # Used for parsing XML structures
-
-try:
-	# rm_sys.os.chdir(rm_sys.SCRIPT_DIR) # Change to script directory
-
-	global SCRIPT_DIR, CURRENT_DIR
-	SCRIPT_DIR = os.path.abspath(os.path.dirname(sys.argv[0]))
-	CURRENT_DIR = os.getcwd()
-
-	# ArgumentParser to parse arguments and options
-	parser = argparse.ArgumentParser(description="Rittman Mead JSDoc Converter")
-	parser.add_argument("doc",action="store",help="JSDoc HTML document to format.")
-	parser.add_argument("-o", "--output", action="store", default="", help="Override for output location. If unspecified, will overwrite")
-
-	args = parser.parse_args()
-	DOC = os.path.join(CURRENT_DIR, args.doc)
-	if (args.output):
-		OUTPUT = os.path.join(CURRENT_DIR, args.output)
-	else:
-		OUTPUT = DOC
-
-except Exception as err:
-	print '\n\nException caught:\n\n%s ' % (err)
-        print '\n\tError: Failed to get command line arguments. Exiting.'
-        sys.exit(1)
+import json, shutil, hashlib, multiprocessing
+from lxml import etree as ET # Used for parsing HTML structures
+
+# Parse the command line arguments
+def getArgs():
+	global SCRIPT_DIR, CURRENT_DIR, DOC, OUTPUT
+
+	try:
+		SCRIPT_DIR = os.path.abspath(os.path.dirname(sys.argv[0]))
+		CURRENT_DIR = os.getcwd()
+
+		# ArgumentParser to parse arguments and options
+		parser = argparse.ArgumentParser(description="Rittman Mead JSDoc Converter")
+		parser.add_argument("doc",action="store",help="JSDoc HTML document to format.")
+		parser.add_argument("-o", "--output", action="store", default="", help="Override for output location. If unspecified, will overwrite")
+		parser.add_argument("-j", "--jobs", action="store", type=int, default=1, help="Number of pages to process in parallel. Use 0 for one per CPU core.")
+		parser.add_argument("-s", "--search", action="store", default="", help="URL of the full-text search folder, relative to the pages, for the search box to use.")
+		parser.add_argument("-c", "--cache", action="store", default="", help="Folder used to skip pages whose JSDoc input has not changed since the last run.")
+
+		args = parser.parse_args()
+		DOC = os.path.join(CURRENT_DIR, args.doc)
+		if (args.output):
+			OUTPUT = os.path.join(CURRENT_DIR, args.output)
+		else:
+			OUTPUT = DOC
+		return args
+
+	except Exception as err:
+		print '\n\nException caught:\n\n%s ' % (err)
+		print '\n\tError: Failed to get command line arguments. Exiting.'
+		sys.exit(1)
 
 # Read file
 def readFile(filename):
@@ -44,73 +50,69 @@ def readFile(filename):
 # Write to files
 def writeFile(line, filename, mode='a'):
 	with open(filename,mode) as output:
-		line = line.encode('utf-8')
 		output.write('%s\n' % line)
 		output.close()
 
-# Cleanup HTML so LXML can read it
-def cleanupHTML(html):
-	links = re.findall('<link (.*?)>', html)
-	for l in links:
-		html = html.replace('<link %s>' % l, '<link %s />' % l)
-
-	html = html.replace('<br class="clear">', '<br class="clear" />')
-	html = html.replace('<br>', '<br />')
-	html = html.replace('<meta charset="utf-8">', '<meta charset="utf-8" />')
-	html = html.replace('&rarr;', '~!rightArrow!~')
-	html = html.replace(']]', '?!]!??!]!?')
-
-	return html
-
-# Pretty prints XML string
-def prettyPrintXML(tree):
-	parser = ET.XMLParser(remove_blank_text=True)
-	xml = ET.tostring(tree.getroot(), pretty_print=True) # Convert to string
-	elem = ET.XML(xml, parser=parser)
-	xml = ET.tostring(elem, pretty_print=True)
-	return xml
-
-# Get headings
-def addLinks(root, type, prefix):
+# Hash the contents of a page, leaving out the footer as JSDoc writes the generation time there
+def hashPage(filename):
+	with open(filename, 'rb') as f:
+		page = re.sub(r'(?is)<footer[^>]*>.*?</footer>', '', f.read())
+	return hashlib.sha1(page).hexdigest()
+
+# Index the document in one forward walk, visiting each element once
+# Returns the h4 headings grouped by the text of the h3 sibling before them, every h4 heading
+# and the items of the See lists
+def indexDoc(root):
+	sections, headings, see = {}, [], []
+	for parent in root.iter():
+		section = None
+		seeList = parent.tag == 'ul' and parent.getparent() is not None and parent.getparent().tag == 'dd' and parent.getparent().get('class') == 'tag-see'
+		for child in parent:
+			if child.tag == 'h3':
+				section = sections.setdefault(''.join(child.itertext()), [])
+			elif child.tag == 'h4':
+				headings.append(child)
+				if section is not None:
+					section.append(child)
+			elif seeList and child.tag == 'li':
+				see.append(child)
+	return sections, headings, see
+
+# Add a navigation list linking to the given headings
+def addLinks(nav, headings, type, prefix):
 	list = []
-	for el in root.xpath('.//h4[preceding-sibling::h3[1] = "%s"]' % type):
+	for el in headings:
 		id = el.attrib["id"]
 		if (id[0] == '.'):
 			id = id[1:len(id)]
 		list.append(id)
 
-	nav = root.find('.//nav')
-
 	if len(list) > 0:
 		heading = ET.SubElement(nav, "h3")
 		heading.text = type
 		ul = ET.SubElement(nav, 'ul')
 		for link in list:
 			li = ET.SubElement(ul, 'li')
-			li.insert(len(li), ET.XML('<a href="#%s%s">%s</a>' % (prefix, link, link)))
+			a = ET.SubElement(li, 'a', href='#%s%s' % (prefix, link))
+			a.text = link
 
-def cleanupXML(xml):
-	xml = xml.replace('~!rightArrow!~', '&rarr;') # Replace escaped characters
-	xml = xml.replace('?!]!??!]!?', ']]')
-	xml = xml.replace('&gt;', '>')
-	xml = xml.replace('jsdoc-default.css', 'insights-doc.css')
-	return xml
-
-def genJS():
+# The search box filters the navigation links, unless the full-text search script is used
+def genJS(search=False):
 	js = '\n\t\t\tdocument.getElementsByTagName("body")[0].style.display = "none";'
 	js += '\n\n\t\t\tfunction loadFunc() {'
-	js += '\n\n\t\t\t$(".navbar .search input").keyup(function() {'
-	js += '\n\t\t\t\texpandAll();'
-	js += '\n\t\t\t\tvar val = $(this).val().toLowerCase();'
-	js += '\n\t\t\t\t$(".navbar li>a").each(function() {'
-	js += '\n\t\t\t\t\tvar link = $(this).text().toLowerCase();'
-	js += '\n\t\t\t\t\tif (link.indexOf(val) >= 0) {'
-	js += '\n\t\t\t\t\t\t$(this).show();'
-	js += '\n\t\t\t\t\t} else {'
-	js += '\n\t\t\t\t\t\t$(this).hide();'
-	js += '\n\t\t\t\t\t}'
-	js += '\n\t\t\t\t});'
-	js += '\n\t\t\t});'
+	if not search:
+		js += '\n\n\t\t\t$(".navbar .search input").keyup(function() {'
+		js += '\n\t\t\t\texpandAll();'
+		js += '\n\t\t\t\tvar val = $(this).val().toLowerCase();'
+		js += '\n\t\t\t\t$(".navbar li>a").each(function() {'
+		js += '\n\t\t\t\t\tvar link = $(this).text().toLowerCase();'
+		js += '\n\t\t\t\t\tif (link.indexOf(val) >= 0) {'
+		js += '\n\t\t\t\t\t\t$(this).show();'
+		js += '\n\t\t\t\t\t} else {'
+		js += '\n\t\t\t\t\t\t$(this).hide();'
+		js += '\n\t\t\t\t\t}'
+		js += '\n\t\t\t\t});'
+		js += '\n\t\t\t});'
 
 	js += '\n\t\t\t$("nav h3").click(function(){'
 	js += '\n\t\t\t\t$(this).next().animate({ height: "toggle" });'
@@ -136,17 +138,16 @@ def genJS():
 	js += '\n\nwindow.onload = loadFunc;'
 	return js
 
-def processDoc(file, output):
+# Search is the URL of the full-text search folder (see private-docs/search_index.py), if used
+def processDoc(file, output, search=''):
 	if '.' in os.path.basename(os.path.splitext(file)[0]):
 		prefix = ''
 	else:
 		prefix = '.'
 
-	doc = readFile(file)
-	doc = cleanupHTML(doc)
-
-	tree = ET.ElementTree(ET.fromstring(doc))
-	root = tree.getroot()
+	# The HTML parser accepts JSDoc's output as it is, so no string cleanup is needed before parsing
+	parser = ET.HTMLParser(remove_blank_text=True, encoding='utf-8')
+	root = ET.fromstring(readFile(file), parser)
 
 	# Remove parameter type lists
 	# for pt in root.findall('.//dd/span[@class="param-type"]'):
@@ -161,23 +162,28 @@ def processDoc(file, output):
 	title = root.find('.//title')
 	title.text = 'Insights API'
 
+	# Use the Insights stylesheet
+	for link in root.findall('.//link[@href]'):
+		link.attrib['href'] = link.attrib['href'].replace('jsdoc-default.css', 'insights-doc.css')
+
+	sections, headings, see = indexDoc(root)
+
 	# Add horizontal rules between members and methods
-	for h4 in root.findall('.//h4'):
-		parent = h4.getparent()
-		idx = parent.index(h4)
-		parent.insert(idx, ET.XML("<hr />"))
+	for h4 in headings:
+		h4.addprevious(ET.Element('hr'))
 
 	# Convert See text to hyperlinks
-	for see in root.findall('.//dd[@class="tag-see"]/ul/li'):
-		link = see.text
-		see.insert(0, ET.XML('<a href="#%s%s">%s</a>' % (prefix, link, link)))
-		see.text = ''
+	for li in see:
+		link = li.text
+		a = ET.Element('a', href='#%s%s' % (prefix, link))
+		a.text = link
+		li.insert(0, a)
+		li.text = ''
 
 	# Find member sections
-	members = addLinks(root, 'Members', prefix)
-	methods = addLinks(root, 'Methods', prefix)
-
 	nav = root.find('.//nav')
+	addLinks(nav, sections.get('Members', []), 'Members', prefix)
+	addLinks(nav, sections.get('Methods', []), 'Methods', prefix)
 
 	navbar = ET.XML('<div> </div>')
 	navbar.attrib['class'] = 'navbar'
@@ -204,20 +210,55 @@ def processDoc(file, output):
 
 	script = ET.XML('<script> </script>')
 	script.attrib["type"] = 'text/javascript'
-	script.text = genJS()
+	script.text = genJS(bool(search))
 
 	root.find('body').insert(0, script)
-
-	outputXML = prettyPrintXML(tree)
-	outputXML = cleanupXML(outputXML)
-
-	writeFile(outputXML, output, mode='w')
+	if search:
+		searchScript = ET.SubElement(root.find('body'), 'script', src='%ssearch.js' % search)
+		searchScript.attrib['data-index'] = search
+		searchScript.text = ' '
+
+	# Serialise once, as HTML so that scripts and entities are written as they are
+	outputHTML = ET.tostring(root, pretty_print=True, method='html', encoding='utf-8')
+	writeFile(outputHTML, output, mode='wb')
+
+# Process a page, reusing the cached result if its JSDoc input has already been processed
+# Returns the cache entry for the page, or None if caching is off, and the error if the page failed
+def processPage(job):
+	key = job[2]
+	try:
+		return key, cachePage(*job), None
+	except Exception as err:
+		return key, None, '%s: %s' % (type(err).__name__, err)
+
+# Process a single page, returning its cache entry
+def cachePage(file, output, key, cache, entry, search):
+	if not cache:
+		processDoc(file, output, search)
+		return None
+
+	fileHash = hashPage(file)
+	if entry and fileHash == entry['output'] and entry.get('search', '') == search and file == output:
+		return entry # Already processed, JSDoc has not been run again
+
+	# Cached pages depend on the options as well as the JSDoc input
+	inputHash = hashlib.sha1(fileHash + search).hexdigest() if search else fileHash
+
+	cached = os.path.join(cache, inputHash + '.html')
+	if not os.path.exists(cached):
+		processDoc(file, cached, search)
+	if cached != output:
+		shutil.copyfile(cached, output)
+	return {'input' : inputHash, 'output' : hashPage(output), 'search' : search}
 
 def main():
+	args = getArgs()
+
 	# Check if input is a file or directory. If the latter, process all HTML files found
 	if os.path.isfile(DOC):
-		processDoc(DOC, OUTPUT)
+		pages = [(DOC, OUTPUT)]
 	else:
+		pages = []
 		for root, subDirs, files in os.walk(DOC):
 			for file in files:
 				regEx = '(.*)\.html$'
@@ -225,8 +266,50 @@ def main():
 
 				if type:
 					fullPath = os.path.join(root, file)
-					processDoc(fullPath, fullPath)
-
+					pages.append((fullPath, fullPath))
+
+	cache, manifest = None, {}
+	if args.cache:
+		cache = os.path.join(CURRENT_DIR, args.cache)
+		if not os.path.exists(cache):
+			os.makedirs(cache)
+		if os.path.isfile(os.path.join(cache, 'manifest.json')):
+			manifest = json.loads(readFile(os.path.join(cache, 'manifest.json')))
+
+	# Pages are identified in the manifest by their path relative to the documentation folder
+	base = DOC if os.path.isdir(DOC) else os.path.dirname(DOC)
+	jobs = []
+	for file, output in pages:
+		key = os.path.relpath(output, base).replace('\\', '/')
+		jobs.append((file, output, key, cache, manifest.get(key), args.search))
+
+	if args.jobs == 1:
+		results = map(processPage, jobs)
+	else:
+		pool = multiprocessing.Pool(args.jobs or None)
+		try:
+			results = pool.map(processPage, jobs)
+		finally:
+			pool.close()
+			pool.join()
+
+	# Report pages that failed, but keep the results of the others
+	failed = [(key, err) for key, entry, err in results if err]
+	for key, err in failed:
+		print '\tError: Failed to modify %s. %s' % (key, err)
+
+	if cache:
+		# Only keep cached pages that are still in use. Failed pages are left out so they are retried
+		manifest = dict((key, entry) for key, entry, err in results if not err)
+		used = set(e['input'] + '.html' for e in manifest.values())
+		for file in os.listdir(cache):
+			if file.endswith('.html') and file not in used:
+				os.remove(os.path.join(cache, file))
+		writeFile(json.dumps(manifest, indent=1, sort_keys=True, separators=(',', ': ')), os.path.join(cache, 'manifest.json'), mode='wb')
+
+	if failed:
+		print('\nFinished modifying JSDocs, %d of %d pages failed' % (len(failed), len(results)))
+		sys.exit(1)
 	print('\nFinished modifying JSDocs')
 
 
@@ -1,25 +1,243 @@
-# Converts list of fonts from https://fortawesome.github.io/Font-Awesome/cheatsheet/ to JSON
-# Copy the full list of icons into a text file from that page and process it into JSON using this script
-import os
-import re, argparse
+# Builds the Font Awesome files used by the application from the icons it actually uses
+#
+# icons.json, the list of icons for the icon picker, is generated from the glyph map of the font,
+# with the names of each glyph taken from the Font Awesome stylesheet. The fa-* classes and icon
+# properties used in the application are then collected, and written to:
+#
+#	css/font-awesome.subset.min.css	Base styles and the icons in use, with a subset font
+#	css/font-awesome.rest.min.css	Every other icon, using the full font
+#	fonts/fontawesome-subset.*		Subset font, as WOFF2 (if Brotli is installed), WOFF and TTF
+#
+# The pages load the subset stylesheet and load the rest without blocking rendering. Both declare
+# the same font family, with unicode ranges that do not overlap, so the full font is only downloaded
+# if an icon that is not in the subset is shown, e.g. one chosen for a dashboard in the icon picker.
+#
+# Icons chosen at runtime, such as those for published dashboards, tiles and conditional formats, are
+# picked from the whole font. The subset is seeded with the common choices (SEED_ICONS), and the icons
+# of the published dashboards can be read from an OBIEE server with -s. Icons used by dashboard pages
+# stored in the catalogue can be included with -d, pointing to exported dashboard files, or named with -i.
+#
+# Prerequisites:
+#	fontTools (pip install fonttools)
+#	Brotli (pip install brotli), optional
+#
+import os, sys
+import re, json, hashlib, logging, argparse, getpass, urllib2
+import xml.etree.ElementTree as ET
 
-def write_output(line, filename, mode='a'):
-	with open(filename,mode) as output:
-		line = line.encode('utf-8')
-		output.write('%s\n' % line)
-		output.close()
+try:
+	from fontTools.ttLib import TTFont
+	from fontTools import subset
+except ImportError:
+	print '\n\tError: fontTools is required to subset the icon font (pip install fonttools). Exiting.'
+	sys.exit(1)
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(sys.argv[0]))
+ROOT_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, os.pardir))
+
+FULL_CSS = os.path.join(SCRIPT_DIR, 'css', 'font-awesome.min.css')
+FULL_FONT = os.path.join(SCRIPT_DIR, 'fonts', 'fontawesome-webfont.ttf')
+SUBSET_CSS = os.path.join(SCRIPT_DIR, 'css', 'font-awesome.subset.min.css')
+REST_CSS = os.path.join(SCRIPT_DIR, 'css', 'font-awesome.rest.min.css')
+SUBSET_FONT = os.path.join(SCRIPT_DIR, 'fonts', 'fontawesome-subset')
+
+# Searched for icons in use, relative to the application directory
+SOURCES = ['app', 'plugins', 'js', 'index.html']
+SOURCE_TYPES = ['.js', '.html', '.json', '.xml']
+
+# Icon classes, icons given as properties (e.g. icon="check", icon: 'table', "icon":"home") and icons
+# passed to functions that build the class at runtime (e.g. rmvpp.iconButton(toolbar, 'magic', ...))
+CLASS_PATTERN = re.compile(r'\bfa-([a-z0-9-]+)')
+PROPERTY_PATTERN = re.compile(r'''icon\w*["']?\s*[:=]\s*["'](?:fa-)?([a-z0-9-]+)["']''', re.IGNORECASE)
+CALL_PATTERN = re.compile(r'''(?:iconButton|showToast)\([^,()]+,\s*["'](?:fa-)?([a-z0-9-]+)["']''')
+
+# Icons commonly chosen in the icon picker for dashboards, measure tiles and conditional formats
+SEED_ICONS = set('''
+	arrow-up arrow-down arrow-left arrow-right caret-up caret-down caret-left caret-right
+	check check-circle times times-circle exclamation exclamation-circle exclamation-triangle info-circle question-circle
+	star star-o flag circle circle-o thumbs-up thumbs-down smile-o meh-o frown-o bell minus-circle plus-circle
+	dollar gbp eur money user users building home globe truck shopping-cart calendar clock-o
+	dashboard bar-chart line-chart area-chart pie-chart table th hashtag
+'''.split())
+
+PUBLISHED_LIST = '/shared/RM-Insights/Published-Dashboards'
+
+def write_output(text, filename):
+	with open(filename, 'wb') as output:
+		output.write(text)
 
 def read_file(filename):
-	with open(filename, 'r') as f:
-		f.seek(0)
-		output = f.read()
-		f.close()
-	return output
-	
+	with open(filename, 'rb') as f:
+		return f.read()
+
+# Split a stylesheet into its top level rules, keeping nested blocks such as keyframes whole
+def split_rules(css):
+	rules, depth, start = [], 0, 0
+	for i, char in enumerate(css):
+		if char == '{':
+			depth += 1
+		elif char == '}':
+			depth -= 1
+			if depth == 0:
+				rules.append(css[start:i + 1].strip())
+				start = i + 1
+	return rules
+
+# Parse the Font Awesome stylesheet into its licence comment, font face, other rules and the
+# codepoint of each icon name
+def parse_css(css):
+	licence = re.match(r'\s*(/\*.*?\*/)', css, re.DOTALL)
+	if licence:
+		css = css[licence.end():]
+
+	font_face, base, icons = None, [], {}
+	for rule in split_rules(css):
+		match = re.match(r'([^{]+)\{content:"\\([0-9a-f]+)"\}$', rule)
+		if rule.startswith('@font-face'):
+			font_face = rule
+		elif match and all(re.match(r'\.fa-[a-z0-9-]+:before$', s) for s in match.group(1).split(',')):
+			for selector in match.group(1).split(','):
+				icons[selector[4:-7]] = int(match.group(2), 16)
+		else:
+			base.append(rule)
+	return licence.group(1) if licence else '', font_face, base, icons
+
+# Icon names used in the application source and any extra files
+def find_used(paths, names):
+	used = set()
+	for path in paths:
+		if os.path.isdir(path):
+			files = [os.path.join(root, f) for root, subDirs, fs in os.walk(path) for f in fs]
+		else:
+			files = [path]
+		for filename in files:
+			if os.path.splitext(filename)[1].lower() in SOURCE_TYPES:
+				used.update(find_icons(read_file(filename)))
+	return set(name for name in used if name in names)
+
+# Icon names in a piece of text. Entities are decoded first, as exported catalogue objects escape
+# the JSON of the visualisations and the list of published dashboards.
+def find_icons(text):
+	for _ in range(2):
+		text = text.replace('&quot;', '"').replace('&#39;', "'").replace('&apos;', "'").replace('&amp;', '&')
+	return set(CLASS_PATTERN.findall(text)) | set(PROPERTY_PATTERN.findall(text)) | set(CALL_PATTERN.findall(text))
+
+# Call an OBIEE web service, returning the body of the response
+def soap_call(server, service, method, params):
+	body = ''.join('<v6:%s>%s</v6:%s>' % (k, v, k) for k, v in params)
+	envelope = '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:v6="urn://oracle.bi.webservices/v6">'
+	envelope += '<soapenv:Body><v6:%s>%s</v6:%s></soapenv:Body></soapenv:Envelope>' % (method, body, method)
+	request = urllib2.Request('%s/analytics-ws/saw.dll?SOAPImpl=%s' % (server.rstrip('/'), service), envelope,
+		{'Content-Type' : 'text/xml; charset=utf-8'})
+	return ET.fromstring(urllib2.urlopen(request).read())
+
+# Icons of the dashboards published on an OBIEE server, from the list of published dashboards
+def published_icons(server, user, password):
+	response = soap_call(server, 'nQSessionService', 'logon', [('name', user), ('password', password)])
+	session = [e.text for e in response.iter() if e.tag.endswith('sessionID')][0]
+	try:
+		response = soap_call(server, 'webCatalogService', 'readObjects', [('paths', PUBLISHED_LIST),
+			('resolveLinks', 'False'), ('errorMode', 'ErrorCodeAndText'), ('returnOptions', 'ObjectAsString'), ('sessionID', session)])
+		objects = [e.text for e in response.iter() if e.tag.endswith('catalogObject') and e.text and e.text.strip()]
+		return find_icons(''.join(objects))
+	finally:
+		soap_call(server, 'nQSessionService', 'logoff', [('sessionID', session)])
+
+# CSS unicode-range covering a set of codepoints
+def unicode_range(codepoints):
+	ranges = []
+	for codepoint in sorted(codepoints):
+		if ranges and ranges[-1][1] == codepoint - 1:
+			ranges[-1][1] = codepoint
+		else:
+			ranges.append([codepoint, codepoint])
+	return ','.join('U+%X' % r[0] if r[0] == r[1] else 'U+%X-%X' % (r[0], r[1]) for r in ranges)
+
+# Rules setting the content of each icon, with aliases sharing a rule
+def icon_rules(icons, names):
+	codepoints = {}
+	for name in sorted(names):
+		codepoints.setdefault(icons[name], []).append(name)
+	return ''.join('%s{content:"\\%x"}' % (','.join('.fa-%s:before' % n for n in codepoints[c]), c) for c in sorted(codepoints))
+
+# Write the subset font in each format, returning the CSS sources in order of preference
+def write_subset_font(codepoints):
+	formats = [('woff', 'woff'), ('ttf', 'truetype')]
+	if brotli:
+		formats.insert(0, ('woff2', 'woff2'))
+
+	sources = []
+	for ext, css_format in formats:
+		options = subset.Options()
+		options.flavor = ext if ext != 'ttf' else None
+		options.layout_features = []
+		options.name_IDs = ['*']
+		options.notdef_outline = True
+		options.drop_tables += ['FFTM', 'webf'] # FontForge and web font tables, not needed for rendering
+		font = TTFont(FULL_FONT, recalcTimestamp=False) # Keep the original timestamp, so the output only changes with the subset
+		subsetter = subset.Subsetter(options)
+		subsetter.populate(unicodes=codepoints)
+		subsetter.subset(font)
+		filename = '%s.%s' % (SUBSET_FONT, ext)
+		subset.save_font(font, filename, options)
+		version = hashlib.sha1(read_file(filename)).hexdigest()[:8] # Changes the URL when the subset changes
+		sources.append("url('../fonts/%s?v=%s') format('%s')" % (os.path.basename(filename), version, css_format))
+	return sources
+
 if __name__ == "__main__":
-	raw_icons = read_file('icons.txt')
-	icons = re.findall('fa-(.*?) ', raw_icons)
-	json = '{\n\t"icons": [\n\t\t"'
-	json += '",\n\t\t"'.join(icons)
-	json += '"\n\t]\n}'
-	write_output(json, 'icons.json', 'wb')
\ No newline at end of file
+	parser = argparse.ArgumentParser(description="Rittman Mead Insights Icon Font Builder")
+	parser.add_argument('-d', '--dashboards', action='append', default=[], help='Exported dashboard file or directory to collect icons from. Can be repeated.')
+	parser.add_argument('-i', '--icon', action='append', default=[], help='Icon to include in the subset, e.g. bar-chart. Can be repeated.')
+	parser.add_argument('-s', '--server', action='store', default=None, help='OBIEE server to read the icons of published dashboards from, e.g. http://localhost:9502.')
+	parser.add_argument('-u', '--user', action='store', default=None, help='User to log in to the OBIEE server as. The password is prompted for.')
+	args = parser.parse_args()
+	logging.basicConfig(format='%(message)s')
+
+	licence, font_face, base, icons = parse_css(read_file(FULL_CSS))
+	glyphs = TTFont(FULL_FONT).getBestCmap()
+	names = set(name for name, codepoint in icons.items() if codepoint in glyphs)
+
+	# Icon picker list
+	json_text = '{\n\t"icons": [\n\t\t"'
+	json_text += '",\n\t\t"'.join(sorted(names))
+	json_text += '"\n\t]\n}\n'
+	write_output(json_text, os.path.join(SCRIPT_DIR, 'icons.json'))
+
+	sources = [os.path.join(ROOT_DIR, s) for s in SOURCES] + args.dashboards
+	used = find_used(sources, names) | set(n[3:] if n.startswith('fa-') else n for n in args.icon)
+	used |= SEED_ICONS & names
+	if args.server:
+		try:
+			published = published_icons(args.server, args.user or raw_input('User: '), getpass.getpass())
+		except Exception as err:
+			print '\n\tError: Failed to read the published dashboards from %s: %s. Exiting.' % (args.server, err)
+			sys.exit(1)
+		print 'Icons of published dashboards:\t%d' % len(published & names)
+		used |= published & names
+	unknown = [n for n in used if n not in names]
+	if unknown:
+		print 'Unknown icons ignored: %s' % ', '.join(sorted(unknown))
+		used -= set(unknown)
+
+	used_codepoints = set(icons[n] for n in used)
+	rest = names - used
+	rest_codepoints = set(icons[n] for n in rest) - used_codepoints
+
+	# Both font faces use the family of the original, so the base styles apply to either
+	subset_face = "@font-face{font-family:'FontAwesome';src:%s;font-weight:normal;font-style:normal;unicode-range:%s}" % \
+		(','.join(write_subset_font(used_codepoints)), unicode_range(used_codepoints))
+	rest_face = font_face[:-1] + ';unicode-range:%s}' % unicode_range(rest_codepoints)
+
+	write_output('%s%s%s%s\n' % (licence, subset_face, ''.join(base), icon_rules(icons, used)), SUBSET_CSS)
+	write_output('%s%s%s\n' % (licence, rest_face, icon_rules(icons, rest)), REST_CSS)
+
+	print 'Icons in font:\t%d' % len(names)
+	print 'Icons in use:\t%d (%d glyphs)' % (len(used), len(used_codepoints))
+	for filename in [FULL_CSS, SUBSET_CSS, REST_CSS, FULL_FONT] + ['%s.%s' % (SUBSET_FONT, ext) for ext in ['woff2', 'woff', 'ttf']]:
+		if os.path.exists(filename):
+			print '%-36s %8.1f KB' % (os.path.relpath(filename, SCRIPT_DIR), os.path.getsize(filename) / 1024.0)
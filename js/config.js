@@ -201,5 +201,18 @@ var InsightsConfig = (function() {
     */
     InsightsConfig.NumericToDouble = true;
 
+    /**
+        * Number of rows fetched in each page when a query is run a page at a time, e.g. by the table and pivot table
+        * plugins, which render the first page while the rest of the results are fetched.
+    */
+    InsightsConfig.QueryPageSize = 5000;
+
+    /**
+        * Version stamp for the subject areas, tables, columns and variables cached by each browser. The cached copy is shown
+        * straight away and then refreshed from OBIEE, so changes appear on the next visit. Increase this to discard every
+        * cached copy instead, e.g. after a large change to the RPD.
+    */
+    InsightsConfig.MetadataVersion = 1;
+
     return InsightsConfig;
 }());
@@ -29,6 +29,7 @@ var obiee = (function() {
 	/**
 		* Generic OBIEE web service call. URL should be of the form `http(s)://<biserver>:<port>/analytics-ws/saw.dll`.
 		* RegEx is used to automatically guess the server and port from the current page URL.
+		* Identical read-only calls made while one is still running wait for its response instead of being sent again.
 		* @private
 		* @param {String} url OBIEE URL to make web service call to
 		* @param {String} inpData XML SOAP message to send
@@ -71,6 +72,33 @@ var obiee = (function() {
 				successFunc(response);
 		}
 
+		// Share the response of an identical read-only call that is still running
+		var key = service + '\n' + inpData;
+		var shared = sharedOperations.test(inpData) && !asyncQuery.test(inpData);
+		if (shared && key in pendingCalls) {
+			pendingCalls[key].push([successFunc, errorFunc]);
+			obiee.coalescedCalls++;
+			return;
+		}
+		var callbacks = [[successFunc, errorFunc]];
+		if (shared)
+			pendingCalls[key] = callbacks;
+
+		// Each caller parses the response separately, as callbacks modify the parsed object
+		function respond(handler) {
+			delete pendingCalls[key];
+			var error;
+			callbacks.forEach(function(cb) {
+				try {
+					handler(cb[0], cb[1]);
+				} catch(err) {
+					error = error || err;
+				}
+			});
+			if (error)
+				throw error;
+		}
+
 		$.ajax({
 			url: obieeURL + '?SOAPImpl=' + service,
 			type: "POST",
@@ -79,16 +107,36 @@ var obiee = (function() {
 			contentType: "text/xml; charset=\"utf-8\""
 		}).done(function(response) {
 			response = new XMLSerializer().serializeToString(response.documentElement);
-			parseResponse(response, successFunc, errorFunc);
+			respond(function(successFunc, errorFunc) {
+				parseResponse(response, successFunc, errorFunc);
+			});
 		}).fail(function(jqXHR, textStatus, errorThrown) {
 			response = jqXHR.responseText;
-			if (jqXHR.status == 200) // If the call to the server was successful.
-				parseResponse(response, successFunc, errorFunc);
-			else
-				errorFunc(textStatus + ': ' + errorThrown);
+			respond(function(successFunc, errorFunc) {
+				if (jqXHR.status == 200) // If the call to the server was successful.
+					parseResponse(response, successFunc, errorFunc);
+				else
+					errorFunc(textStatus + ': ' + errorThrown);
+			});
 		});
 	}
 
+	/** Web service operations that only read, so identical calls made while one is running can share its response. */
+	var sharedOperations = /<\w+:(executeSQLQuery|executeXMLQuery|describeSubjectArea|getSubjectAreas|getCurUser|getGroups|getSubItems|getItemInfo|readObjects)>/;
+
+	/** Asynchronous queries are paged with their own query ID, so cannot be shared. */
+	var asyncQuery = /<\w+:async>TRUE</;
+
+	/** Callbacks waiting on each shared call in progress, keyed by service and SOAP message. */
+	var pendingCalls = {};
+
+	/**
+		* Number of web service calls answered by an identical call that was already running,
+		* rather than being sent to the server.
+		* @memberOf module:obiee
+	*/
+	obiee.coalescedCalls = 0;
+
 	/** Clean up bad characters found in XML repsonses. */
 	function cleanupXML(xml) {
 		xml = xml.replace(/\x00/g, ''); // Remove any hexadecimal null characters
@@ -230,14 +278,9 @@ var obiee = (function() {
 				return roles;
 			}
 
- 			appRoles = roleNames();
-			if (appRoles.length > 0) {
-				successFunc(appRoles);
-			} else {
-				obiee.fetchVariables(function() {
-					successFunc(roleNames());
-					});
-				}
+			withRoles(function() {
+				successFunc(roleNames());
+			});
                         } else {
                                 successFunc(appRoles);
                         }
@@ -294,15 +337,134 @@ var obiee = (function() {
 
 	/* ------ END OF SECURITY FUNCTIONS ------ */
 
+	/* ------ METADATA CACHE ------ */
+
+	/** Promise for the IndexedDB database holding metadata from previous sessions, resolving to null if it cannot be used. */
+	var metadataDB;
+
+	/** Open the metadata cache database. */
+	function openMetadataCache() {
+		if (!metadataDB) {
+			var dfd = new $.Deferred();
+			metadataDB = dfd.promise();
+			try {
+				var request = window.indexedDB.open('insights-metadata', 1);
+				request.onupgradeneeded = function() {
+					request.result.createObjectStore('metadata');
+				};
+				request.onsuccess = function() { dfd.resolve(request.result); };
+				request.onerror = request.onblocked = function() { dfd.resolve(null); };
+			} catch(err) { // IndexedDB is not supported, or disabled e.g. in private browsing
+				dfd.resolve(null);
+			}
+		}
+		return metadataDB;
+	}
+
+	/** Key of a cached metadata item, specific to the user. Metadata is not cached until the user is known. */
+	function metadataKey(kind, name) {
+		return sessionStorage.obieeUser ? [sessionStorage.obieeUser, kind, name].join('\n') : null;
+	}
+
+	/** Version stamp stored with each item. Items with a different stamp are ignored. */
+	function metadataVersion() {
+		return rmVersion + ':' + InsightsConfig.MetadataVersion;
+	}
+
+	/** Read an item from the metadata cache, passing `undefined` to the callback if there is no current copy. */
+	function readMetadata(kind, name, callback) {
+		var key = metadataKey(kind, name);
+		openMetadataCache().done(function(db) {
+			if (!db || !key)
+				return callback();
+			try {
+				var request = db.transaction('metadata', 'readonly').objectStore('metadata').get(key);
+				request.onsuccess = function() {
+					var item = request.result;
+					callback(item && item.version == metadataVersion() ? item.data : undefined);
+				};
+				request.onerror = function() { callback(); };
+			} catch(err) {
+				callback();
+			}
+		});
+	}
+
+	/** Write an item to the metadata cache. Failures, e.g. when storage is full, are ignored. */
+	function writeMetadata(kind, name, data) {
+		var key = metadataKey(kind, name);
+		openMetadataCache().done(function(db) {
+			if (!db || !key)
+				return;
+			try {
+				db.transaction('metadata', 'readwrite').objectStore('metadata').put({ version: metadataVersion(), stored: Date.now(), data: data }, key);
+			} catch(err) {}
+		});
+	}
+
+	/**
+		* Answer a metadata request from the cache, then fetch the metadata from OBIEE in the background to keep the cache current.
+		* `successFunc` receives the cached copy as soon as it is read, with a second argument of true, or the fetched copy if there is none.
+		* If there was a cached copy and the fetched one differs, it is passed to `updateFunc` if given.
+		* @private
+		* @param {string} kind Type of metadata, e.g. `subjectAreas`.
+		* @param {string} name Name of the item, e.g. the subject area.
+		* @param {function} fetch Function fetching the metadata from OBIEE, passed success and error callbacks.
+	*/
+	function cachedMetadata(kind, name, fetch, successFunc, errFunc, updateFunc) {
+		readMetadata(kind, name, function(cached) {
+			if (cached !== undefined)
+				successFunc(cached, true);
+
+			fetch(function(data) {
+				writeMetadata(kind, name, data);
+				if (cached === undefined)
+					successFunc(data);
+				else if (updateFunc && JSON.stringify(data) != JSON.stringify(cached))
+					updateFunc(data);
+			}, cached === undefined ? errFunc : function() {}); // Keep showing the cached copy if the fetch fails
+		});
+	}
+
+	/**
+		* Removes the current user's metadata from the cache, so that subject areas and tables and columns are fetched
+		* from OBIEE when next requested.
+		* @param {function} [callback] Callback function to execute once the cache has been cleared.
+	*/
+	obiee.clearMetadataCache = function(callback) {
+		callback = callback || function() {};
+		openMetadataCache().done(function(db) {
+			if (!db || !sessionStorage.obieeUser)
+				return callback();
+			try {
+				var user = sessionStorage.obieeUser + '\n';
+				var transaction = db.transaction('metadata', 'readwrite');
+				transaction.objectStore('metadata')['delete'](IDBKeyRange.bound(user, user + '\uffff'));
+				transaction.oncomplete = transaction.onerror = function() { callback(); };
+			} catch(err) {
+				callback();
+			}
+		});
+	}
+
+	/* ------ END OF METADATA CACHE ------ */
+
 	/* ------ METADATA FUNCTIONS ------ */
 
 	/**
-		* Get available subject areas for the current session.
+		* Get available subject areas for the current session. The list from the metadata cache is returned if there is one,
+		* and is then refreshed from OBIEE.
 		* @param {function} successFunc Callback function to execute on success
 		* @param {function} errFunc Callback function to execute on failure
+		* @param {function} [updateFunc] Callback function to execute if the list fetched from OBIEE differs from the cached one
 		* @returns {Array} List of subject area names
 	*/
-	obiee.getSubjectAreas = function(successFunc, errFunc) {
+	obiee.getSubjectAreas = function(successFunc, errFunc, updateFunc) {
+		cachedMetadata('subjectAreas', '', fetchSubjectAreas, successFunc, errFunc, updateFunc);
+	}
+
+	/** Fetch the subject areas from OBIEE */
+	function fetchSubjectAreas(successFunc, errFunc) {
 		var soapMessage = obieeSOAPHeader();
 		soapMessage += '<soapenv:Body><'+wsdl+':getSubjectAreas>';
 		soapMessage += '<'+wsdl+':sessionID>' + sessionStorage.obieeSessionId + '</'+wsdl+':sessionID>';
@@ -318,12 +480,29 @@ var obiee = (function() {
 	}
 
 	/**
-		* Get metadata object describing presentation tables and columns for a given subject area.
+		* Get metadata object describing presentation tables and columns for a given subject area. The tables and columns
+		* from the metadata cache are returned if there are any, and are then refreshed from OBIEE.
 		* @param {String} subjectArea Subject area to retrieve metadata for
 		* @param {function} successFunc Callback function to execute on success
+		* @param {function} [updateFunc] Callback function to execute if the metadata fetched from OBIEE differs from the cached copy, passing a new `BIPres` object
 		* @returns {BIPres} List of subject area names
 	*/
-	obiee.getTablesAndCols = function(subjectArea, successFunc) {
+	obiee.getTablesAndCols = function(subjectArea, successFunc, updateFunc) {
+		function fetch(successFunc, errFunc) {
+			fetchTablesAndCols(subjectArea, successFunc, errFunc);
+		}
+
+		function parse(callback) {
+			return function(tabColData) {
+				callback(parseTablesAndCols(subjectArea, tabColData));
+			}
+		}
+
+		cachedMetadata('tablesAndCols', subjectArea, fetch, parse(successFunc), false, updateFunc ? parse(updateFunc) : false);
+	};
+
+	/** Fetch the presentation tables and columns of a subject area from OBIEE */
+	function fetchTablesAndCols(subjectArea, successFunc, errFunc) {
 		var soapMessage = obieeSOAPHeader();
 		soapMessage += '<soapenv:Body><'+wsdl+':describeSubjectArea>';
 		soapMessage += '<'+wsdl+':subjectAreaName>' + subjectArea + '</'+wsdl+':subjectAreaName>';
@@ -337,10 +516,9 @@ var obiee = (function() {
 			if ($.isPlainObject(outputData)) // If only one record found, will not automatically be put into an array
 				outputData = [outputData];
 
-			var biObject = parseTablesAndCols(subjectArea, outputData);
-			successFunc(biObject);
-		})
-	};
+			successFunc(outputData);
+		}, errFunc)
+	}
 
 	/** Parse presentation information into flat object array of columns */
 	function parseTablesAndCols(subjectArea, tabColData) {
@@ -418,11 +596,15 @@ var obiee = (function() {
 		* @param {function} successFunc Callback function to execute on success
 		* @param {BIQuery} biQuery BIQuery object which can be used to name columns on the resulting dataset
 		* @param {function} errFunc Callback function to execute on failure
+		* @param {Object} [options] Execution options
+		* @param {boolean} [options.columnar=false] Return the results as a `BIResultSet`, a column at a time, instead of an array of row objects.
+		* Values of numeric columns are then numbers, rather than text.
 		* @returns {Array} Resulting dataset from the BI Server. Each element represents a row, and contains an object where each property is a column.
 		* If a BIQuery object was provided, column names will be used for object property names.
 	*/
-	obiee.executeLSQL = function(lsql, successFunc, biQuery, errorFunc) {
+	obiee.executeLSQL = function(lsql, successFunc, biQuery, errorFunc, options) {
 		biQuery = biQuery || ""; // Set to null if unspecified
+		options = options || {};
 		var override = errorFunc ? true : false;
 
 		// Escape special characters
@@ -440,6 +622,11 @@ var obiee = (function() {
 		soapMessage += '</'+wsdl+':executeSQLQuery></soapenv:Body></soapenv:Envelope>';
 
 		var callback = function(response) {
+			if (options.columnar) {
+				successFunc(parseColumnar(response.Body.executeSQLQueryResult["return"].rowset, biQuery));
+				return;
+			}
+
 			outputData = response;
 			outputData = $.xml2json(outputData.Body.executeSQLQueryResult["return"].rowset).Row;
 			if ($.isPlainObject(outputData))
@@ -455,6 +642,126 @@ var obiee = (function() {
 		wsCall('xmlViewService', soapMessage, callback, errorFunc);
 	}
 
+	/**
+		* Executes a logical SQL statement against the BI Server asynchronously, fetching the results a page at a time.
+		* Each page is parsed and passed to `pageFunc` as it arrives, so the first rows can be used before the query has finished.
+		* @param {String} lsql Logical SQL to execute
+		* @param {function} pageFunc Callback function executed for each page, passing the rows of the page and a boolean which is true for the last page.
+		* @param {BIQuery} biQuery BIQuery object which can be used to name columns on the resulting dataset
+		* @param {function} errFunc Callback function to execute on failure
+		* @param {Object} [options] Paging options
+		* @param {number} [options.pageSize=InsightsConfig.QueryPageSize] Maximum number of rows in each page.
+		* @param {number} [options.maxRows] Maximum number of rows to fetch in total. The query is cancelled once this is reached.
+		* @param {boolean} [options.columnar=false] Pass each page as a `BIResultSet` instead of an array of row objects,
+		* as for `obiee.executeLSQL`. Pages can be combined with `obiee.BIResultSet.concat`.
+		* @returns {Object} Handle for the running query. Calling its `cancel` function stops any further pages and cancels the query on the server.
+		* @example
+		* var rows = [];
+		* var handle = obiee.executeLSQLPaged(lsql, function(page, finished) {
+		* 	rows = rows.concat(page);
+		* 	if (finished)
+		* 		console.log(rows.length + ' rows');
+		* }, biQuery, errFunc, { maxRows: 20000 });
+	*/
+	obiee.executeLSQLPaged = function(lsql, pageFunc, biQuery, errorFunc, options) {
+		options = options || {};
+		var pageSize = options.pageSize || InsightsConfig.QueryPageSize;
+		var maxRows = options.maxRows || Infinity;
+		var rowCount = 0, queryID, cancelled = false, cancelSent = false;
+
+		// Escape special characters
+		lsql = lsql.replace(/&/g, '&amp;');
+		lsql = lsql.replace(/</g, '&lt;');
+		lsql = lsql.replace(/>/g, '&gt;');
+
+		var soapMessage =  obieeSOAPHeader();
+		soapMessage += '<soapenv:Body><'+wsdl+':executeSQLQuery><'+wsdl+':sql>' + lsql + '</'+wsdl+':sql>';
+		soapMessage += '<'+wsdl+':outputFormat>SAWRowsetData</'+wsdl+':outputFormat>';
+		soapMessage += '<'+wsdl+':executionOptions><'+wsdl+':async>TRUE</'+wsdl+':async>';
+		soapMessage += '<'+wsdl+':maxRowsPerPage>' + pageSize + '</'+wsdl+':maxRowsPerPage>';
+		soapMessage += '<'+wsdl+':refresh>TRUE</'+wsdl+':refresh><'+wsdl+':presentationInfo>FALSE</'+wsdl+':presentationInfo>';
+		soapMessage += '<'+wsdl+':type>query</'+wsdl+':type></'+wsdl+':executionOptions><'+wsdl+':sessionID>' + sessionStorage.obieeSessionId + '</'+wsdl+':sessionID>';
+		soapMessage += '</'+wsdl+':executeSQLQuery></soapenv:Body></soapenv:Envelope>';
+
+		// Cancel the query on the server, ignoring the response
+		function cancelQuery() {
+			if (cancelSent)
+				return;
+			cancelSent = true;
+
+			var soapMessage =  obieeSOAPHeader();
+			soapMessage += '<soapenv:Body><'+wsdl+':cancelQuery><'+wsdl+':queryID>' + queryID + '</'+wsdl+':queryID>';
+			soapMessage += '<'+wsdl+':sessionID>' + sessionStorage.obieeSessionId + '</'+wsdl+':sessionID>';
+			soapMessage += '</'+wsdl+':cancelQuery></soapenv:Body></soapenv:Envelope>';
+			wsCall('xmlViewService', soapMessage, function() {}, function() {});
+		}
+
+		// Request the next page of results
+		function fetchNext() {
+			var soapMessage =  obieeSOAPHeader();
+			soapMessage += '<soapenv:Body><'+wsdl+':fetchNext><'+wsdl+':queryID>' + queryID + '</'+wsdl+':queryID>';
+			soapMessage += '<'+wsdl+':sessionID>' + sessionStorage.obieeSessionId + '</'+wsdl+':sessionID>';
+			soapMessage += '</'+wsdl+':fetchNext></soapenv:Body></soapenv:Envelope>';
+			wsCall('xmlViewService', soapMessage, callback, fetchError);
+		}
+
+		// Errors for pages still being fetched when the query was cancelled are expected
+		var fetchError = errorFunc && function(err) {
+			if (!cancelled)
+				errorFunc(err);
+		};
+
+		var callback = function(response) {
+			var result = response.Body.executeSQLQueryResult || response.Body.fetchNextResult;
+			result = result["return"];
+			queryID = result.queryID;
+			var finished = result.finished == 'true';
+
+			if (cancelled) { // Cancel the query if this is the response that gave its ID
+				if (!finished)
+					cancelQuery();
+				return;
+			}
+
+			var page, length;
+			if (options.columnar) {
+				page = parseColumnar(result.rowset, biQuery);
+				length = page.Length;
+			} else {
+				page = parseRowset(result.rowset, biQuery);
+				length = page.length;
+			}
+
+			if (rowCount + length >= maxRows) { // Stop once the row limit is reached
+				length = maxRows - rowCount;
+				if (options.columnar)
+					page.truncate(length);
+				else
+					page = page.slice(0, length);
+				if (!finished)
+					cancelQuery();
+				finished = true;
+			}
+			rowCount += length;
+
+			// The first response of an asynchronous query usually has no rows
+			if (!finished)
+				fetchNext();
+			if (length > 0 || finished)
+				pageFunc(page, finished);
+		}
+
+		wsCall('xmlViewService', soapMessage, callback, errorFunc);
+
+		return {
+			cancel: function() {
+				if (!cancelled && queryID)
+					cancelQuery();
+				cancelled = true;
+			}
+		};
+	}
+
 	/* ------ END OF EXECUTION FUNCTIONS ------ */
 
 	/* ------ INTERNAL QUERY FUNCTIONS ------ */
@@ -478,6 +785,70 @@ var obiee = (function() {
 		return outputData;
 	}
 
+	/**
+		* Parse a page of rows from a `SAWRowsetData` rowset, naming the columns after the BIQuery criteria.
+		* Reads the DOM directly rather than converting the whole rowset to an object first, as `xml2json` does.
+	*/
+	function parseRowset(rowset, biQuery) {
+		var rows = [];
+		if (!rowset)
+			return rows;
+
+		var names = biQuery ? biQuery.Criteria.map(function(c) { return c.Name; }) : [];
+		var rowNodes = $.parseXML(cleanupXML(rowset)).documentElement.childNodes;
+		for (var i=0; i < rowNodes.length; i++) {
+			if (rowNodes[i].nodeType != 1) // Skip whitespace between rows
+				continue;
+
+			var row = {};
+			names.forEach(function(name) { row[name] = null; });
+			var cells = rowNodes[i].childNodes;
+			for (var j=0; j < cells.length; j++) {
+				if (cells[j].nodeType != 1)
+					continue;
+				var key = cells[j].localName || cells[j].nodeName;
+				var index = +key.replace('Column', '');
+				row[index < names.length ? names[index] : key] = cells[j].textContent;
+			}
+			rows.push(row);
+		}
+		return rows;
+	}
+
+	/**
+		* Parse a `SAWRowsetData` rowset into a `BIResultSet`, named after the BIQuery criteria.
+		* Values are written straight into the column arrays, so no object is created for each row.
+	*/
+	function parseColumnar(rowset, biQuery) {
+		var rowNodes = rowset ? $.parseXML(cleanupXML(rowset)).documentElement.childNodes : [];
+		var rowCount = 0;
+		for (var i=0; i < rowNodes.length; i++) {
+			if (rowNodes[i].nodeType == 1)
+				rowCount++;
+		}
+
+		var results = new obiee.BIResultSet(rowCount);
+		var columns = biQuery ? biQuery.Criteria.map(function(c) { return results.addColumn(c.Name, c.DataType); }) : [];
+
+		var r = 0;
+		for (var i=0; i < rowNodes.length; i++) {
+			if (rowNodes[i].nodeType != 1) // Skip whitespace between rows
+				continue;
+
+			var cells = rowNodes[i].childNodes;
+			for (var j=0; j < cells.length; j++) {
+				if (cells[j].nodeType != 1)
+					continue;
+				var key = cells[j].localName || cells[j].nodeName;
+				var index = +key.replace('Column', '');
+				var column = columns[index] || results.Columns[key] || results.addColumn(key, 'varchar'); // Unnamed columns are kept as text
+				results.setValue(column, r, cells[j].textContent);
+			}
+			r++;
+		}
+		return results;
+	}
+
 	/** Build Logical SQL from obiee.BIQuery object */
 	function buildLSQL(biQuery) {
 		var lsql = 'SELECT\n';
@@ -746,21 +1117,27 @@ var obiee = (function() {
 					od.itemProperties = [od.itemProperties];
 			});
 
-			if (includeACL == 'True') {
-				outputData.forEach(function(item) {
-					var perm = new obiee.BIPermission(item.acl);
-					item.permissions = perm.Perms;
-				});
-			}
+			function done() {
+				if (rmOnly) {
+					outputData = outputData.filter(function(item) {
+						var prop = item.itemProperties.filter(function(d) { return d.name == 'RM-Version' });
+						return prop.length > 0;
+					});
+				}
 
-			if (rmOnly) {
-				outputData = outputData.filter(function(item) {
-					var prop = item.itemProperties.filter(function(d) { return d.name == 'RM-Version' });
-					return prop.length > 0;
-				});
+				successFunc(outputData);
 			}
 
-			successFunc(outputData);
+			if (includeACL == 'True') {
+				withRoles(function() { // Permissions depend on the user's roles
+					outputData.forEach(function(item) {
+						var perm = new obiee.BIPermission(item.acl);
+						item.permissions = perm.Perms;
+					});
+					done();
+				});
+			} else
+				done();
 		}, function(err) {
 			if (errFunc)
 				errFunc(err.faultstring);
@@ -829,9 +1206,11 @@ var obiee = (function() {
 
 		wsCall('webCatalogService', soapMessage, function(response) {
 			var item = response.Body.getItemInfoResult.return;
-			var perm = new obiee.BIPermission(item.acl);
-			item.permissions = perm.Perms;
-			successFunc(item);
+			withRoles(function() { // Permissions depend on the user's roles
+				var perm = new obiee.BIPermission(item.acl);
+				item.permissions = perm.Perms;
+				successFunc(item);
+			});
 		}, errFunc);
 	}
 
@@ -2384,6 +2763,66 @@ var obiee = (function() {
 		}
 	}
 
+	/**
+		* Wrapper function to render a visualisation a page of results at a time, for plugins with `pagedRender` set.
+		* The first page is rendered as soon as it arrives. Later pages are added using the plugin's `append` function if it has one,
+		* otherwise the visualisation is rendered again with all of the rows once the last page has arrived.
+		* Pages are fetched as `BIResultSet` objects, which are combined and kept as the visualisation's raw data, a column at a time.
+	*/
+	function renderPagedLoop(visual, scope, callback) {
+		var plugin = rmvpp.Plugins[visual.Plugin];
+		var pages = [], renderedRows = 0;
+
+		return function(page, finished) {
+			var container = $(visual.Container)[0];
+			pages.push(page); // Keep the raw data
+
+			if (renderedRows == 0 && page.Length > 0) {
+				preVisRender(visual);
+				plugin.render(mapData(dataRows(page), visual.ColumnMap), visual.ColumnMap, visual.Config, container, visual.ConditionalFormats);
+				renderedRows = page.Length;
+			} else if (renderedRows > 0 && plugin.append && (page.Length > 0 || finished)) { // Plugins may hold pages back until the last
+				plugin.append(mapData(dataRows(page), visual.ColumnMap), visual.ColumnMap, visual.Config, container, visual.ConditionalFormats, finished);
+				renderedRows += page.Length;
+			}
+
+			if (finished) {
+				$(visual.Container).removeData('pagedQuery');
+				var results = obiee.BIResultSet.concat(pages);
+				pages = [];
+				visual.Data = results;
+				if (results.Length > 0) {
+					if (renderedRows < results.Length) { // Render with all of the rows
+						preVisRender(visual);
+						plugin.render(mapData(dataRows(results), visual.ColumnMap), visual.ColumnMap, visual.Config, container, visual.ConditionalFormats);
+					}
+					postVisRender(visual, scope);
+				} else
+					rmvpp.displayError(container, 'No data, cannot render visual.')
+
+				if (callback) callback();
+			}
+		}
+	}
+
+	/**
+		* Row objects for the raw data of a visualisation, which is a `BIResultSet` when it was fetched a page at a time.
+		* New objects are created each time for a `BIResultSet`, as `mapData` changes the rows it is given.
+	*/
+	function dataRows(data) {
+		if (data.Type != 'ResultSet')
+			return data;
+		var rows = [];
+		for (var i=0; i < data.Length; i++)
+			rows.push(data.row(i));
+		return rows;
+	}
+
+	/** Number of rows in the raw data of a visualisation, either an array of rows or a `BIResultSet` */
+	function dataLength(data) {
+		return data.Type == 'ResultSet' ? data.Length : data.length;
+	}
+
 	/** Get column info for a column map */
 	function getColumnInfo(columns) {
 		var mainDFD = new $.Deferred(), promises = [];
@@ -2745,13 +3184,17 @@ var obiee = (function() {
 		return colCode
 	}
 
-	/** Fetches and cleans variables, then stores them in `obiee.BIVariables` */
+	/**
+		* Fetches and cleans variables, then stores them in `obiee.BIVariables`. Variables are always fetched from OBIEE,
+		* never from the metadata cache, as their values are used in queries and prompts.
+		* @param {function} [callback] Callback function to execute once the variables are stored.
+	*/
 	obiee.fetchVariables = function(callback) {
 		obiee.BIVariables = {
 			Session : [],
 			Repository : [],
-			Presentation : []
-		};  // Refresh object
+			Presentation : obiee.BIVariables.Presentation || []
+		};  // Refresh object, keeping presentation variables
 
 		var c1 = new obiee.BIColumn('', 'Name');
 		var c2 = new obiee.BIColumn('', 'Type');
@@ -2782,6 +3225,23 @@ var obiee = (function() {
 		});
 	}
 
+	// Calls back once `obiee.BIVariables` holds the user's roles, fetching the variables if they have not arrived yet
+	var roleRequests = null;
+	function withRoles(callback) {
+		var roles = (obiee.BIVariables.Session || []).filter(function(v) { return v.Name == 'ROLES'; });
+		if (roles.length > 0)
+			return callback();
+
+		if (roleRequests)
+			return roleRequests.push(callback);
+		roleRequests = [callback];
+		obiee.fetchVariables(function() {
+			var callbacks = roleRequests;
+			roleRequests = null;
+			callbacks.forEach(function(c) { c(); });
+		});
+	}
+
 	/**
 		* Updates or adds a presentation variable to `obiee.BIVariables`.
 		* @param {string} name Name for the variable.
@@ -3414,8 +3874,9 @@ var obiee = (function() {
 			* Execute the query against the BI server.
 			* @param {function} Callback function to execute on success, passing the result set.
 			* @param {functino} Callback function to execute on failure, passing an object describing the error and LSQL.
+			* @param {Object} [options] Execution options, as for `obiee.executeLSQL`. Set `columnar` to receive a `BIResultSet`.
 		**/
-		this.run = function(successFunc, errFunc) {
+		this.run = function(successFunc, errFunc, options) {
 			var query = this;
 
 			// Convert any variables into column objects
@@ -3429,10 +3890,202 @@ var obiee = (function() {
 			// XML execution is inferior in 11.1.1.9 and above
 			// var xml = buildXML(this);
 			// executeXML(xml, successFunc, query, errFunc);
-			obiee.executeLSQL(query.lsql(), successFunc, query, errFunc);
+			obiee.executeLSQL(query.lsql(), successFunc, query, errFunc, options);
+		};
+
+		/**
+			* Execute the query against the BI server, fetching the results a page at a time.
+			* @param {function} Callback function executed for each page, passing the rows of the page and a boolean which is true for the last page.
+			* @param {function} Callback function to execute on failure, passing an object describing the error and LSQL.
+			* @param {Object} [options] Paging options, `pageSize`, `maxRows` and `columnar`, as for `obiee.executeLSQLPaged`.
+			* @returns {Object} Handle with a `cancel` function to stop the query.
+		**/
+		this.runPaged = function(pageFunc, errFunc, options) {
+			var query = this;
+			addSortColumns(query.Criteria);
+			return obiee.executeLSQLPaged(query.lsql(), pageFunc, query, errFunc, options);
 		};
 	}
 
+	/**
+		* @class
+		* Query results held a column at a time, returned by `obiee.executeLSQL`, `obiee.executeLSQLPaged` and the `BIQuery` functions
+		* that call them when the `columnar` option is set.
+		* Numeric columns are stored in a `Float64Array`, with `NaN` for nulls. Other columns are dictionary encoded: an array of
+		* the distinct values and an `Int32Array` holding the position of each row's value in it, or -1 for nulls.
+		* Row objects are only created when requested, by `row` or `rows`.
+		* @param {number} length Number of rows.
+		* @example
+		* query.run(function(results) {
+		* 	var revenue = results.Columns['Revenue'].Values; // Float64Array
+		* 	var total = 0;
+		* 	for (var i=0; i < results.Length; i++)
+		* 		total += revenue[i] || 0;
+		* }, errFunc, { columnar: true });
+	*/
+	obiee.BIResultSet = function(length) {
+		/** Number of rows. */
+		this.Length = length;
+
+		/** Column names, in the order of the query criteria. */
+		this.Names = [];
+
+		/**
+			* Columns, with their names as the property names. Each has `Name` and `DataType` properties, and either `Values`
+			* for numeric columns or `Dictionary` and `Codes` for other columns.
+		*/
+		this.Columns = {};
+
+		/** Hardcoded type identifier, `ResultSet`. */
+		this.Type = 'ResultSet';
+
+		var lookups = {}; // Position of each value in the dictionary of a column, used while the results are built
+		var rows; // Row objects, once created
+
+		/**
+			* Adds an empty column to the results.
+			* @param {string} name Column name.
+			* @param {string} dataType OBIEE data type, e.g. `varchar`, `integer`, `double`.
+			* @returns {Object} The new column.
+		*/
+		this.addColumn = function(name, dataType) {
+			var column = { Name: name, DataType: dataType };
+			if ($.inArray(dataType, ['integer', 'double', 'numeric']) > -1) {
+				column.Values = new Float64Array(this.Length);
+				for (var i=0; i < this.Length; i++)
+					column.Values[i] = NaN;
+			} else {
+				column.Dictionary = [];
+				column.Codes = new Int32Array(this.Length);
+				for (var i=0; i < this.Length; i++)
+					column.Codes[i] = -1;
+				lookups[name] = Object.create(null);
+			}
+			this.Names.push(name);
+			this.Columns[name] = column;
+			return column;
+		};
+
+		/**
+			* Sets the value of a column for a row, from the text returned by OBIEE.
+			* @param {Object} column Column returned by `addColumn`.
+			* @param {number} i Row number.
+			* @param {string} text Value as text.
+		*/
+		this.setValue = function(column, i, text) {
+			if (column.Values)
+				column.Values[i] = +text;
+			else
+				column.Codes[i] = this.encode(column, text);
+		};
+
+		/**
+			* Gets the position of a value in the dictionary of a non-numeric column, adding it if it is not there yet.
+			* @param {Object} column Column returned by `addColumn`.
+			* @param {string} text Value as text.
+			* @returns {number} Position of the value in `column.Dictionary`.
+		*/
+		this.encode = function(column, text) {
+			var lookup = lookups[column.Name];
+			if (!(text in lookup)) {
+				lookup[text] = column.Dictionary.length;
+				column.Dictionary.push(text);
+			}
+			return lookup[text];
+		};
+
+		/**
+			* Drops the rows after the first `length`.
+			* @param {number} length Number of rows to keep.
+		*/
+		this.truncate = function(length) {
+			if (length >= this.Length)
+				return;
+			this.Length = length;
+			for (var name in this.Columns) {
+				var column = this.Columns[name];
+				if (column.Values)
+					column.Values = column.Values.subarray(0, length);
+				else
+					column.Codes = column.Codes.subarray(0, length);
+			}
+			rows = undefined;
+		};
+
+		/**
+			* Gets the value of a column for a row.
+			* @param {string} name Column name.
+			* @param {number} i Row number.
+			* @returns Number for numeric columns, otherwise a string. Null if the value is null.
+		*/
+		this.value = function(name, i) {
+			var column = this.Columns[name];
+			if (column.Values)
+				return isNaN(column.Values[i]) ? null : column.Values[i];
+			return column.Codes[i] == -1 ? null : column.Dictionary[column.Codes[i]];
+		};
+
+		/**
+			* Gets a row as an object, with a property for each column. Values are as returned by `value`.
+			* @param {number} i Row number.
+			* @returns {Object} Row object.
+		*/
+		this.row = function(i) {
+			var row = {};
+			for (var j=0; j < this.Names.length; j++)
+				row[this.Names[j]] = this.value(this.Names[j], i);
+			return row;
+		};
+
+		/**
+			* Gets every row as an object, like those returned by `obiee.executeLSQL` without the `columnar` option, except that
+			* values of numeric columns are numbers rather than the text OBIEE returned, e.g. `1500` for `"1500.0"`.
+			* The objects are created on the first call and reused after that.
+			* @returns {Object[]} Array of row objects.
+		*/
+		this.rows = function() {
+			if (!rows) {
+				rows = [];
+				for (var i=0; i < this.Length; i++)
+					rows.push(this.row(i));
+			}
+			return rows;
+		};
+
+		/** Serialises the results as row objects, as they would be without the `columnar` option. The objects are not kept. */
+		this.toJSON = function() {
+			var json = [];
+			for (var i=0; i < this.Length; i++)
+				json.push(this.row(i));
+			return json;
+		};
+	}
+
+	/**
+		* Combines result sets with the same columns, such as the pages of a query, into one.
+		* @param {BIResultSet[]} sets Result sets to combine, in order. There must be at least one.
+		* @returns {BIResultSet} New result set with the rows of each set.
+	*/
+	obiee.BIResultSet.concat = function(sets) {
+		var length = sets.reduce(function(total, set) { return total + set.Length; }, 0);
+		var results = new obiee.BIResultSet(length);
+		sets[0].Names.forEach(function(name) {
+			var column = results.addColumn(name, sets[0].Columns[name].DataType), offset = 0;
+			sets.forEach(function(set) {
+				var source = set.Columns[name];
+				if (column.Values) {
+					column.Values.set(source.Values, offset);
+				} else { // Map codes from each dictionary onto the combined one
+					var codes = source.Dictionary.map(function(text) { return results.encode(column, text); });
+					for (var i=0; i < set.Length; i++)
+						column.Codes[offset + i] = source.Codes[i] == -1 ? -1 : codes[source.Codes[i]];
+				}
+				offset += set.Length;
+			});
+		});
+		return results;
+	}
+
 	/**
 		* @class
 		* Presentation tables and columns for a given subject area.
@@ -3452,6 +4105,9 @@ var obiee = (function() {
 		/** Hierarchical array of presentation tables (BITable) with table names as the property names. Child tables stored in `Children` property of each table. */
 		this.Tables = tables;
 
+		/** Columns added with `addColumn`, rather than read from OBIEE. */
+		this.AddedColumns = [];
+
 		/**
 			Adds a BIColumn to the metadata object.
 			@param {BIColumn} biColumn Presentation column to add
@@ -3459,6 +4115,7 @@ var obiee = (function() {
 		this.addColumn = function(biColumn) {
 			colCode = biColumn.Table + '.' + biColumn.Name;
 			this.AllColumns[colCode] = biColumn;
+			this.AddedColumns.push(biColumn);
 
 			if (biColumn.Table in this.Tables) {
 				this.Tables[biColumn.Table].Columns[biColumn.Name] = biColumn;
@@ -3538,7 +4195,10 @@ var obiee = (function() {
 		/**  DOM element in which to render the visualisation. */
 		this.Container;
 
-		/** Contains raw dataset for OBIEE query, saved by `renderQueryLoop` private function. */
+		/**
+			* Contains raw dataset for OBIEE query, saved by the `renderQueryLoop` and `renderPagedLoop` private functions.
+			* This is an array of row objects, or a `BIResultSet` for plugins with `pagedRender` set.
+		*/
 		this.Data = [];
 
 		/** Boolean property indicating whether the query should be refreshed from OBIEE on next execution.
@@ -3582,14 +4242,25 @@ var obiee = (function() {
 				rmvpp.loadingScreen(vis.Container);
 				vis.resetColumnConfig();
 
-				if (vis.Data.length == 0 || (vis.Refresh > 0)) {
-					vis.Query.run(renderQueryLoop(vis, scope, callback), function(err) {
+				// Stop fetching pages for a previous render
+				var pagedQuery = $(vis.Container).data('pagedQuery');
+				if (pagedQuery)
+					pagedQuery.cancel();
+
+				if (dataLength(vis.Data) == 0 || (vis.Refresh > 0)) {
+					var errorHandler = function(err) {
 						var err = obiee.getErrorDetail(err);
 						rmvpp.displayError($(vis.Container)[0], err.basic + '\n\n' + vis.Query.lsql());
-					});
+					};
+
+					if (rmvpp.Plugins[vis.Plugin].pagedRender) {
+						pagedQuery = vis.Query.runPaged(renderPagedLoop(vis, scope, callback), errorHandler, { maxRows: vis.Query.MaxRows, columnar: true });
+						$(vis.Container).data('pagedQuery', pagedQuery);
+					} else
+						vis.Query.run(renderQueryLoop(vis, scope, callback), errorHandler);
 				} else {
 					preVisRender(vis);
-					rmvpp.Plugins[vis.Plugin].render(mapData(vis.Data, vis.ColumnMap), vis.ColumnMap, vis.Config, $(vis.Container)[0], vis.ConditionalFormats);
+					rmvpp.Plugins[vis.Plugin].render(mapData(dataRows(vis.Data), vis.ColumnMap), vis.ColumnMap, vis.Config, $(vis.Container)[0], vis.ConditionalFormats);
 					postVisRender(vis, scope);
 					if (callback) callback();
 				}
@@ -4055,12 +4726,12 @@ var obiee = (function() {
 
 			this.Visuals.forEach(function(vis) {
 				if (obiee.showOrHideVis(visSelectors, vis)) { // If shown on page
-					if (vis.Data.length == 0) { // Don't run the query if unnecessary
+					if (dataLength(vis.Data) == 0) { // Don't run the query if unnecessary
 						vis.Query.run(function(data) {
 							createCSV(data, vis.DisplayName);
 						});
 					} else {
-						createCSV(vis.Data, vis.DisplayName);
+						createCSV(dataRows(vis.Data), vis.DisplayName);
 					}
 				}
 			});
@@ -4146,9 +4817,9 @@ var obiee = (function() {
 			var wb = new Workbook(); // Create new Excel workbook
 			this.Visuals.forEach(function(vis) {
 				if (obiee.showOrHideVis(visSelectors, vis)) { // If shown on page
-					if (vis.Data.length > 0) {
+					if (dataLength(vis.Data) > 0) {
 						wb.SheetNames.push(vis.DisplayName);
-						var ws = sheetFromData(vis.Data, vis.Query.Criteria); // Use cached data for download
+						var ws = sheetFromData(dataRows(vis.Data), vis.Query.Criteria); // Use cached data for download
 						console.log(vis.DisplayName);
 						wb.Sheets[vis.DisplayName] = ws;
 					}
@@ -4351,7 +5022,8 @@ var obiee = (function() {
 			// Current user application roles
 			var userRoles = obiee.BIVariables.Session.filter(function(v) {
 				return v.Name == 'ROLES';
-			})[0].Value;
+			});
+			userRoles = userRoles.length > 0 ? userRoles[0].Value : [];
 
 			appRoles.forEach(function(appRole) {
 				if ($.inArray(appRole.account.name, userRoles) > -1)
@@ -0,0 +1,185 @@
+#!/usr/bin/python
+#
+# Script to build the catalogue of BI functions shown in the function library
+#
+# Reads the function descriptions from the OBIEE message file and the function tree from the
+# function selector script, both a line or element at a time so memory use does not grow with
+# the size of the message file:
+#
+#	$ORACLE_HOME/bi/bifoundation/web/msgdb/l_en/messages/searchsysmessages.xml
+#	$ORACLE_HOME/user_projects/domains/bi/servers/bi_server1/tmp/_WL_user/analytics/<id>/war/res/b_mozilla/answers/functionselector.js
+#
+# The selector script should be prettified so that each folder and function is on its own line.
+# A catalogue in the older single file format (bi-functions.json) can be converted with --json.
+#
+# Output, in the output folder:
+#	index.json		Categories, the name and syntax of each function, and the search index
+#	<category>.json	Description, syntax help and example of each function in a category
+#
+# The function library loads the index when opened, and a category file when one of its functions
+# is selected. Searches use the keyword and prefix index, rather than scanning every function.
+#
+
+# Standard python distribution libraries:
+import os, sys
+import re, json, argparse
+from xml.etree import cElementTree
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(sys.argv[0]))
+
+PREFIX_LENGTH = 3 # Keywords are indexed by every prefix up to this length
+MIN_KEYWORD = 2
+
+# Tag name without its namespace
+def localName(tag):
+	return tag.split('}')[-1]
+
+# Text of an element and its children, with line breaks kept and other markup (e.g. <i>) removed
+def elementText(elem):
+	parts = [elem.text or '']
+	for child in elem:
+		parts.append('\n' if localName(child.tag) == 'br' else elementText(child))
+		parts.append(child.tail or '')
+	return ''.join(parts)
+
+# Tidy the text of a message, removing indentation and carriage returns
+def cleanText(text):
+	return '\n'.join(line.strip() for line in text.replace('\r', '').strip().split('\n'))
+
+# Read the descriptions and syntax help of each function from the message file, an element at a time
+def readMessages(filename):
+	messages = {}
+	context = cElementTree.iterparse(filename, events=('start', 'end'))
+	root = None
+	for event, elem in context:
+		if event == 'start':
+			if root is None:
+				root = elem
+			continue
+		if localName(elem.tag) != 'WebMessage':
+			continue
+
+		name = elem.get('name') or ''
+		match = re.match(r'kmsgFunctionSelector(?:(Desc)(.+)|(.+?)(SyntaxHelp))$', name)
+		if match:
+			id, prop = (match.group(2), 'Desc') if match.group(1) else (match.group(3), 'SyntaxHelp')
+			html = [child for child in elem if localName(child.tag) in ('HTML', 'TEXT')]
+			if html:
+				messages.setdefault(id, {})[prop] = cleanText(elementText(html[0]))
+
+		# Discard the messages already read
+		elem.clear()
+		root.clear()
+	return messages
+
+# Read the function tree from the function selector script, a line at a time
+def readSelector(filename, messages):
+	categories = []
+	with open(filename, 'r') as f:
+		for line in f:
+			if "itemType='Folder'" in line:
+				group = re.search(r'"kmsgFunctionSelectorGroup(.*?)"', line)
+				if group:
+					categories.append((group.group(1), []))
+				continue
+
+			id = re.search(r'"kmsgFunctionSelectorDesc(.*?)"', line)
+			if not id or not categories:
+				continue
+			id = id.group(1)
+			name = re.search(r'a\+\+, b, "(.*?)"', line)
+			syntax = re.search(r'saw.answers.getLocalizedString\("kmsgFunctionSelectorDesc.*?"\), "(.*?)"', line)
+			example = re.search(r'saw.answers.getLocalizedString\("kmsgFunctionSelectorDesc.*"\), "(.*?)"', line)
+			func = {
+				'Name' : name.group(1).replace('_', ' ') if name else id,
+				'Syntax' : syntax.group(1) if syntax else '',
+				'Example' : example.group(1) if example else ''
+			}
+			func.update(messages.get(id, {}))
+			categories[-1][1].append((id, func))
+	return categories
+
+# Read a catalogue in the single file format written by the old parseBIFunctions.js
+def readJSON(filename):
+	with open(filename, 'r') as f:
+		catalogue = json.load(f, object_pairs_hook=lambda pairs: pairs) # Keep the order of categories and functions
+	categories = []
+	for category, funcs in catalogue:
+		functions = []
+		for id, props in funcs:
+			func = dict(props)
+			for prop in ['SyntaxHelp', 'Desc']:
+				if prop in func:
+					func[prop] = cleanText(func[prop])
+			functions.append((id, func))
+		categories.append((category, functions))
+	return categories
+
+# Words a function can be found by: its name, id and the function called in its syntax
+def keywords(id, func):
+	words = set(re.findall(r'[a-z0-9]+', func['Name'].lower()))
+	words.add(id.lower())
+	called = re.match(r'\s*([A-Za-z_][\w.]*)', func.get('Syntax', ''))
+	if called:
+		words.add(called.group(1).lower())
+	return set(w for w in words if len(w) >= MIN_KEYWORD)
+
+# File name for a category
+def categoryFile(category):
+	return re.sub(r'[^a-z0-9]+', '-', category.lower()).strip('-') + '.json'
+
+# Write the index and category files for a list of categories and their functions
+def writeCatalogue(categories, outDir):
+	if not os.path.exists(outDir):
+		os.makedirs(outDir)
+
+	index = {'categories' : [], 'functions' : [], 'keywords' : {}, 'prefixes' : {}, 'prefixLength' : PREFIX_LENGTH}
+	written = set(['index.json'])
+	for c, (category, functions) in enumerate(categories):
+		filename = categoryFile(category)
+		index['categories'].append([category, filename])
+		details = {}
+		for id, func in functions:
+			for word in keywords(id, func):
+				index['keywords'].setdefault(word, []).append(len(index['functions']))
+			index['functions'].append([c, id, func['Name'], func.get('Syntax', '')])
+			details[id] = dict((k, func[k]) for k in ['Desc', 'SyntaxHelp', 'Example'] if func.get(k))
+
+		with open(os.path.join(outDir, filename), 'wb') as f:
+			f.write(json.dumps(details, sort_keys=True, separators=(',', ':')))
+		written.add(filename)
+
+	for word in index['keywords']:
+		for length in range(1, min(len(word), PREFIX_LENGTH) + 1):
+			index['prefixes'].setdefault(word[:length], []).append(word)
+	for prefix in index['prefixes']:
+		index['prefixes'][prefix].sort()
+
+	with open(os.path.join(outDir, 'index.json'), 'wb') as f:
+		f.write(json.dumps(index, sort_keys=True, separators=(',', ':')))
+
+	# Remove files for categories that no longer exist
+	for file in os.listdir(outDir):
+		if file.endswith('.json') and file not in written:
+			os.remove(os.path.join(outDir, file))
+
+	return sum(len(functions) for category, functions in categories), len(index['keywords'])
+
+def main():
+	parser = argparse.ArgumentParser(description="Rittman Mead Insights BI Function Catalogue Builder")
+	parser.add_argument('messages', action='store', nargs='?', default='searchsysmessages.xml', help='OBIEE message file with the function descriptions.')
+	parser.add_argument('selector', action='store', nargs='?', default='functionselector.js', help='Prettified OBIEE function selector script with the function tree.')
+	parser.add_argument('--json', action='store', help='Convert a catalogue in the old bi-functions.json format instead.')
+	parser.add_argument('-o', '--output', action='store', default=os.path.join(SCRIPT_DIR, 'functions'), help='Directory to write the catalogue to.')
+	args = parser.parse_args()
+
+	if args.json:
+		categories = readJSON(args.json)
+	else:
+		categories = readSelector(args.selector, readMessages(args.messages))
+
+	functions, words = writeCatalogue(categories, args.output)
+	print 'Wrote %d functions in %d categories, with %d keywords:\t%s' % (functions, len(categories), words, os.path.abspath(args.output))
+
+if __name__ == "__main__":
+	main()
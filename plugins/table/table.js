@@ -147,6 +147,23 @@
         $(container).find('input.search').val(searchVal).trigger('keydown');
 	}
 
+	// Render the first page of results while the rest are fetched, adding each page to the grid as it arrives
+	rmvpp.Plugins[pluginName].pagedRender = true;
+
+	// setRowData rebuilds and sorts the whole grid, so pages are held back until they at least double the rows shown
+	rmvpp.Plugins[pluginName].append = function(data, columnMap, config, container, condFormats, finished) {
+		var gridOptions = $(container).data('gridOptions');
+		var pending = $(container).data('pendingRows') || [];
+		Array.prototype.push.apply(pending, data);
+
+		if (finished || pending.length >= gridOptions.rowData.length) {
+			gridOptions.rowData = gridOptions.rowData.concat(pending);
+			gridOptions.api.setRowData(gridOptions.rowData); // Keeps the sort and filter applied
+			pending = [];
+		}
+		$(container).data('pendingRows', pending);
+	}
+
     rmvpp.Plugins[pluginName].render = function(data, columnMap, config, container, condFormats)   {
 		var columnDefs = []; // Declare columns
 		columnMap.columns.forEach(function(c, i) {
@@ -206,6 +223,8 @@
             headerHeight: 25
         };
 
+        $(container).data('gridOptions', gridOptions).removeData('pendingRows');
+
         function getColFromID(colId) {
             return columnMap.columns.filter(function(c) {
                 return c.Name == colId;
@@ -0,0 +1,178 @@
+#!/usr/bin/python
+#
+# Timing and resource report for the documentation build
+#
+# Records the wall time, CPU time, peak memory and output size of each stage of the build and of
+# each converted file, writes them to a JSON report and prints the slowest items.
+#
+# The peak memory of a stage is sampled from /proc, covering this process and every process it starts,
+# while the stage runs. Where /proc is not available, only the peak since the build started is known,
+# and is recorded as peak_rss_cumulative. The CPU time and peak memory of a file are those of the
+# process that converted it (Pandoc), so are known however many files are converted at once.
+#
+
+# Standard python distribution libraries:
+import os, sys
+import json, time, threading
+from contextlib import contextmanager
+
+try:
+	import resource
+except ImportError:
+	resource = None # Not available on Windows
+
+# CPU time used by this process and its finished child processes, in seconds
+def cpuTime():
+	t = os.times()
+	return t[0] + t[1] + t[2] + t[3]
+
+# Peak resident memory of this process or of its largest child process since the build started, in bytes
+def cumulativePeakRSS():
+	if not resource:
+		return None
+	return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * RSS_SCALE
+
+RSS_SCALE = 1 if sys.platform == 'darwin' else 1024 # ru_maxrss is in kilobytes, except on macOS
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# Resident memory of this process and all of its descendants, in bytes, read from /proc
+def treeRSS():
+	parents, rss = {}, {}
+	for pid in os.listdir('/proc'):
+		if not pid.isdigit():
+			continue
+		try:
+			with open('/proc/%s/stat' % pid, 'rb') as f:
+				fields = f.read().rsplit(')', 1)[1].split() # The command name may contain spaces
+		except (IOError, IndexError):
+			continue # Process has exited
+		parents[int(pid)] = int(fields[1])
+		rss[int(pid)] = int(fields[21]) * PAGE_SIZE
+
+	tree = set([os.getpid()])
+	changed = True
+	while changed:
+		changed = False
+		for pid, parent in parents.items():
+			if parent in tree and pid not in tree:
+				tree.add(pid)
+				changed = True
+	return sum(rss.get(pid, 0) for pid in tree)
+
+# Samples the memory of this process and its descendants in the background, keeping the peak
+class MemorySampler(threading.Thread):
+	available = os.path.isdir('/proc/self')
+
+	def __init__(self, interval=0.05):
+		threading.Thread.__init__(self)
+		self.daemon = True
+		self.interval = interval
+		self.peak = 0
+		self.done = threading.Event()
+
+	def run(self):
+		while not self.done.is_set():
+			self.peak = max(self.peak, treeRSS())
+			self.done.wait(self.interval)
+
+	# Stop sampling, returning the peak in bytes
+	def stop(self):
+		self.done.set()
+		self.join()
+		return max(self.peak, treeRSS())
+
+# Total size in bytes of a list of files and folders
+def outputBytes(paths):
+	total = 0
+	for p in paths:
+		if os.path.isfile(p):
+			total += os.path.getsize(p)
+		elif os.path.isdir(p):
+			for root, subDirs, files in os.walk(p):
+				total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+	return total
+
+class BuildReport(object):
+	# File paths in the report are given relative to root, if set
+	def __init__(self, root=None):
+		self.root = root
+		self.stages = []
+		self.files = []
+		self.start = time.time()
+		self.lock = threading.Lock()
+
+	# Time a stage of the build. Set 'outputs' on the yielded dictionary to the files or folders
+	# it writes, to have their size recorded, and 'error' if the stage failed, to record no output.
+	@contextmanager
+	def stage(self, name):
+		record = {'name' : name, 'outputs' : [], 'error' : None}
+		sampler = MemorySampler() if MemorySampler.available else None
+		if sampler:
+			sampler.start()
+		wall, cpu = time.time(), cpuTime()
+		try:
+			yield record
+		except BaseException as err:
+			record['error'] = record['error'] or str(err) or type(err).__name__
+			raise
+		finally:
+			record['wall'] = round(time.time() - wall, 3)
+			record['cpu'] = round(cpuTime() - cpu, 3)
+			record['peak_rss'] = sampler.stop() if sampler else None
+			record['peak_rss_cumulative'] = cumulativePeakRSS()
+			outputs = record.pop('outputs')
+			record['output_bytes'] = outputBytes(outputs) if not record['error'] else 0
+			self.stages.append(record)
+
+	# Record a converted file, with the CPU time in seconds and peak memory in bytes of the process
+	# that converted it, if known
+	def addFile(self, stage, src, out, wall, cpu=None, peakRSS=None, error=None):
+		with self.lock:
+			self.files.append({
+				'stage' : stage,
+				'src' : self.relPath(src),
+				'out' : self.relPath(out),
+				'wall' : round(wall, 3),
+				'cpu' : round(cpu, 3) if cpu is not None else None,
+				'peak_rss' : peakRSS,
+				'output_bytes' : os.path.getsize(out) if os.path.isfile(out) and not error else 0,
+				'error' : error
+			})
+
+	def relPath(self, filename):
+		return os.path.relpath(filename, self.root).replace('\\', '/') if self.root else filename
+
+	# Write the report as JSON
+	def write(self, filename):
+		if not os.path.exists(os.path.dirname(filename)):
+			os.makedirs(os.path.dirname(filename))
+
+		report = {
+			'started' : time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.start)),
+			'wall' : round(time.time() - self.start, 3),
+			'cpu' : round(cpuTime(), 3),
+			'stages' : self.stages,
+			'files' : sorted(self.files, key=lambda f: -f['wall'])
+		}
+		with open(filename, 'wb') as f:
+			f.write(json.dumps(report, indent=1, sort_keys=True, separators=(',', ': ')))
+
+	# Print the stages and the slowest files
+	def printSummary(self, slowest=10):
+		print '\n%-28s %9s %9s %13s %12s' % ('Stage', 'Wall (s)', 'CPU (s)', 'Peak RSS', 'Output')
+		for s in self.stages:
+			if s['peak_rss']:
+				rss = '%.1f MB' % (s['peak_rss'] / 1048576.0)
+			elif s['peak_rss_cumulative']:
+				rss = '%.1f MB*' % (s['peak_rss_cumulative'] / 1048576.0) # Peak since the build started
+			else:
+				rss = '-'
+			output = 'failed' if s['error'] else '%.1f KB' % (s['output_bytes'] / 1024.0)
+			print '%-28s %9.2f %9.2f %13s %12s' % (s['name'], s['wall'], s['cpu'], rss, output)
+		if any(not s['peak_rss'] and s['peak_rss_cumulative'] for s in self.stages):
+			print '* Peak since the build started, as memory cannot be sampled on this platform'
+
+		if self.files:
+			print '\nSlowest files:'
+			for f in sorted(self.files, key=lambda f: -f['wall'])[:slowest]:
+				print '%9.2fs %9.1f KB  %s' % (f['wall'], f['output_bytes'] / 1024.0, os.path.basename(f['out']))
@@ -1,14 +1,20 @@
 import os
+import re
 import sys
+import json
+import hashlib
+import time
+import argparse
+import itertools
 import subprocess
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 from os import path
 
-# Write to files
-def write_output(line, filename, mode='a'):
-	with open(filename,mode) as output:
-		line = line.encode('utf-8')
-		output.write('%s\n' % line)
-		output.close()
+import md_to_html
+import build_report
+import search_index
+import plugin_docs
 
 # Read file
 def read_file(filename):
@@ -23,123 +29,460 @@ def create_dir(dir):
 	if not path.exists(dir):
 		os.makedirs(dir)
 
-# Read first line of a file
-def read_first_line(filename):
-	with open(filename, 'r') as f:
-		first_line = f.readline()
-	return first_line
+HASHES = {} # File hashes by path, modification time and size
+
+# Hash the contents of a file, returning None if it does not exist
+# Hashes are remembered by modification time and size, so unchanged files are only read once when watching
+def hash_file(filename):
+	if not path.isfile(filename):
+		return None
+	stat = os.stat(filename)
+	key = (filename, stat.st_mtime, stat.st_size)
+	if key not in HASHES:
+		with open(filename, 'rb') as f:
+			HASHES[key] = hashlib.sha1(f.read()).hexdigest()
+	return HASHES[key]
+
+# Find the local images referenced by a markdown or HTML document
+def find_images(text, base_dir):
+	images = re.findall(r'!\[[^\]]*\]\(([^)\s]+)', text)
+	images += re.findall(r'<img[^>]*src="([^"]+)"', text)
+	return sorted(set(path.normpath(path.join(base_dir, i)) for i in images if ':' not in i))
+
+# Key used to identify a file in the manifest, relative to the repository root
+def manifest_key(filename):
+	return path.relpath(filename, MAIN_DIR).replace('\\', '/')
+
+# Hash of the inputs shared by every page: the styles and the converter itself
+def common_hash():
+	sha = hashlib.sha1()
+	header = path.join(STYLES_DIR, 'docHeader.html')
+	inputs = [converter, path.join(STYLES_DIR, 'base.css'), header] + find_images(read_file(header), STYLES_DIR)
+	for filename in inputs:
+		sha.update('%s:%s\n' % (manifest_key(filename), hash_file(filename)))
+	return sha.hexdigest()
+
+# Build a conversion job for a markdown file, hashing everything its output depends on
+# Markdown generated in memory is given with the folder its images are relative to, and the page title
+def conversion_job(src, out, options, stage, markdown=None, root=None, title=None):
+	text = read_file(src) if markdown is None else markdown
+	sha = hashlib.sha1()
+	sha.update('%s\n%s\n' % (COMMON_HASH, options))
+	if title is not None:
+		sha.update('%s\n' % title)
+	sha.update(hashlib.sha1(text).hexdigest())
+	for image in find_images(text, root or path.dirname(src)):
+		sha.update('\n%s:%s' % (manifest_key(image), hash_file(image)))
+		if args.images: # Optimised images depend on the optimiser options as well as the source
+			optimised = path.join(OPTIMISED_DIR, path.relpath(image, path.join(MAIN_DIR, 'private-docs', 'images')))
+			sha.update(':%s:%s' % (hash_file(optimised), hash_file(path.splitext(optimised)[0] + '.webp')))
+
+	if args.assets:
+		sha.update('\nassets')
+	if args.images:
+		sha.update('\nimages')
+
+	return {
+		'src' : src,
+		'out' : out,
+		'hash' : sha.hexdigest(),
+		'options' : options,
+		'stage' : stage,
+		'markdown' : markdown,
+		'root' : root,
+		'title' : title
+	}
+
+
+# Only keep jobs whose inputs have changed since the last build, or whose output is missing
+def outdated_jobs(jobs):
+	if args.force:
+		return jobs
+	return [j for j in jobs if manifest.get(manifest_key(j['out'])) != j['hash'] or not path.exists(j['out'])]
+
+# Record the successful jobs in the manifest
+def update_manifest(jobs, failed):
+	failed = [f[0]['out'] for f in failed]
+	for job in jobs:
+		if job['out'] not in failed:
+			manifest[manifest_key(job['out'])] = job['hash']
+
+# Write a generated markdown file only if its contents have changed
+def write_if_changed(text, filename):
+	text = text.encode('utf-8')
+	if path.isfile(filename) and read_file(filename) == text:
+		return False
+	with open(filename, 'wb') as f:
+		f.write(text)
+	return True
+
+# Remove generated pages in the output folders, or in the manifest, whose source no longer exists
+def remove_stale(outputs, folders):
+	outputs = set(manifest_key(o) for o in outputs)
+	stale = set(manifest)
+	for folder in folders:
+		if path.isdir(folder):
+			stale.update(manifest_key(path.join(folder, f)) for f in os.listdir(folder) if f.endswith('.html'))
+
+	for key in sorted(stale - outputs):
+		filename = path.join(MAIN_DIR, key)
+		if path.exists(filename):
+			print('Removing stale page:\t%s' % key)
+			os.remove(filename)
+		manifest.pop(key, None)
+
+# Remove files from the asset folder that are no longer referenced by any page
+def remove_unused_assets(outputs):
+	if not path.isdir(ASSETS_DIR):
+		return
 
-MAIN_DIR = path.join(path.abspath(path.dirname(sys.argv[0])), os.pardir)
+	used = set()
+	for out in outputs:
+		if path.isfile(out):
+			used.update(re.findall(r'assets/([0-9a-f]+(?:-\d+w)?\.\w+)', read_file(out)))
+
+	for asset in os.listdir(ASSETS_DIR):
+		if asset not in used:
+			os.remove(path.join(ASSETS_DIR, asset))
+
+# Run a single conversion job, returning the error message if it failed
+# Options use the md_to_html.py command line flags: -n turns off numbering and -c the contents sidebar
+# The time taken is recorded in the build report, with the CPU time and peak memory of Pandoc
+def run_job(job):
+	flags = job['options'].split()
+	start = time.time()
+	error = None
+	try:
+		if job['markdown'] is None:
+			CONVERTER.convert(job['src'], job['out'], numbered='-n' not in flags, contents='-c' not in flags)
+		else:
+			CONVERTER.convertText(job['markdown'], job['out'], job['root'], job['title'], numbered='-n' not in flags, contents='-c' not in flags, name=job['src'])
+	except md_to_html.ConversionError, err:
+		error = str(err)
+	cpu, peak = CONVERTER.lastUsage()
+	REPORT.addFile(job['stage'], job['src'], job['out'], time.time() - start, cpu, peak, error)
+	return job, error
+
+# Run a list of conversion jobs on a pool of workers, returning the jobs that failed
+# Progress is printed from the main thread so that parallel jobs do not interleave
+def run_jobs(jobs, workers):
+	failed = []
+	pool = ThreadPool(min(workers, max(len(jobs), 1))) if workers > 1 else None
+	try:
+		results = pool.imap_unordered(run_job, jobs) if pool else itertools.imap(run_job, jobs)
+		for job, error in results:
+			if error:
+				failed.append((job, error))
+			else:
+				print('Generated HTML file:\t%s' % path.basename(job['out']))
+	finally:
+		if pool:
+			pool.close()
+			pool.join()
+	return failed
+
+parser = argparse.ArgumentParser(description="Insights Documentation Generator")
+parser.add_argument('-j', '--jobs', action='store', type=int, default=1, help='Number of files to convert in parallel. Use 0 for one per CPU core.')
+parser.add_argument('-f', '--force', action='store_true', default=False, help='Rebuild every page, ignoring the build manifest.')
+parser.add_argument('-e', '--assets', action='store_true', default=True, help='Store images and CSS once in docs/assets instead of embedding them in every page. This is the default.')
+parser.add_argument('--embed', action='store_false', dest='assets', help='Embed images and CSS in every page, so each page is self-contained. Images are then neither lazy loaded nor offered in smaller sizes.')
+parser.add_argument('-i', '--images', action='store_true', default=False, help='Optimise the images with optimise_images.py and use those in the pages.')
+parser.add_argument('-w', '--max-width', action='store', type=int, default=0, help='Downscale optimised images wider than this many pixels.')
+parser.add_argument('--webp', action='store_true', default=False, help='Write WebP alternatives of the optimised images. Not used with --embed.')
+parser.add_argument('--watch', action='store_true', default=False, help='Keep running after the build, and rebuild the pages affected by each change to the sources.')
+parser.add_argument('-r', '--report', action='store', default=None, help='File to write the timing and resource report to. Defaults to private-docs/build/report.json.')
+args = parser.parse_args()
+
+WORKERS = args.jobs if args.jobs > 0 else multiprocessing.cpu_count()
+
+MAIN_DIR = path.normpath(path.join(path.abspath(path.dirname(sys.argv[0])), os.pardir))
 js1 = path.join(MAIN_DIR, 'js', 'obiee.js')
 js2 = path.join(MAIN_DIR, 'js', 'insights.js')
 js3 = path.join(MAIN_DIR, 'js', 'rmvpp.js')
 js4 = path.join(MAIN_DIR, 'js', 'config.js')
 opt = path.join(MAIN_DIR, 'docs', 'api')
-parsePlugins = path.join(MAIN_DIR, 'private-docs', 'parsePlugins.js')
+PLUGIN_METADATA = path.join(MAIN_DIR, 'private-docs', 'build', 'plugins.json')
 converter = path.join(MAIN_DIR, 'private-docs', 'md_to_html.py')
+STYLES_DIR = path.join(MAIN_DIR, 'private-docs', 'styles')
+MANIFEST = path.join(MAIN_DIR, 'private-docs', 'build', 'manifest.json')
+ASSETS_DIR = path.join(MAIN_DIR, 'docs', 'assets')
+SEARCH_DIR = path.join(MAIN_DIR, 'docs', 'search')
+OPTIMISED_DIR = path.join(MAIN_DIR, 'private-docs', 'build', 'images')
+REPORT_FILE = path.abspath(args.report) if args.report else path.join(MAIN_DIR, 'private-docs', 'build', 'report.json')
+
+# Hashes of the inputs used for each generated page in the last build
+if path.isfile(MANIFEST):
+	manifest = json.loads(read_file(MANIFEST))
+else:
+	manifest = {}
 
 jsdoc = "jsdoc %s %s  %s %s -d %s" % (js1, js2, js3, js4, opt)
-mod_doc = "python %s %s" % (path.join(MAIN_DIR, 'docs', 'api', 'scripts', 'mod_doc.py'), path.join(MAIN_DIR, 'docs', 'api'))
+mod_doc = 'python "%s" "%s" -j %d -s ../search/ -c "%s"' % (path.join(MAIN_DIR, 'docs', 'api', 'scripts', 'mod_doc.py'), path.join(MAIN_DIR, 'docs', 'api'), WORKERS, path.join(MAIN_DIR, 'private-docs', 'build', 'mod_doc'))
 
-print('\nGenerating general documentation...')
-MD_DIR = path.join(MAIN_DIR, 'private-docs', 'markdown')
-DOC_DIR = path.join(MAIN_DIR, 'docs')
+# Optimise images before converting the pages that use them
+def optimise_images():
+	print('\nOptimising images...')
+	optimise = 'python "%s" -o "%s" -w %d -j %d' % (path.join(MAIN_DIR, 'private-docs', 'optimise_images.py'), OPTIMISED_DIR, args.max_width, WORKERS)
+	if args.webp:
+		optimise += ' --webp'
+	with REPORT.stage('Image optimisation') as stage:
+		stage['outputs'] = [OPTIMISED_DIR]
+		return subprocess.call(optimise, shell=True) == 0
 
-# Reset index file
-index_file = path.join(MD_DIR, 'Index.md')
-write_output('% Documentation\n\n', index_file, 'wb')
+# Sort by the number before dash in the title
+def numeric_sort(x):
+	return int(x['file'].split(' - ')[0])
 
-docs, bugs, user, tuts = [], [], [], []
+# Convert the markdown pages and the index of them, returning the jobs and the output folders
+def build_general():
+	print('\nGenerating general documentation...')
+	docs, bugs, user, tuts = [], [], [], []
+	jobs, out_folders = [], []
 
-for root, subDirs, files in os.walk(MD_DIR):
-	folder = root.replace(MD_DIR+'/', '').replace(MD_DIR+'\\', '').replace(MD_DIR,'')
-	out_folder = path.join(DOC_DIR, folder)
-	create_dir(out_folder)
+	for root, subDirs, files in os.walk(MD_DIR):
+		folder = root.replace(MD_DIR+'/', '').replace(MD_DIR+'\\', '').replace(MD_DIR,'')
+		out_folder = path.join(DOC_DIR, folder)
+		create_dir(out_folder)
+		out_folders.append(out_folder)
 
-	for file in files:
-		if file.endswith('.md') and file != 'Index.md': # Convert if it's a markdown file
-			out_file = file.lower().replace(' ', '-').replace('.md', '.html')
-			if (folder):
-				link = folder.replace('\\','/') + '/' + out_file
-			else:
-				link = out_file
-
-			if (folder not in ['bugs', 'user', 'tutorials']):
-				docs.append({ 'file' : file.replace('.md', ''), 'link' : link})
-			elif folder == 'bugs':
-				bugs.append({'file' : file.replace('.md', ''), 'link' : link})
-			elif folder == 'user':
-				user.append({'file' : file.replace('.md', ''), 'link': link})
-			elif folder == 'tutorials':
-				tuts.append({'file' : file.replace('.md', ''), 'link': link})
-
-			if folder =='tutorials':
-				md_to_html = 'python "%s" "%s" -o "%s" -c' % (converter, path.join(root, file), path.join(out_folder, out_file))
+		for file in files:
+			if file.endswith('.md') and file != 'Index.md': # Convert if it's a markdown file
+				out_file = file.lower().replace(' ', '-').replace('.md', '.html')
+				if (folder):
+					link = folder.replace('\\','/') + '/' + out_file
+				else:
+					link = out_file
+
+				if (folder not in ['bugs', 'user', 'tutorials']):
+					docs.append({ 'file' : file.replace('.md', ''), 'link' : link})
+				elif folder == 'bugs':
+					bugs.append({'file' : file.replace('.md', ''), 'link' : link})
+				elif folder == 'user':
+					user.append({'file' : file.replace('.md', ''), 'link': link})
+				elif folder == 'tutorials':
+					tuts.append({'file' : file.replace('.md', ''), 'link': link})
+
+				if folder =='tutorials':
+					jobs.append(conversion_job(path.join(root, file), path.join(out_folder, out_file), '-c', 'General documentation'))
+				else:
+					jobs.append(conversion_job(path.join(root, file), path.join(out_folder, out_file), '', 'General documentation'))
+
+	user.append({'file' : 'Plugins', 'link' : 'plugins'})
+	docs.append({'file' : 'API Reference', 'link' : 'api'})
+
+	docs = sorted(docs)
+	bugs = sorted(bugs)
+	user = sorted(user)
+	tuts = sorted(tuts, key=numeric_sort)
+
+	# Index file is only rewritten when the list of pages changes
+	index = ['% Documentation\n\n']
+	for heading, section in [('User', user), ('Tutorials', tuts), ('Technical', docs), ('Bugs and Limitations', bugs)]:
+		index.append('\n### %s\n' % heading)
+		for doc in section:
+			index.append('* #### [%s](%s)' % (doc['file'], doc['link']))
+	write_if_changed(''.join('%s\n' % line for line in index), INDEX_FILE)
+
+	jobs.append(conversion_job(INDEX_FILE, path.join(DOC_DIR, 'index.html'), '-n -c', 'General documentation'))
+	todo = outdated_jobs(jobs)
+	print('%d of %d pages need converting.' % (len(todo), len(jobs)))
+	with REPORT.stage('General documentation') as stage:
+		stage['outputs'] = [j['out'] for j in todo]
+		failed = run_jobs(todo, WORKERS)
+	update_manifest(todo, failed)
+	failures.extend(failed)
+	return jobs, out_folders
+
+# Generate the API documentation with JSDoc and apply the Insights styling to it
+def build_api():
+	print('\nGenerating API documentation with JS Doc...')
+	with REPORT.stage('JSDoc') as stage:
+		stage['outputs'] = [opt]
+		if subprocess.call(jsdoc, shell=True) != 0: # JSDoc generation
+			stage['error'] = 'JSDoc failed'
+	with REPORT.stage('JSDoc post-processing') as stage:
+		stage['outputs'] = [opt]
+		if subprocess.call(mod_doc, shell=True) != 0: # Style the JS Doc
+			stage['error'] = 'Some pages could not be styled'
+
+# Generate plugin documentation for available plugins, returning the jobs and whether any plugins were found
+# The metadata of every plugin is extracted once, and the pages are rendered from it in memory
+def build_plugins():
+	print('\nCreating plugin documentation...')
+	with REPORT.stage('Plugin metadata') as stage:
+		stage['outputs'] = [PLUGIN_METADATA]
+		try:
+			metadata = plugin_docs.extractMetadata(PLUGIN_METADATA)
+		except plugin_docs.MetadataError, err:
+			print('Error: %s' % err)
+			metadata = {}
+
+	create_dir(PLUGINS_DIR)
+	root = path.join(MAIN_DIR, 'private-docs') # Plugin screenshots are in private-docs/images/plugins
+	jobs = []
+	for id in sorted(metadata):
+		src = path.join(MAIN_DIR, 'plugins', id, id + '.js')
+		title = plugin_docs.text(metadata[id]['displayName'])
+		jobs.append(conversion_job(src, path.join(PLUGINS_DIR, id + '.html'), '-n', 'Plugin documentation', plugin_docs.pluginMarkdown(id, metadata[id]), root, title))
+
+	# Generate plugin index file
+	jobs.append(conversion_job(PLUGIN_METADATA, path.join(PLUGINS_DIR, 'index.html'), '-n -c', 'Plugin documentation', plugin_docs.indexMarkdown(metadata), root, 'Plugin Index'))
+	todo = outdated_jobs(jobs)
+	print('%d of %d plugin pages need converting.' % (len(todo), len(jobs)))
+	with REPORT.stage('Plugin documentation') as stage:
+		stage['outputs'] = [j['out'] for j in todo]
+		failed = run_jobs(todo, WORKERS)
+	update_manifest(todo, failed)
+	failures.extend(failed)
+	return jobs, bool(metadata)
+
+# Remove pages whose source has gone, index the pages for searching and save the manifest for the next build
+def finish(general, plugins):
+	general_jobs, out_folders = general
+	plugin_jobs, found_plugins = plugins
+
+	# If no plugins were found, keep the existing plugin pages rather than deleting them
+	outputs = [j['out'] for j in general_jobs + plugin_jobs]
+	if found_plugins:
+		out_folders = out_folders + [PLUGINS_DIR]
+	else:
+		outputs += [path.join(MAIN_DIR, k) for k in manifest if k.startswith('docs/plugins/')]
+	remove_stale(outputs, out_folders)
+	if args.assets:
+		remove_unused_assets(outputs)
+
+	# Index the text of every page for the search box, once all of them are up to date
+	print('\nBuilding search index...')
+	with REPORT.stage('Search index') as stage:
+		stage['outputs'] = [SEARCH_DIR]
+		sections, shards = search_index.buildIndex(DOC_DIR, SEARCH_DIR, SEARCH_CACHE)
+	print('Indexed %d sections in %d shards.' % (sections, shards))
+	create_dir(path.dirname(MANIFEST))
+	with open(MANIFEST, 'wb') as f:
+		f.write(json.dumps(manifest, indent=1, sort_keys=True, separators=(',', ': ')))
+
+# Run the given stages of the build, reusing the results of the last build for the others
+# Returns the conversions that failed
+def build(stages, summary=True):
+	global REPORT, COMMON_HASH, CONVERTER
+	REPORT = build_report.BuildReport(MAIN_DIR)
+	COMMON_HASH = common_hash()
+	del failures[:]
+
+	if 'images' in stages and args.images and not optimise_images():
+		print('Error: Images could not be optimised.')
+		sys.exit(1)
+
+	# One converter for the whole build, so the stylesheet and header are only prepared once
+	CONVERTER = md_to_html.Converter(assets=ASSETS_DIR if args.assets else None, images=OPTIMISED_DIR if args.images else None, search=SEARCH_DIR)
+	try:
+		if 'general' in stages:
+			BUILT['general'] = build_general()
+		if 'api' in stages:
+			build_api()
+		if 'plugins' in stages:
+			BUILT['plugins'] = build_plugins()
+	finally:
+		CONVERTER.close()
+	finish(BUILT['general'], BUILT['plugins'])
+
+	# Write the timing report and show where the time went
+	REPORT.write(REPORT_FILE)
+	if summary:
+		REPORT.printSummary()
+		print('\nBuild report written to:\t%s' % REPORT_FILE)
+
+	# Report every failed conversion together once the build has finished
+	if failures:
+		print('\n%d file(s) failed to convert:' % len(failures))
+		for job, error in failures:
+			print('\n%s\n%s' % (job['src'], error.rstrip()))
+	return list(failures)
+
+# Modification times of the watched files, with the stages of the build that depend on each
+def watched_files():
+	files = {}
+	for target, extensions, stages in WATCHED:
+		if path.isfile(target):
+			found = [target]
+		else:
+			found = []
+			for root, subDirs, names in os.walk(target):
+				found += [path.join(root, n) for n in names if not extensions or path.splitext(n)[1].lower() in extensions]
+		for filename in found:
+			if filename == INDEX_FILE:
+				continue # Written by the build
+			try:
+				stat = os.stat(filename)
+			except OSError:
+				continue # Removed while walking
+			files[filename] = ((stat.st_mtime, stat.st_size), stages)
+	return files
+
+# Rebuild the affected parts of the documentation whenever a watched file changes
+def watch():
+	print('\nWatching for changes. Press Ctrl+C to stop.')
+	before = watched_files()
+	try:
+		while True:
+			time.sleep(WATCH_INTERVAL)
+			after = watched_files()
+			changed = [f for f in set(before) | set(after) if before.get(f, (None,))[0] != after.get(f, (None,))[0]]
+			if not changed:
+				continue
+
+			# Wait for editors to finish writing before building
+			time.sleep(WATCH_INTERVAL)
+			after = watched_files()
+			changed = [f for f in set(before) | set(after) if before.get(f, (None,))[0] != after.get(f, (None,))[0]]
+			stages = set()
+			for f in changed:
+				stages.update((after.get(f) or before.get(f))[1])
+
+			print('\nChanged: %s' % ', '.join(sorted(manifest_key(f) for f in changed)))
+			start = time.time()
+			try:
+				build(stages, summary=False)
+			except SystemExit: # The build has printed the reason
+				print('Rebuild failed. Waiting for the next change.')
+			except Exception as e:
+				print('Error: %s' % e)
+				print('Rebuild failed. Waiting for the next change.')
 			else:
-				md_to_html = 'python "%s" "%s" -o "%s"' % (converter, path.join(root, file), path.join(out_folder, out_file))
-			subprocess.call(md_to_html, shell=True)
+				print('Rebuilt %s in %.2fs.' % (', '.join(s for s in ALL_STAGES if s in stages), time.time() - start))
+			before = watched_files()
+	except KeyboardInterrupt:
+		print('\nStopped watching.')
 
-user.append({'file' : 'Plugins', 'link' : 'plugins'})
-docs.append({'file' : 'API Reference', 'link' : 'api'})
+MD_DIR = path.join(MAIN_DIR, 'private-docs', 'markdown')
+DOC_DIR = path.join(MAIN_DIR, 'docs')
+INDEX_FILE = path.join(MD_DIR, 'Index.md')
+PLUGINS_DIR = path.join(MAIN_DIR, 'docs', 'plugins')
+ALL_STAGES = ['images', 'general', 'api', 'plugins']
+WATCH_INTERVAL = 0.3 # Seconds between checks for changes
 
-# Sort by the number before dash in the title
-def numeric_sort(x):
-	return int(x['file'].split(' - ')[0])
+# What each watched file or folder (and file extensions in it) affects. Pages depend on their own markdown
+# and images through the hashes in the manifest, so only the pages whose inputs changed are converted again.
+WATCHED = [
+	(MD_DIR, ['.md'], ['general']),
+	(path.join(MAIN_DIR, 'private-docs', 'images'), None, ['images', 'general', 'plugins']),
+	(STYLES_DIR, None, ['general', 'plugins']),
+	(converter, None, ['general', 'plugins']),
+	(js1, None, ['api']), # Only the scripts documented by JSDoc
+	(js2, None, ['api']),
+	(js3, None, ['api']),
+	(js4, None, ['api']),
+	(path.join(MAIN_DIR, 'plugins'), ['.js'], ['plugins']),
+	(path.join(MAIN_DIR, 'private-docs', 'pluginMetadata.js'), None, ['plugins']),
+	(path.join(MAIN_DIR, 'private-docs', 'plugin_docs.py'), None, ['plugins'])
+]
+
+BUILT = {} # Jobs and output folders of the last build of the general and plugin pages
+SEARCH_CACHE = {} # Text of the indexed pages, kept between builds when watching
+failures = [] # Conversions that failed in the current build
 
-docs = sorted(docs)
-bugs = sorted(bugs)
-user = sorted(user)
-tuts = sorted(tuts, key=numeric_sort)
-
-write_output('\n### User\n', index_file)
-for doc in user:
-	string = '* #### [%s](%s)' % (doc['file'], doc['link'])
-	write_output(string, index_file)
-
-write_output('\n### Tutorials\n', index_file)
-for doc in tuts:
-	string = '* #### [%s](%s)' % (doc['file'], doc['link'])
-	write_output(string, index_file)
-
-write_output('\n### Technical\n', index_file)
-for doc in docs:
-	string = '* #### [%s](%s)' % (doc['file'], doc['link'])
-	write_output(string, index_file)
-
-write_output('\n### Bugs and Limitations\n', index_file)
-for doc in bugs:
-	string = '* #### [%s](%s)' % (doc['file'], doc['link'])
-	write_output(string, index_file)
-
-md_to_html = 'python "%s" "%s" -n -c -o %s' % (converter, index_file, path.join(MAIN_DIR, 'docs', 'index.html'))
-subprocess.call(md_to_html, shell=True)
-
-
-print('\nGenerating API documentation with JS Doc...')
-subprocess.call(jsdoc, shell=True) # JSDoc generation
-subprocess.call(mod_doc, shell=True) # Style the JS Doc
-
-# Generate plugin documentation for available plugins
-print('\nCreating plugin documentation...')
-subprocess.call(['node', parsePlugins], shell=True)
-plugins_dir = path.join(MAIN_DIR, 'docs', 'plugins')
-create_dir(plugins_dir)
-write_output('% Plugin Index\n\n', 'plugin-index.md', 'wb')
-for root, subDirs, files in os.walk(path.join(MAIN_DIR, 'plugins')):
-    if 'doc.md' in files: # If document found
-		src = path.join(root, 'doc.md')
-		out = path.join(MAIN_DIR, 'docs', 'plugins', path.basename(root) + '.html')
-
-		title = read_first_line(src)
-		link = '* #### [%s](%s)' % (title.replace('% ', ''), path.basename(root) + '.html')
-		write_output(link, 'plugin-index.md') # Write to index
-
-		script = "python %s %s -o %s -n" % (converter, src, out)
-		subprocess.call(script, shell=True)
-		os.remove(src)
-
-# Generate plugin index file
-script = "python %s %s -o %s -n -c" % (converter, 'plugin-index.md', path.join(plugins_dir, 'index.html'))
-subprocess.call(script, shell=True)
-os.remove('plugin-index.md')
-os.remove(path.join(MAIN_DIR, 'private-docs', 'temp.css'))
+failed = build(ALL_STAGES)
+if args.watch:
+	watch()
+elif failed:
+	sys.exit(1)
@@ -2,6 +2,12 @@
 #
 # Script to convert markdown to HTML and apply styling
 #
+# Can be run from the command line, or imported to convert many files in one process:
+#
+#	converter = Converter(numbered=False)
+#	converter.convert('page.md', 'page.html')
+#	converter.close()
+#
 # Prerequisites:
 #	Pandoc (http://johnmacfarlane.net/pandoc/)
 #
@@ -9,21 +15,18 @@
 # Standard python distribution libraries:
 import os, sys
 import re, argparse, mimetypes
-import tempfile, base64
-from glob import glob
-from subprocess import Popen, PIPE, STDOUT
+import tempfile, base64, hashlib, urllib, shutil, threading, struct
+from subprocess import Popen, PIPE
 
-# Context manager for changing the current working directory
-class cd:
-	def __init__(self, newPath):
-		self.newPath = newPath
+try:
+	from PIL import Image
+except ImportError:
+	Image = None # Smaller versions of images for srcset are only written if Pillow is installed
 
-	def __enter__(self):
-		self.savedPath = os.getcwd()
-		os.chdir(self.newPath)
-
-	def __exit__(self, etype, value, traceback):
-		os.chdir(self.savedPath)
+SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
+FONTS = 'Open+Sans Source+Sans+Pro'.split(' ')
+WIDTHS = [480, 960, 1440] # Widths of the smaller versions of images offered with srcset
+SIZES = '80vw' # Width of the page content, from base.css
 
 # Write to files
 def write_output(line, filename, mode='a'):
@@ -55,210 +58,407 @@ def delete_file(f):
 		print('Exception: %s' % err)
 		return False
 
-# Create all folders in a list
-def create_folders(folder_array):
-	for folder in (folder_array):
-		if not os.path.exists(folder):
-			if DEBUG:
-				print '\t\tCreating %s' % folder
-			os.makedirs(folder)
-
-def init():
-	global SCRIPT_DIR, CURRENT_DIR, OUTPUT_DIR, DIR
-	global SINGLE_FILE, MANUAL_OUTPUT
-	global CONTENTS, NUMBER_SECTIONS, MATHS
-	global CSS, HEADER, FONTS
-
-	SCRIPT_DIR = os.path.abspath(os.path.dirname(sys.argv[0]))
-	CURRENT_DIR = os.getcwd()
-	os.chdir(SCRIPT_DIR) # Change to script directory
-
-	parser = argparse.ArgumentParser(description="Rittman Mead Markdown to HTML Converter")
-	parser.add_argument('path', action='store', help='Argument of markdown file to convert.')
-	parser.add_argument('-a', '--all', action='store_true', default=False, help='Specifies a directory to search for documentation rather than a single file.')
-	parser.add_argument('-n', '--numbered', action='store_false', default=True, help='Turn off section numbering.')
-	parser.add_argument('-c', '--contents', action='store_false', default=True, help='Turn off content sidebar')
-	parser.add_argument('-o', '--output', action='store', help='Specifies output filename (or directory if used with -a).')
-	args = parser.parse_args()
-
-	DIR = os.path.join(CURRENT_DIR, args.path)
-
-	if args.all:
-		SINGLE_FILE = False
-	else:
-		SINGLE_FILE = True
-
-	DIR = os.path.join(CURRENT_DIR, args.path)
+# Raised when a markdown file cannot be converted
+class ConversionError(Exception):
+	pass
 
-	if args.output:
-		MANUAL_OUTPUT = True
-		OUTPUT_DIR = os.path.join(CURRENT_DIR, args.output)
-	else:
-		MANUAL_OUTPUT = False
-		OUTPUT_DIR = os.path.join(CURRENT_DIR, args.path)
-
-	CONTENTS = args.contents
-	NUMBER_SECTIONS = args.numbered
-	MATHS = False
-
-	# Use a temporary CSS file, which can be appended with modifications, so that style customisation easier
-	base_css = read_file(os.path.abspath(os.path.join('styles', 'base.css'))) # Baseline CSS
-	write_output(base_css, 'temp.css', 'wb')
+# Title of the page for a markdown file, taken from the first line of READMEs or the filename otherwise
+def pageTitle(filePath):
+	title = os.path.splitext(os.path.basename(filePath))[0]
+	if title.lower() == 'readme':
+		with open(filePath, 'r') as f:
+			title = f.readline().strip()
+			f.close()
+	return title
+
+# URL of an asset relative to the HTML page that uses it
+def assetURL(assetPath, htmlPath):
+	return os.path.relpath(assetPath, os.path.dirname(htmlPath)).replace(os.sep, '/')
+
+# Run a command, passing input on its stdin, returning its output, error log, exit code and resource usage.
+# The usage is read with os.wait4, so is that of the command alone, and is None where wait4 is not available.
+def runProcess(script, cwd, input):
+	p = Popen(script, cwd=cwd, stdin=PIPE, stdout=PIPE, stderr=PIPE)
+	if not hasattr(os, 'wait4'):
+		output, log = p.communicate(input)
+		return output, log, p.returncode, None
+
+	# Read both pipes while writing, so that neither fills up and blocks the process
+	output, log = [], []
+	readers = [threading.Thread(target=lambda f, buf: buf.append(f.read()), args=args) for args in [(p.stdout, output), (p.stderr, log)]]
+	for reader in readers:
+		reader.start()
+	try:
+		p.stdin.write(input)
+	except IOError:
+		pass # The process exited without reading all of its input, its log says why
+	p.stdin.close()
+	for reader in readers:
+		reader.join()
+	p.stdout.close()
+	p.stderr.close()
+
+	pid, status, usage = os.wait4(p.pid, 0)
+	p.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+	return output[0], log[0], p.returncode, usage
+
+# Read the width and height of a PNG, GIF or JPEG image from its header, returning None for other formats
+def imageSize(data):
+	if data[:8] == '\x89PNG\r\n\x1a\n' and data[12:16] == 'IHDR':
+		return struct.unpack('>II', data[16:24])
+	if data[:6] in ('GIF87a', 'GIF89a'):
+		return struct.unpack('<HH', data[6:10])
+	if data[:2] == '\xff\xd8':
+		i = 2
+		while i + 9 < len(data):
+			if data[i] != '\xff':
+				return None
+			marker = ord(data[i + 1])
+			if marker in (0xd8, 0x01) or 0xd0 <= marker <= 0xd7:
+				i += 2
+				continue
+			length = struct.unpack('>H', data[i + 2:i + 4])[0]
+			if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc): # Start of frame
+				height, width = struct.unpack('>HH', data[i + 5:i + 9])
+				return width, height
+			i += 2 + length
+	return None
+
+# Converts markdown files to styled HTML pages. Holds the conversion options so that a single
+# instance can convert any number of files, and does not change any global state.
+#
+# The stylesheet and header are prepared once, in a temporary folder unique to the converter,
+# and reused for every page. Pages can be converted from several threads at the same time.
+class Converter(object):
+	def __init__(self, numbered=True, contents=True, maths=False, css=None, header=None, fonts=FONTS, assets=None, images=None, pandoc='pandoc', search=None, widths=WIDTHS):
+		self.numbered = numbered
+		self.contents = contents
+		self.maths = maths
+		self.header = header if header is not None else os.path.join(SCRIPT_DIR, 'styles', 'docHeader.html')
+		self.fonts = fonts
+		self.assets = os.path.abspath(assets) if assets else None
+		self.images = os.path.abspath(images) if images else None
+		self.search = os.path.abspath(search) if search else None
+		self.widths = sorted(widths or [])
+		self.imageSizes = {} # Dimensions of image files, by path
+		self.pandoc = [pandoc] if isinstance(pandoc, basestring) else list(pandoc) # Command used to run Pandoc
+		self.tempDir = tempfile.mkdtemp(prefix='md_to_html-')
+
+		# Use a temporary CSS file, which can be appended with modifications, so that style customisation easier
+		base_css = read_file(css or os.path.join(SCRIPT_DIR, 'styles', 'base.css')) # Baseline CSS
+		self.css = os.path.join(self.tempDir, 'styles.css')
+		write_output(base_css, self.css, 'wb')
+
+		# Use to apply a custom skin to the documentation
+		# custom_css = read_file(os.path.join(SCRIPT_DIR, 'rm.css'))
+		# write_output(custom_css, self.css)
+
+		if self.assets:
+			self.cssAsset = self.storeAsset(self.css)
+
+		# Processed header files, by the path from the page to the asset folder
+		self.headerHTML = read_file(self.header) if self.header else None
+		self.headerFiles = {}
+		self.headerLock = threading.Lock()
+		self.usage = threading.local() # Resource usage of the last Pandoc process run by each thread
+
+	# Remove the temporary files used by the converter
+	def close(self):
+		shutil.rmtree(self.tempDir, ignore_errors=True)
 
-	# Use to apply a custom skin to the documentation
-	# custom_css = read_file(os.path.abspath("rm.css"))
-	# write_output(custom_css, 'temp.css')
+	def __enter__(self):
+		return self
 
-	CSS = os.path.abspath('temp.css')
-	HEADER = os.path.abspath(os.path.join('styles', 'docHeader.html'))
-	FONTS = 'Open+Sans Source+Sans+Pro'.split(' ')
+	def __exit__(self, etype, value, traceback):
+		self.close()
+
+	# Convert a markdown file to an HTML page, raising ConversionError if it fails
+	# Section numbering and the contents sidebar can be overridden for a single page
+	def convert(self, markdownFile, htmlPath, title=None, numbered=None, contents=None):
+		markdownFile = os.path.abspath(markdownFile)
+		if title is None:
+			title = pageTitle(markdownFile)
+		return self.convertText(read_file(markdownFile), htmlPath, os.path.dirname(markdownFile), title, numbered, contents, markdownFile)
+
+	# Convert markdown held in memory. Images and links are relative to the root folder.
+	def convertText(self, markdown, htmlPath, root, title, numbered=None, contents=None, name=None):
+		numbered = self.numbered if numbered is None else numbered
+		contents = self.contents if contents is None else contents
+		htmlPath = os.path.abspath(htmlPath)
+		root = os.path.abspath(root)
+
+		if not os.path.exists(os.path.dirname(htmlPath)):
+			os.makedirs(os.path.dirname(htmlPath))
+
+		html = self.convertMD(root, markdown, name or htmlPath, htmlPath, numbered, contents)
+
+		# Apply every transform in memory and write the page once
+		if self.assets:
+			html = self.externalImages(html, root, htmlPath)
+		html = self.responsiveImages(html, htmlPath)
+		html = self.postProcess(html, title, contents, assetURL(self.search, htmlPath) + '/' if self.search else None)
+		with open(htmlPath, 'wb') as f:
+			f.write(html)
+			f.close()
+		return htmlPath
 
-def setupFolders():
-	if not os.path.exists(OUTPUT_DIR) and not MANUAL_OUTPUT:
-		os.makedirs(OUTPUT_DIR)
+	# Apply styling and navigation to the HTML produced by Pandoc
+	# The search box uses the index in the search folder, at the given URL, if there is one
+	def postProcess(self, html, title, contents, search=None):
+		html = updateTitle(html, title)
+		html = self.fontLinks(html)
+		if contents:
+			if not self.maths:
+				html = includeJS(html, ['jQuery'])
+			html = addContentsNav(html, search)
+		if self.maths:
+			html = includeJS(html, ['MathJax'])
+			html = html.replace('</body>', '<script>$(".math").each(function() { var next = $(this).next(); if (next.prop("tagName") == "BR") {next.remove(); $(this).prev().remove();}});</script></body>')
+		return html
+
+	# Update HTML images with binary equivalent
+	def imageToBinary(self, html):
+		images = re.findall('<img.*\/>', html)
+		for i in images:
+			source = re.search('src="(.*?)"', i)
+			if source:
+				imagePath = os.path.join(os.path.dirname(self.header), source.group(1))
+				if not os.path.exists(imagePath):
+					raise ConversionError('Image file in header cannot be found: %s' % imagePath)
 
-# Traverse directory structure
-def convertFile(root, file):
-	if SINGLE_FILE:
-		regEx = '(.*)\..*$'
-	else:
-		regEx = '(.*)\.md$'
-
-	md = re.search(regEx, file, re.IGNORECASE)
-	if md:
-		filePath = os.path.join(root, file)
-		if md.group(1).lower() == 'readme':
-			with open(filePath, 'r') as f:
-				title = f.readline().strip()
-				f.close()
-		else:
-			title = md.group(1)
-
-		htmlPath = convertMD(root, filePath, title)
-		if htmlPath:
-			updateTitle(htmlPath, title)
-			fontLinks(htmlPath)
-			if CONTENTS:
-				if not MATHS:
-					includeJS(htmlPath, ['jQuery'])
-				addContentsNav(htmlPath)
-			if MATHS:
-				includeJS(htmlPath, ['MathJax'])
-				replaceHTML(htmlPath, '<script>$(".math").each(function() { var next = $(this).next(); if (next.prop("tagName") == "BR") {next.remove(); $(this).prev().remove();}});</script></body>', '</body>')
-
-
-# Update HTML images with binary equivalent
-def imageToBinary(html):
-	images = re.findall('<img.*\/>', html)
-	for i in images:
-		source = re.search('src="(.*?)"', i)
-		if source:
-			imagePath = os.path.join(os.path.dirname(HEADER), source.group(1))
-			if os.path.exists(imagePath):
 				mimeType = mimetypes.guess_type(imagePath)
 				with open(imagePath, 'rb') as f:
 					f.seek(0)
 					image64 = base64.b64encode(f.read())
 				newTag = re.sub('src="(.*?)"', 'src="data:%s;base64,%s"' % (mimeType[0], image64), i)
-			else:
-				print 'Error: Image file in header cannot be found: %s\n' % imagePath
-				sys.exit(1)
-
-		if newTag:
-			html = html.replace(i, newTag)
-	return html
-
-# Call Pandoc to convert Markdown file
-def convertMD(root, markdownFile, title):
-	pandocLog=tempfile.NamedTemporaryFile()
-
-	relDir = os.path.dirname(os.path.relpath(markdownFile, DIR)).lower()
-
-	if MANUAL_OUTPUT:
-		if SINGLE_FILE:
-			htmlFile = OUTPUT_DIR
-			htmlPath = OUTPUT_DIR
-		else:
-			htmlFile = os.path.join(OUTPUT_DIR, title.lower().replace(' ', '-') + '.html')
-			htmlPath = os.path.join(OUTPUT_DIR, htmlFile)
-			create_folders([os.path.dirname(htmlPath)])
-	else:
-		htmlFile = os.path.join(root, title.lower().replace(' ', '-') + '.html')
-		htmlPath = os.path.join(OUTPUT_DIR, htmlFile)
-		create_folders([os.path.dirname(htmlPath)])
+				html = html.replace(i, newTag)
+		return html
 
-	script = ['pandoc', '-s', markdownFile, '-o', htmlPath]
-
-	if CSS:
-		script.append('-c')
-		script.append(CSS)
-	if NUMBER_SECTIONS:
-		script.append('--number-sections')
-	if CONTENTS:
-		script.append('--toc')
-	if HEADER:
-		with open(HEADER, 'r') as f:
-			f.seek(0)
-			headerHTML = f.read()
-
-		headerHTML = imageToBinary(headerHTML)
-
-		tempHeader = os.path.join(os.path.dirname(HEADER), 'tempHeader.html')
-		with open(tempHeader, 'w') as f:
-			f.write(headerHTML)
+	# Copy a file into the asset folder, named by the hash of its contents so each file is only stored once
+	def storeAsset(self, filePath):
+		with open(filePath, 'rb') as f:
+			data = f.read()
 			f.close()
 
-		script.append('-B')
-		script.append(tempHeader)
-	else:
-		tempHeader = None
-
-	script.append('--self-contained')
-	script.append('--highlight-style=haddock')
-
-	print 'Generating HTML file:\t%s...' % os.path.basename(htmlFile)
+		name = hashlib.sha1(data).hexdigest()[:20] + os.path.splitext(filePath)[1].lower()
+		assetPath = os.path.join(self.assets, name)
+		if not os.path.exists(assetPath):
+			try:
+				os.makedirs(self.assets)
+			except OSError:
+				pass # Already exists
+
+			# Write to a temporary file first, as another conversion may be storing the same asset
+			fd, tempPath = tempfile.mkstemp(dir=self.assets)
+			with os.fdopen(fd, 'wb') as f:
+				f.write(data)
+				f.close()
+			try:
+				os.rename(tempPath, assetPath)
+			except OSError:
+				delete_file(tempPath)
+		return assetPath
+
+	# Update HTML images to reference the shared asset folder
+	def externalImages(self, html, imageDir, htmlPath):
+		def replaceImage(match):
+			tag = match.group(0)
+			source = re.search('src="(.*?)"', tag)
+			if not source or ':' in source.group(1):
+				return tag # Remote or data URI
+
+			src = urllib.unquote(source.group(1))
+			if os.path.abspath(os.path.join(os.path.dirname(htmlPath), src)).startswith(self.assets + os.sep):
+				return tag # Already in the asset folder
+
+			imagePath = os.path.join(imageDir, src)
+			if not os.path.exists(imagePath):
+				print 'Warning: Image file cannot be found: %s' % imagePath
+				return tag
+
+			url = assetURL(self.storeAsset(imagePath), htmlPath)
+			tag = tag.replace(source.group(0), 'src="%s"' % url)
+
+			# Offer the WebP alternative written by the image optimiser to browsers that support it
+			webp = os.path.splitext(imagePath)[0] + '.webp'
+			if self.images and os.path.exists(webp):
+				tag = '<picture><source srcset="%s" type="image/webp" />%s</picture>' % (assetURL(self.storeAsset(webp), htmlPath), tag)
+			return tag
+
+		return re.sub('<img[^>]*>', replaceImage, html)
+
+	# Dimensions of an image file, read once
+	def fileImageSize(self, imagePath):
+		if imagePath not in self.imageSizes:
+			with open(imagePath, 'rb') as f:
+				self.imageSizes[imagePath] = imageSize(f.read(65536)) # Headers are at the start of the file
+				f.close()
+		return self.imageSizes[imagePath]
+
+	# Smaller versions of an image in the asset folder, for each width narrower than the image
+	# Each is written once, named after the asset, so other pages using the image share them
+	def imageVariants(self, assetPath, width):
+		variants = []
+		if not Image:
+			return variants
+
+		name, ext = os.path.splitext(assetPath)
+		for w in [w for w in self.widths if w < width]:
+			variantPath = '%s-%dw%s' % (name, w, ext)
+			if not os.path.exists(variantPath):
+				img = Image.open(assetPath)
+				if getattr(img, 'is_animated', False):
+					return [] # Resizing would lose the animation
+				if img.mode not in ('RGB', 'RGBA'):
+					img = img.convert('RGB' if ext in ('.jpg', '.jpeg') else 'RGBA')
+				img = img.resize((w, int(round(img.size[1] * w / float(img.size[0])))), Image.LANCZOS)
+
+				# Write to a temporary file first, as another conversion may be writing the same variant
+				fd, tempPath = tempfile.mkstemp(dir=self.assets, suffix=ext)
+				os.close(fd)
+				img.save(tempPath, optimize=True)
+				try:
+					os.rename(tempPath, variantPath)
+				except OSError:
+					delete_file(tempPath)
+			variants.append((variantPath, w))
+		return variants
+
+	# Give images their dimensions, so the layout does not move as they load, and lazy load all but the
+	# first, so the page can be shown before images further down have loaded. Images in the asset folder
+	# also offer smaller versions with srcset. Images embedded as data URIs arrive with the page, so
+	# lazy loading and smaller versions need an asset folder (-e).
+	def responsiveImages(self, html, htmlPath):
+		first = [True]
+		def replaceImage(match):
+			tag = match.group(0)
+			source = re.search('src="(.*?)"', tag)
+			if not source:
+				return tag
+
+			src, size, variants = source.group(1), None, []
+			if src.startswith('data:'):
+				data = src.split(',', 1)[1]
+				size = imageSize(base64.b64decode(data[:87384])) or imageSize(base64.b64decode(data))
+			elif ':' not in src:
+				imagePath = os.path.abspath(os.path.join(os.path.dirname(htmlPath), urllib.unquote(src)))
+				if os.path.exists(imagePath):
+					size = self.fileImageSize(imagePath)
+					if size and self.assets and imagePath.startswith(self.assets + os.sep):
+						variants = self.imageVariants(imagePath, size[0])
+
+			attributes = ''
+			if size and 'width=' not in tag and 'height=' not in tag:
+				attributes += ' width="%d" height="%d"' % size
+			if variants:
+				srcset = ['%s %dw' % (assetURL(path, htmlPath), w) for path, w in variants] + ['%s %dw' % (src, size[0])]
+				attributes += ' srcset="%s" sizes="%s"' % (', '.join(srcset), SIZES)
+			if not first[0] and 'loading=' not in tag and not src.startswith('data:'):
+				attributes += ' loading="lazy"'
+			attributes += ' decoding="async"' if 'decoding=' not in tag else ''
+			first[0] = False
+			return tag.replace('<img', '<img' + attributes, 1)
+
+		return re.sub('<img[^>]*>', replaceImage, html)
+
+	# Optimised version of an image in the images folder, if there is one
+	def optimisedImage(self, imagePath):
+		rel = os.path.relpath(os.path.abspath(imagePath), os.path.join(SCRIPT_DIR, 'images'))
+		optimised = os.path.join(self.images, rel)
+		if not rel.startswith(os.pardir) and os.path.exists(optimised):
+			return optimised
+		return None
+
+	# Point the images in a markdown document at their optimised versions
+	def optimisedMarkdown(self, markdown, root):
+		def replaceImage(match):
+			optimised = self.optimisedImage(os.path.join(root, urllib.unquote(match.group(2))))
+			if optimised:
+				return '%s(%s' % (match.group(1), optimised.replace(os.sep, '/'))
+			return match.group(0)
+
+		return re.sub(r'(!\[[^\]]*\])\(([^)\s]+)', replaceImage, markdown)
+
+	# Header file to pass to Pandoc, processed the first time it is needed
+	# Header images link to the asset folder relative to the page, so pages in different folders get their own copy
+	def headerFile(self, htmlPath):
+		key = os.path.relpath(self.assets, os.path.dirname(htmlPath)) if self.assets else ''
+		with self.headerLock:
+			if key not in self.headerFiles:
+				if self.assets:
+					headerHTML = self.externalImages(self.headerHTML, os.path.dirname(self.header), htmlPath)
+				else:
+					headerHTML = self.imageToBinary(self.headerHTML)
+
+				fd, tempHeader = tempfile.mkstemp(prefix='header', suffix='.html', dir=self.tempDir)
+				with os.fdopen(fd, 'w') as f:
+					f.write(headerHTML)
+					f.close()
+				self.headerFiles[key] = tempHeader
+			return self.headerFiles[key]
+
+	# Call Pandoc to convert markdown, passed on its input pipe, reading the HTML from its output pipe
+	def convertMD(self, root, markdown, name, htmlPath, numbered, contents):
+		if self.images:
+			markdown = self.optimisedMarkdown(markdown, root)
+		script = self.pandoc + ['-s']
 
-	with cd(root):
-		if sys.platform == 'darwin':
-			sh = False
+		script.append('-c')
+		if self.assets:
+			script.append(assetURL(self.cssAsset, htmlPath))
 		else:
-			sh = True
-
-		p = Popen(script, shell=sh, stdout=pandocLog, stderr=STDOUT)
-		p.wait()
-		returnCode = p.returncode
-
-	if tempHeader:
-		delete_file(tempHeader)
-
-	if returnCode == 0:
-		return htmlPath
-	else:
-		print 'Error:\tMarkdown file could not be converted:\t%s' % markdownFile
-		pandocLog.seek(0)
-		print pandocLog.read()
-		return False
+			script.append(self.css)
+		if numbered:
+			script.append('--number-sections')
+		if contents:
+			script.append('--toc')
+		if self.header:
+			script.append('-B')
+			script.append(self.headerFile(htmlPath))
+
+		if not self.assets:
+			script.append('--self-contained')
+		script.append('--highlight-style=haddock')
+
+		self.usage.pandoc = None
+		try:
+			html, log, returncode, self.usage.pandoc = runProcess(script, root, markdown)
+		except OSError, err:
+			raise ConversionError('Could not run Pandoc: %s' % err)
+
+		if returncode != 0:
+			raise ConversionError('Markdown file could not be converted:\t%s\n%s' % (name, log))
+		return html
+
+	# CPU time in seconds and peak memory in bytes of the last Pandoc process run by this thread,
+	# or None for each if they are not known
+	def lastUsage(self):
+		usage = getattr(self.usage, 'pandoc', None)
+		if not usage:
+			return None, None
+		return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+	# Insert Google API font links for fonts specified
+	def fontLinks(self, html):
+		metaTag = '<meta name="generator" content="pandoc" />'
+		fontHTML = metaTag
+		for f in self.fonts:
+			fontRef = f.replace(' ', '+')
+			fontRef = fontRef + ':300,400,400italic,700italic,700'
+			fontHTML = fontHTML + '\n<link rel="stylesheet" type="text/css" href="https://fonts.googleapis.com/css?family=%s">' % fontRef
+
+		if len(self.fonts) > 0:
+			html = html.replace(metaTag, fontHTML)
+		return html
 
 # Update title
-def updateTitle(htmlFile, title):
+def updateTitle(html, title):
 	tag = '<title></title>'
 	newTag = '<title>%s</title>' % title
-	replaceHTML(htmlFile, newTag, tag)
-
-# Insert Google API font links for fonts specified
-def fontLinks(htmlFile):
-	metaTag = '<meta name="generator" content="pandoc" />'
-	fontHTML = metaTag
-	for f in FONTS:
-		fontRef = f.replace(' ', '+')
-		fontRef = fontRef + ':300,400,400italic,700italic,700'
-		fontHTML = fontHTML + '\n<link rel="stylesheet" type="text/css" href="https://fonts.googleapis.com/css?family=%s">' % fontRef
-
-	if len(FONTS) > 0:
-		replaceHTML(htmlFile, fontHTML, metaTag)
+	return html.replace(tag, newTag)
 
 # Include JS files if necessary
-def includeJS(htmlFile, js):
+def includeJS(html, js):
 	metaTag = '<meta name="generator" content="pandoc" />'
 	jsHTML = metaTag
 
@@ -270,22 +470,12 @@ def includeJS(htmlFile, js):
 	if ('MathJax' in js):
 		jsHTML = jsHTML + '\n<script src="https://cdn.mathjax.org/mathjax/latest/MathJax.js?config=TeX-AMS_HTML"></script>'
 
-	replaceHTML(htmlFile, jsHTML, metaTag)
-
-# Update HTML by replacing a known tag
-def replaceHTML(htmlFile, newHTML, oldHTML):
-	with open(htmlFile, 'r+') as f:
-		f.seek(0)
-		html = f.read()
-		html = html.replace(oldHTML, newHTML)
-		f.close()
-
-	with open(htmlFile, 'w') as f:
-		f.write(html)
-		f.close()
+	return html.replace(metaTag, jsHTML)
 
 # Add JS to control collapsible contents bar
-def addContentsNav(htmlFile):
+# If the URL of the search folder is given, the search box uses the full-text index (see search_index.py),
+# otherwise it filters the contents links
+def addContentsNav(html, search=None):
 
 	placeHolder = 'function loadFunc() {' # Use load function for post processing
 	js = placeHolder + '\n\t\t\tvar toggled = false;';
@@ -333,18 +523,19 @@ def addContentsNav(htmlFile):
 	js = js + '\n\t\t\t});'
 
 	# Implement Search Bar
-	js = js + '\n\n\t\t\t$(".navbar .search input").keyup(function() {'
-	js = js + '\n\t\t\t\texpandAll();'
-	js = js + '\n\t\t\t\tvar val = $(this).val().toLowerCase();'
-	js = js + '\n\t\t\t\t$(".navbar a").each(function() {'
-	js = js + '\n\t\t\t\t\tvar link = $(this).text().toLowerCase();'
-	js = js + '\n\t\t\t\t\tif (link.indexOf(val) >= 0) {'
-	js = js + '\n\t\t\t\t\t\t$(this).show(); $(this).prev().show();'
-	js = js + '\n\t\t\t\t\t} else {'
-	js = js + '\n\t\t\t\t\t\t$(this).hide(); $(this).prev().hide();'
-	js = js + '\n\t\t\t\t\t}'
-	js = js + '\n\t\t\t\t});'
-	js = js + '\n\t\t\t});'
+	if not search:
+		js = js + '\n\n\t\t\t$(".navbar .search input").keyup(function() {'
+		js = js + '\n\t\t\t\texpandAll();'
+		js = js + '\n\t\t\t\tvar val = $(this).val().toLowerCase();'
+		js = js + '\n\t\t\t\t$(".navbar a").each(function() {'
+		js = js + '\n\t\t\t\t\tvar link = $(this).text().toLowerCase();'
+		js = js + '\n\t\t\t\t\tif (link.indexOf(val) >= 0) {'
+		js = js + '\n\t\t\t\t\t\t$(this).show(); $(this).prev().show();'
+		js = js + '\n\t\t\t\t\t} else {'
+		js = js + '\n\t\t\t\t\t\t$(this).hide(); $(this).prev().hide();'
+		js = js + '\n\t\t\t\t\t}'
+		js = js + '\n\t\t\t\t});'
+		js = js + '\n\t\t\t});'
 
 	# Expand/Collapse All functionality
 	js = js + '\n\n\t\t\tfunction toggleAll(el) {'
@@ -365,29 +556,63 @@ def addContentsNav(htmlFile):
 	js = js + '\n\t\t\t\t$("ul>li>.toggleList").text(\'-\').addClass(\'collapse\').nextUntil("ul").next().animate({height: \'show\'});'
 	js = js + '\n\t\t\t}'
 
-	replaceHTML(htmlFile, js, placeHolder)
+	html = html.replace(placeHolder, js)
 
 	placeHolder = '<div class="header_banner">'
 	htmlTags = '<div class="navbar_container">\n<div class="navbar"/>\n</div>'
 	htmlTags = htmlTags + '<div class="content_button">\n<div class="chevron">></div>\n</div>'
 	htmlTags = htmlTags + '\n' + placeHolder
 
-	replaceHTML(htmlFile, htmlTags, placeHolder)
-
-	replaceHTML(htmlFile, '<div class="canvas">\n<div id="TOC">', '<div id="TOC">')
-	replaceHTML(htmlFile, '</div>\n</body>', '</body>')
-
+	html = html.replace(placeHolder, htmlTags)
+	html = html.replace('<div id="TOC">', '<div class="canvas">\n<div id="TOC">')
+	if search:
+		html = html.replace('</body>', '</div>\n<script src="%ssearch.js" data-index="%s"></script>\n</body>' % (search, search))
+	else:
+		html = html.replace('</body>', '</div>\n</body>')
+	return html
 
-if __name__ == "__main__":
-	init()
-	setupFolders()
+def main():
+	parser = argparse.ArgumentParser(description="Rittman Mead Markdown to HTML Converter")
+	parser.add_argument('path', action='store', help='Argument of markdown file to convert.')
+	parser.add_argument('-a', '--all', action='store_true', default=False, help='Specifies a directory to search for documentation rather than a single file.')
+	parser.add_argument('-n', '--numbered', action='store_false', default=True, help='Turn off section numbering.')
+	parser.add_argument('-c', '--contents', action='store_false', default=True, help='Turn off content sidebar')
+	parser.add_argument('-o', '--output', action='store', help='Specifies output filename (or directory if used with -a).')
+	parser.add_argument('-e', '--assets', action='store', help='Write images and CSS to this shared asset folder, named by content hash, instead of embedding them in the page. Needed for images to be lazy loaded and offered in smaller sizes.')
+	parser.add_argument('-w', '--widths', action='store', type=int, nargs='*', default=WIDTHS, help='Widths of the smaller versions of images to write for srcset, used with -e. Needs Pillow.')
+	parser.add_argument('-s', '--search', action='store', help='Use the full-text search index in this folder (see search_index.py) for the search box.')
+	parser.add_argument('-i', '--images', action='store', help='Use the optimised images in this folder (see optimise_images.py) in place of those in images/.')
+	args = parser.parse_args()
 
-	if SINGLE_FILE:
-		convertFile(os.path.dirname(DIR), os.path.basename(DIR))
+	# Pairs of markdown files and the HTML files to write
+	files = []
+	path = os.path.abspath(args.path)
+	if args.all:
+		for root, subDirs, names in os.walk(path):
+			for name in names:
+				if re.search('\.md$', name, re.IGNORECASE):
+					filePath = os.path.join(root, name)
+					htmlFile = pageTitle(filePath).lower().replace(' ', '-') + '.html'
+					files.append((filePath, os.path.join(os.path.abspath(args.output) if args.output else root, htmlFile)))
+	elif args.output:
+		files.append((path, os.path.abspath(args.output)))
 	else:
-		for root, subDirs, files in os.walk(DIR):
-			for file in files:
-				convertFile(root, file)
+		files.append((path, os.path.join(os.path.dirname(path), pageTitle(path).lower().replace(' ', '-') + '.html')))
+
+	failed = False
+	with Converter(numbered=args.numbered, contents=args.contents, assets=args.assets, images=args.images, search=args.search, widths=args.widths) as converter:
+		for markdownFile, htmlFile in files:
+			print 'Generating HTML file:\t%s...' % os.path.basename(htmlFile)
+			try:
+				converter.convert(markdownFile, htmlFile)
+			except ConversionError, err:
+				print 'Error:\t%s' % err
+				failed = True
 
-		delete_file(CSS)
+	if args.all:
 		print '\nMarkdown Converter complete.\n'
+	if failed:
+		sys.exit(1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,179 @@
+#!/usr/bin/python
+#
+# Script to optimise documentation images before they are embedded in the generated pages
+#
+# PNGs are recompressed losslessly, screenshots wider than a maximum width can be downscaled
+# and WebP alternatives can be written alongside. Results are cached by the hash of the source
+# image, so unchanged images are never processed twice.
+#
+# Prerequisites:
+#	Pillow (https://python-pillow.org/)
+#
+
+# Standard python distribution libraries:
+import os, sys
+import json, shutil, hashlib, argparse
+import multiprocessing
+
+try:
+	from PIL import Image
+except ImportError:
+	print '\n\tError: Pillow is required to optimise images (pip install pillow). Exiting.'
+	sys.exit(1)
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(sys.argv[0]))
+IMAGE_TYPES = ['.png', '.gif', '.jpg', '.jpeg']
+
+# Hash the contents of a file
+def hashFile(filename):
+	with open(filename, 'rb') as f:
+		return hashlib.sha1(f.read()).hexdigest()
+
+# Format a number of bytes for the report
+def formatBytes(size):
+	for unit in ['B', 'KB', 'MB']:
+		if abs(size) < 1024 or unit == 'MB':
+			break
+		size = size / 1024.0
+	return '%.1f %s' % (size, unit)
+
+# Optimise a single image, returning its cache entry
+def optimiseImage(job):
+	src, out, options = job
+	ext = os.path.splitext(src)[1].lower()
+	img = Image.open(src)
+	animated = getattr(img, 'is_animated', False)
+
+	resized = False
+	if options['maxWidth'] and img.size[0] > options['maxWidth'] and not animated:
+		height = int(round(img.size[1] * options['maxWidth'] / float(img.size[0])))
+		img = img.resize((options['maxWidth'], height), Image.LANCZOS)
+		resized = True
+
+	# Animated GIFs are copied unchanged. Pillow writes every frame in full, so re-encoding them, resized or
+	# as animated WebP, gives files several times larger than GIF's frame differences.
+	if ext == '.png' or (resized and not animated):
+		if ext == '.png':
+			img.save(out, 'PNG', optimize=True)
+		elif ext == '.gif':
+			img.save(out, 'GIF', optimize=True)
+		else:
+			img.save(out, 'JPEG', quality=90, optimize=True)
+
+		# Keep the original if recompression or resizing did not make the file smaller
+		if os.path.getsize(out) >= os.path.getsize(src):
+			shutil.copyfile(src, out)
+	else:
+		shutil.copyfile(src, out)
+
+	entry = {
+		'hash' : options['hash'],
+		'options' : options['key'],
+		'before' : os.path.getsize(src),
+		'after' : os.path.getsize(out),
+		'webp' : None
+	}
+
+	webp = os.path.splitext(out)[0] + '.webp'
+	if os.path.exists(webp):
+		os.remove(webp)
+
+	if options['webp'] and not animated:
+		if img.mode not in ('RGB', 'RGBA'):
+			img = img.convert('RGBA')
+		img.save(webp, 'WEBP', lossless=(ext != '.jpg' and ext != '.jpeg'), quality=90, method=6)
+		if os.path.getsize(webp) < entry['after']:
+			entry['webp'] = os.path.getsize(webp)
+		else:
+			os.remove(webp) # Not worth offering
+
+	return src, entry
+
+# Print the before and after sizes, grouped by folder
+def printReport(cache):
+	folders = {}
+	for rel, entry in cache.items():
+		folder = os.path.dirname(rel) or '.'
+		totals = folders.setdefault(folder, [0, 0, 0, 0])
+		totals[0] += 1
+		totals[1] += entry['before']
+		totals[2] += entry['after']
+		totals[3] += entry['webp'] or 0
+
+	print '\n%-20s %8s %12s %12s %8s %12s' % ('Folder', 'Images', 'Before', 'After', 'Saved', 'WebP')
+	overall = [0, 0, 0, 0]
+	for folder in sorted(folders):
+		totals = folders[folder]
+		overall = [a + b for a, b in zip(overall, totals)]
+		saved = 100.0 * (totals[1] - totals[2]) / totals[1] if totals[1] else 0
+		print '%-20s %8d %12s %12s %7.1f%% %12s' % (folder, totals[0], formatBytes(totals[1]), formatBytes(totals[2]), saved, formatBytes(totals[3]))
+
+	saved = 100.0 * (overall[1] - overall[2]) / overall[1] if overall[1] else 0
+	print '%-20s %8d %12s %12s %7.1f%% %12s' % ('Total', overall[0], formatBytes(overall[1]), formatBytes(overall[2]), saved, formatBytes(overall[3]))
+
+def main():
+	parser = argparse.ArgumentParser(description="Rittman Mead Documentation Image Optimiser")
+	parser.add_argument('path', action='store', nargs='?', default=os.path.join(SCRIPT_DIR, 'images'), help='Directory of source images.')
+	parser.add_argument('-o', '--output', action='store', default=os.path.join(SCRIPT_DIR, 'build', 'images'), help='Directory to write optimised images to.')
+	parser.add_argument('-w', '--max-width', action='store', type=int, default=0, help='Downscale images wider than this many pixels. 0 keeps the original size.')
+	parser.add_argument('--webp', action='store_true', default=False, help='Also write a WebP alternative for each image.')
+	parser.add_argument('-j', '--jobs', action='store', type=int, default=0, help='Number of images to process in parallel. 0 uses one per CPU core.')
+	args = parser.parse_args()
+
+	srcDir = os.path.abspath(args.path)
+	outDir = os.path.abspath(args.output)
+	cacheFile = os.path.join(outDir, 'cache.json')
+	optionKey = 'w%d%s' % (args.max_width, '-webp' if args.webp else '')
+
+	if os.path.isfile(cacheFile):
+		with open(cacheFile, 'r') as f:
+			cache = json.load(f)
+	else:
+		cache = {}
+
+	# Find images that are new, changed or were processed with different options
+	jobs, found = [], set()
+	for root, subDirs, files in os.walk(srcDir):
+		for file in files:
+			if os.path.splitext(file)[1].lower() not in IMAGE_TYPES:
+				continue
+
+			src = os.path.join(root, file)
+			rel = os.path.relpath(src, srcDir).replace('\\', '/')
+			out = os.path.join(outDir, rel)
+			found.add(rel)
+
+			sha = hashFile(src)
+			entry = cache.get(rel)
+			if entry and entry['hash'] == sha and entry['options'] == optionKey and os.path.exists(out):
+				continue
+
+			if not os.path.exists(os.path.dirname(out)):
+				os.makedirs(os.path.dirname(out))
+			jobs.append((src, out, {'hash' : sha, 'key' : optionKey, 'maxWidth' : args.max_width, 'webp' : args.webp}))
+
+	print 'Optimising %d of %d images...' % (len(jobs), len(found))
+	if jobs:
+		pool = multiprocessing.Pool(args.jobs or None)
+		try:
+			for src, entry in pool.imap_unordered(optimiseImage, jobs):
+				cache[os.path.relpath(src, srcDir).replace('\\', '/')] = entry
+		finally:
+			pool.close()
+			pool.join()
+
+	# Forget images whose source has been removed
+	for rel in list(cache):
+		if rel not in found:
+			del cache[rel]
+			for out in [os.path.join(outDir, rel), os.path.splitext(os.path.join(outDir, rel))[0] + '.webp']:
+				if os.path.exists(out):
+					os.remove(out)
+
+	with open(cacheFile, 'wb') as f:
+		f.write(json.dumps(cache, indent=1, sort_keys=True, separators=(',', ': ')))
+
+	printReport(cache)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,46 @@
+// Extracts the documented properties of every plugin into a single JSON file, used by plugin_docs.py
+// to render the plugin documentation. Nothing is written into the plugin folders.
+//
+// Usage:
+//	node pluginMetadata.js [output.json]
+//
+// Writes to standard output if no file is given.
+
+var fs = require( 'fs' );
+var path = require( 'path' );
+
+var start = path.join(__dirname, '..', 'plugins');
+var properties = ['columnMappingParameters', 'configurationParameters', 'actions', 'reactions', 'specialCondFormats'];
+
+rmvpp = {};
+rmvpp.Plugins = {};
+
+fs.readdirSync(start).forEach(function(file) {
+	// Assume template file is the only one that does not follow the convention
+	var plugin = path.join(start, file, file + '.js');
+	if (file != 'template.js' && fs.existsSync(plugin)) {
+		require(plugin);
+	}
+});
+
+var metadata = {};
+for (var p in rmvpp.Plugins) {
+	var plugin = rmvpp.Plugins[p];
+	metadata[p] = {
+		displayName: plugin.displayName,
+		description: plugin.description,
+		icon: plugin.icon
+	};
+
+	// Functions in the parameters, such as render callbacks, are dropped when serialised
+	properties.forEach(function(property) {
+		metadata[p][property] = plugin[property] || [];
+	});
+}
+
+var json = JSON.stringify(metadata, null, 1);
+if (process.argv[2]) {
+	fs.writeFileSync(process.argv[2], json);
+} else {
+	process.stdout.write(json);
+}
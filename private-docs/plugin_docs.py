@@ -0,0 +1,163 @@
+#!/usr/bin/python
+#
+# Renders the plugin documentation from the metadata extracted by pluginMetadata.js
+#
+# The metadata of every plugin is read from one JSON file and each page, and the plugin index, is
+# rendered to markdown in memory. gendoc.py converts them with md_to_html.py, so nothing is written
+# into the plugin folders.
+#
+# Prerequisites:
+#	Node JS (https://nodejs.org/en/)
+#
+
+# Standard python distribution libraries:
+import os
+import re, json, subprocess
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
+EXTRACTOR = os.path.join(SCRIPT_DIR, 'pluginMetadata.js')
+
+class MetadataError(Exception):
+	pass
+
+# Run pluginMetadata.js, writing the metadata of every plugin to a JSON file, and return it
+def extractMetadata(output):
+	if not os.path.exists(os.path.dirname(output)):
+		os.makedirs(os.path.dirname(output))
+	try:
+		p = subprocess.Popen(['node', EXTRACTOR, output], stdin=open(os.devnull, 'rb'), stderr=subprocess.PIPE)
+		log = p.communicate()[1]
+	except OSError, err:
+		raise MetadataError('Could not run Node: %s' % err)
+	if p.returncode != 0:
+		raise MetadataError('Plugin metadata could not be extracted:\n%s' % log)
+	return loadMetadata(output)
+
+def loadMetadata(filename):
+	with open(filename, 'r') as f:
+		return json.load(f)
+
+# Format a property value as text for a table cell
+def text(value):
+	if value is None:
+		return ''
+	if isinstance(value, bool):
+		return 'true' if value else 'false'
+	if isinstance(value, list):
+		return ','.join(text(v) for v in value)
+	if isinstance(value, unicode):
+		return value.encode('utf-8')
+	return str(value)
+
+# Capitalise each word, as used for column and input types
+def properCase(value):
+	return re.sub(r'\w\S*', lambda m: m.group(0)[0].upper() + m.group(0)[1:].lower(), text(value))
+
+def boolToChar(value):
+	if value:
+		return '<i class="fa fa-check"></i>'
+	else:
+		return '<i class="fa fa-times"></i>'
+
+# HTML table with a heading row, and a row of cells for each item
+def table(headings, rows):
+	html = '<table><thead>%s</thead><tbody>' % ''.join('<th>%s</th>' % h for h in headings)
+	for row in rows:
+		html += '<tr>%s</tr>' % ''.join(row)
+	return html + '</tbody></table>\n\n'
+
+def cell(value, style=None):
+	if style:
+		return '<td style="%s">%s</td>' % (style, value)
+	return '<td>%s</td>' % value
+
+def code(value):
+	return '<code>%s</code>' % text(value)
+
+# Table of configuration options, for the plugin or a column
+def configTable(config):
+	rows = []
+	for conf in config:
+		default = (conf.get('inputOptions') or {}).get('defaultValue')
+		rows.append([
+			cell(text(conf.get('label')), 'white-space: nowrap;'),
+			cell(code(conf.get('targetProperty'))),
+			cell(properCase(conf.get('inputType'))),
+			cell(text(default)),
+			cell(text(conf.get('desc')))
+		])
+	return table(['Name', 'Property', 'Input Type', 'Default', 'Description'], rows)
+
+# Markdown page for a plugin. Images are relative to the private-docs folder.
+def pluginMarkdown(id, plugin):
+	doc = '%% %s\n\n' % text(plugin['displayName'])
+	doc += '%s\n\n' % text(plugin['description'])
+	doc += '![%s](images/plugins/%s.png)\n\n' % (text(plugin['displayName']), id)
+
+	doc += '## Column Mapping\n\n'
+	rows = []
+	for colMap in plugin['columnMappingParameters']:
+		rows.append([
+			cell(text(colMap.get('formLabel')), 'white-space: nowrap;'),
+			cell(code(colMap.get('targetProperty'))),
+			cell(properCase(colMap.get('type'))),
+			cell(boolToChar(colMap.get('multiple')), 'text-align: center;'),
+			cell(boolToChar(colMap.get('required')), 'text-align: center;'),
+			cell(boolToChar(colMap.get('conditionalFormat')), 'text-align: center;'),
+			cell(text(colMap.get('desc')))
+		])
+	doc += table(['Name', 'Property', 'Column Type', 'Multiple', 'Required', 'Format', 'Description'], rows)
+
+	for colMap in plugin['columnMappingParameters']:
+		if colMap.get('config'):
+			doc += '### `%s` Config Options\n\n' % text(colMap.get('targetProperty'))
+			doc += configTable(colMap['config'])
+
+	doc += '## Configuration\n\n'
+	doc += configTable(plugin['configurationParameters'])
+
+	if plugin['actions']:
+		doc += '## Actions\n\n'
+		rows = []
+		for action in plugin['actions']:
+			rows.append([
+				cell(text(action.get('name')), 'white-space: nowrap;'),
+				cell(code(action.get('trigger'))),
+				cell(properCase(action.get('type'))),
+				cell(code(action.get('output'))),
+				cell(text(action.get('description')))
+			])
+		doc += table(['Name', 'Event', 'Type', 'Columns', 'Description'], rows)
+
+	if plugin['specialCondFormats']:
+		doc += '## Conditional Formatting\n\n'
+		rows = []
+		for cf in plugin['specialCondFormats']:
+			rows.append([
+				cell(text(cf.get('name')), 'white-space: nowrap;'),
+				cell(code(cf.get('id'))),
+				cell(boolToChar(not cf.get('noValue')), 'text-align: center;'),
+				cell(text(cf.get('description')))
+			])
+		doc += table(['Name', 'ID', 'Require Value', 'Description'], rows)
+
+	if plugin['reactions']:
+		doc += '## Reactions\n\n'
+		rows = []
+		for reaction in plugin['reactions']:
+			rows.append([
+				cell(text(reaction.get('name')), 'white-space: nowrap;'),
+				cell(code(reaction.get('id'))),
+				cell(properCase(reaction.get('type'))),
+				cell(text(reaction.get('description')))
+			])
+		doc += table(['Name', 'ID', 'Type', 'Description'], rows)
+
+	return doc
+
+# Markdown index of the plugin pages, sorted by display name
+def indexMarkdown(metadata):
+	doc = '% Plugin Index\n\n'
+	for id in sorted(metadata, key=lambda id: text(metadata[id]['displayName']).lower()):
+		doc += '* #### [%s](%s.html)\n' % (text(metadata[id]['displayName']), id)
+	return doc
@@ -0,0 +1,202 @@
+/**
+	* Full-text search for the generated documentation.
+	* Searches the index written by search_index.py from the box in the contents sidebar. The index
+	* is only downloaded when the box is first used, and each search term only loads the shard of
+	* terms sharing its first two characters. If the index cannot be loaded, for instance when the
+	* pages are opened from the file system, the contents links on the page are filtered instead.
+	*
+	* Include with the URL of the search folder:
+	*	<script src="search/search.js" data-index="search/"></script>
+*/
+(function() {
+	var script = document.currentScript || document.scripts[document.scripts.length - 1];
+	var base = script.getAttribute('data-index') || script.src.replace(/search\.js(\?.*)?$/, '');
+	var root = base + '../'; // Page URLs in the index are relative to the documentation folder
+
+	var DELAY = 150, MAX_RESULTS = 25;
+	var index = null, indexRequest = null, failed = false;
+	var shards = {}, shardRequests = {}, timer = null, lastQuery = null;
+
+	// Request a JSON file, calling back with the parsed object or null if it could not be loaded
+	function getJSON(url, callback) {
+		var xhr = new XMLHttpRequest();
+		xhr.onreadystatechange = function() {
+			if (xhr.readyState == 4) {
+				var data = null;
+				if (xhr.status == 200 || (xhr.status == 0 && xhr.responseText)) {
+					try { data = JSON.parse(xhr.responseText); } catch (e) {}
+				}
+				callback(data);
+			}
+		};
+		try {
+			xhr.open('GET', url, true);
+			xhr.send();
+		} catch (e) {
+			callback(null);
+		}
+	}
+
+	// Load the index of pages and sections once, queueing callbacks while it downloads
+	function loadIndex(callback) {
+		if (index || failed) return callback();
+		if (indexRequest) return indexRequest.push(callback);
+		indexRequest = [callback];
+		getJSON(base + 'index.json', function(data) {
+			index = data;
+			failed = !data;
+			var callbacks = indexRequest;
+			indexRequest = null;
+			callbacks.forEach(function(c) { c(); });
+		});
+	}
+
+	// Shard holding a term, matching shardKey in search_index.py
+	function shardKey(term) {
+		return /^[a-z0-9]{2}/.test(term) ? term.substr(0, 2) : '_';
+	}
+
+	// Load the shard for a prefix once, queueing callbacks while it downloads
+	function loadShard(key, callback) {
+		if (key in shards) return callback();
+		if (shardRequests[key]) return shardRequests[key].push(callback);
+		shardRequests[key] = [callback];
+		getJSON(base + 'shards/' + key + '.json?v=' + index.version, function(data) {
+			shards[key] = data || {};
+			var callbacks = shardRequests[key];
+			delete shardRequests[key];
+			callbacks.forEach(function(c) { c(); });
+		});
+	}
+
+	// Load the shards needed for a list of terms, calling back once all have arrived
+	function loadShards(terms, callback) {
+		var keys = terms.map(shardKey).filter(function(key, i, all) {
+			return all.indexOf(key) == i && index.shards.indexOf(key) >= 0;
+		});
+		var pending = keys.length;
+		if (pending == 0) return callback();
+		keys.forEach(function(key) {
+			loadShard(key, function() {
+				if (--pending == 0) callback();
+			});
+		});
+	}
+
+	// Split a query into terms, as the index was built. Stop words are not indexed so are dropped,
+	// unless the query is only stop words, when the last may be the start of a longer word.
+	function queryTerms(query) {
+		var terms = (query.toLowerCase().match(/[\w\u00c0-\uffff]+/g) || []).filter(function(t) { return t.length > 1; });
+		var stopWords = index.stopWords || [];
+		var kept = terms.filter(function(t) { return stopWords.indexOf(t) < 0; });
+		return kept.length || !terms.length ? kept : terms.slice(-1);
+	}
+
+	// Score the sections matching every term. The last term also matches longer words beginning
+	// with it, so that results appear while a word is being typed.
+	function search(terms) {
+		var scores = null;
+		terms.forEach(function(term, i) {
+			var shard = shards[shardKey(term)] || {}, termScores = {};
+			for (var word in shard) {
+				var exact = word == term;
+				if (!exact && (i < terms.length - 1 || word.indexOf(term) != 0)) continue;
+				var postings = shard[word];
+				for (var p = 0; p < postings.length; p += 2) {
+					var weight = exact ? postings[p + 1] : postings[p + 1] / 2;
+					termScores[postings[p]] = (termScores[postings[p]] || 0) + weight;
+				}
+			}
+
+			if (scores === null) {
+				scores = termScores;
+			} else {
+				for (var id in scores) {
+					if (id in termScores) scores[id] += termScores[id];
+					else delete scores[id];
+				}
+			}
+		});
+
+		return Object.keys(scores || {}).map(function(id) { return { id: +id, score: scores[id] }; })
+			.sort(function(a, b) { return b.score - a.score || a.id - b.id; })
+			.slice(0, MAX_RESULTS);
+	}
+
+	// Results list shown under the search box
+	function resultsList(input) {
+		var box = input.parentNode, list = box.nextSibling;
+		if (!list || list.className != 'search-results') {
+			list = document.createElement('ul');
+			list.className = 'search-results';
+			box.parentNode.insertBefore(list, box.nextSibling);
+		}
+		return list;
+	}
+
+	function showResults(input, results, query) {
+		var list = resultsList(input);
+		list.innerHTML = '';
+		list.style.display = query ? '' : 'none';
+		if (query && results.length == 0) {
+			var empty = document.createElement('li');
+			empty.className = 'search-empty';
+			empty.textContent = 'No results';
+			list.appendChild(empty);
+		}
+
+		results.forEach(function(result) {
+			var section = index.sections[result.id], page = index.pages[section[0]];
+			var li = document.createElement('li'), a = document.createElement('a'), title = document.createElement('span');
+			a.href = root + page[0] + (section[1] ? '#' + section[1] : '');
+			title.className = 'search-page';
+			title.textContent = page[1];
+			a.appendChild(title);
+			a.appendChild(document.createTextNode(section[2] || page[1]));
+			li.appendChild(a);
+			list.appendChild(li);
+		});
+	}
+
+	// Fallback when there is no index: hide the contents links that do not match, in one pass
+	function filterContents(input, query) {
+		var links = document.querySelectorAll('.navbar li > a');
+		for (var i = 0; i < links.length; i++) {
+			var show = links[i].textContent.toLowerCase().indexOf(query) >= 0;
+			links[i].style.display = show ? '' : 'none';
+			var toggle = links[i].previousSibling;
+			if (toggle && toggle.nodeType == 1 && toggle.tagName == 'SPAN') toggle.style.display = show ? '' : 'none';
+		}
+	}
+
+	function run(input) {
+		var query = input.value.trim().toLowerCase();
+		if (query == lastQuery) return;
+		lastQuery = query;
+
+		loadIndex(function() {
+			if (failed) return filterContents(input, query);
+
+			var terms = queryTerms(query);
+			if (terms.length == 0) return showResults(input, [], '');
+			loadShards(terms, function() {
+				if (query == lastQuery) showResults(input, search(terms), query); // Ignore stale responses
+			});
+		});
+	}
+
+	// The search box is added to the page after it loads, so listen on the document
+	function isSearchBox(el) {
+		return el && el.tagName == 'INPUT' && el.parentNode && /(^|\s)search(\s|$)/.test(el.parentNode.className);
+	}
+
+	document.addEventListener('input', function(e) {
+		if (!isSearchBox(e.target)) return;
+		clearTimeout(timer);
+		timer = setTimeout(function() { run(e.target); }, DELAY);
+	}, true);
+
+	document.addEventListener('focus', function(e) {
+		if (isSearchBox(e.target)) loadIndex(function() {}); // Start downloading before the first key press
+	}, true);
+})();
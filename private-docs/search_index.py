@@ -0,0 +1,211 @@
+#!/usr/bin/python
+#
+# Script to build the full-text search index for the generated documentation
+#
+# Extracts the text of every page, split into sections at each heading with an id, and writes
+# an inverted index sharded by the first two characters of each term. The search box in the
+# pages (search.js) then only downloads the shards for the terms being searched for.
+#
+# Output, in the search folder:
+#	index.json		Pages and sections that results point to, the stop words and the index version
+#	shards/xx.json	Terms beginning with xx, each with a flat list of section ids and weights
+#	search.js		Client-side search, copied from this folder
+#
+# Can be run from the command line, or imported:
+#
+#	buildIndex('docs', 'docs/search')
+#
+
+# Standard python distribution libraries:
+import os, sys
+import re, json, hashlib, argparse
+from HTMLParser import HTMLParser
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
+SEARCH_JS = os.path.join(SCRIPT_DIR, 'search.js')
+
+# Elements whose text is not part of the page content
+SKIP_TAGS = set(['script', 'style', 'nav'])
+SKIP_CLASSES = set(['navbar_container', 'navbar', 'content_button', 'header_banner'])
+SKIP_IDS = set(['TOC'])
+HEADINGS = set(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+VOID_TAGS = set(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'])
+
+STOP_WORDS = set('an and are as at be by for from has in is it its of on or that the this to was were will with'.split(' '))
+HEADING_WEIGHT = 10 # Weight of a term in a section heading, compared to one in its text
+MAX_TERM = 40
+
+# Split text into index terms
+def terms(text):
+	return [t for t in re.findall(r'\w+', text.lower(), re.UNICODE) if 1 < len(t) <= MAX_TERM and t not in STOP_WORDS]
+
+# Shard holding a term. Terms not starting with two ASCII letters or digits share one shard.
+def shardKey(term):
+	return term[:2] if re.match(r'[a-z0-9]{2}', term) else '_'
+
+# Split a page into sections of text, each starting at a heading or section with an id
+class PageParser(HTMLParser):
+	def __init__(self):
+		HTMLParser.__init__(self)
+		self.title = ''
+		self.sections = [{'anchor' : '', 'heading' : '', 'text' : []}]
+		self.skipping = None # Tag and nesting depth of the element being skipped
+		self.inTitle = False
+		self.inHeading = False
+		self.anchor = '' # Id of the last section element, for headings without their own
+
+	def handle_starttag(self, tag, attrs):
+		if self.skipping:
+			if tag == self.skipping[0]:
+				self.skipping[1] += 1
+			return
+
+		attrs = dict(attrs)
+		if tag in SKIP_TAGS or attrs.get('id') in SKIP_IDS or SKIP_CLASSES.intersection((attrs.get('class') or '').split()):
+			if tag not in VOID_TAGS:
+				self.skipping = [tag, 1]
+			return
+
+		if tag == 'title':
+			self.inTitle = True
+		elif tag in HEADINGS:
+			self.sections.append({'anchor' : attrs.get('id') or self.anchor, 'heading' : '', 'text' : []})
+			self.inHeading = True
+		elif attrs.get('id') and 'section' in (attrs.get('class') or ''):
+			self.anchor = attrs['id']
+
+	def handle_endtag(self, tag):
+		if self.skipping:
+			if tag == self.skipping[0]:
+				self.skipping[1] -= 1
+				if self.skipping[1] == 0:
+					self.skipping = None
+			return
+
+		if tag == 'title':
+			self.inTitle = False
+		elif tag in HEADINGS:
+			self.inHeading = False
+
+	def handle_data(self, data):
+		if self.inTitle:
+			self.title += data
+		elif self.skipping:
+			return
+		elif self.inHeading:
+			self.sections[-1]['heading'] += data
+		else:
+			self.sections[-1]['text'].append(data)
+
+	def handle_entityref(self, name):
+		self.handle_data(self.unescape('&%s;' % name))
+
+	def handle_charref(self, name):
+		self.handle_data(self.unescape('&#%s;' % name))
+
+# Parse a page, returning its title and sections with the weight of each term
+def parsePage(filename):
+	with open(filename, 'rb') as f:
+		html = f.read().decode('utf-8', 'replace')
+
+	parser = PageParser()
+	parser.feed(html)
+	parser.close()
+
+	sections = []
+	for section in parser.sections:
+		heading = re.sub(r'\s+', ' ', section['heading']).strip()
+		weights = {}
+		for term in terms(heading):
+			weights[term] = weights.get(term, 0) + HEADING_WEIGHT
+		for term in terms(' '.join(section['text'])):
+			weights[term] = weights.get(term, 0) + 1
+		if weights:
+			sections.append((section['anchor'], heading, weights))
+	return parser.title.strip(), sections
+
+# Find the pages to index, skipping the search and asset folders and the JSDoc source listings
+def findPages(docDir, searchDir):
+	pages = []
+	for root, subDirs, files in os.walk(docDir):
+		subDirs[:] = sorted(d for d in subDirs if os.path.join(root, d) != searchDir and d not in ('assets', 'scripts', 'styles', 'fonts'))
+		for file in sorted(files):
+			if file.endswith('.html') and not file.endswith('.js.html'):
+				pages.append(os.path.join(root, file))
+	return pages
+
+# Write a file only if its contents have changed, so unchanged shards keep their timestamps
+def writeIfChanged(text, filename):
+	if os.path.isfile(filename):
+		with open(filename, 'rb') as f:
+			if f.read() == text:
+				return False
+	with open(filename, 'wb') as f:
+		f.write(text)
+	return True
+
+# Build the index for the pages in docDir, writing it to searchDir
+# Parsed pages are kept in the cache dictionary, if given, and reused while their file is unchanged
+# Returns the number of sections and shards written
+def buildIndex(docDir, searchDir, cache=None):
+	docDir = os.path.abspath(docDir)
+	searchDir = os.path.abspath(searchDir)
+	shardDir = os.path.join(searchDir, 'shards')
+	if not os.path.exists(shardDir):
+		os.makedirs(shardDir)
+
+	pages, sections, postings = [], [], {}
+	for filename in findPages(docDir, searchDir):
+		if cache is None:
+			title, pageSections = parsePage(filename)
+		else:
+			stat = os.stat(filename)
+			stamp = (stat.st_mtime, stat.st_size)
+			if filename not in cache or cache[filename][0] != stamp:
+				cache[filename] = (stamp, parsePage(filename))
+			title, pageSections = cache[filename][1]
+		pages.append([os.path.relpath(filename, docDir).replace(os.sep, '/'), title])
+		for anchor, heading, weights in pageSections:
+			for term, weight in weights.items():
+				postings.setdefault(term, []).append((len(sections), weight))
+			sections.append([len(pages) - 1, anchor, heading])
+
+	# Postings are flat lists of section ids and weights, highest weight first
+	shards = {}
+	for term in postings:
+		ranked = sorted(postings[term], key=lambda p: (-p[1], p[0]))
+		shards.setdefault(shardKey(term), {})[term] = [n for p in ranked for n in p]
+
+	version = hashlib.sha1()
+	for key in sorted(shards):
+		text = json.dumps(shards[key], sort_keys=True, separators=(',', ':'))
+		version.update(text)
+		writeIfChanged(text, os.path.join(shardDir, key + '.json'))
+
+	# Remove shards for prefixes that are no longer used
+	for file in os.listdir(shardDir):
+		if os.path.splitext(file)[0] not in shards:
+			os.remove(os.path.join(shardDir, file))
+
+	index = {'pages' : pages, 'sections' : sections, 'shards' : sorted(shards), 'stopWords' : sorted(STOP_WORDS)} # Left out of queries, as they are not indexed
+	text = json.dumps(index, sort_keys=True, separators=(',', ':'))
+	version.update(text)
+	index['version'] = version.hexdigest()[:12] # Added to shard URLs so browsers do not use stale copies
+	writeIfChanged(json.dumps(index, sort_keys=True, separators=(',', ':')), os.path.join(searchDir, 'index.json'))
+
+	with open(SEARCH_JS, 'rb') as f:
+		writeIfChanged(f.read(), os.path.join(searchDir, 'search.js'))
+	return len(sections), len(shards)
+
+def main():
+	parser = argparse.ArgumentParser(description="Rittman Mead Documentation Search Indexer")
+	parser.add_argument('path', action='store', nargs='?', default=os.path.join(SCRIPT_DIR, os.pardir, 'docs'), help='Directory of generated documentation to index.')
+	parser.add_argument('-o', '--output', action='store', help='Directory to write the index to. Defaults to search/ in the documentation directory.')
+	args = parser.parse_args()
+
+	output = args.output or os.path.join(args.path, 'search')
+	sections, shards = buildIndex(args.path, output)
+	print 'Indexed %d sections in %d shards:\t%s' % (sections, shards, os.path.abspath(output))
+
+if __name__ == "__main__":
+	main()
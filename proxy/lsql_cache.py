@@ -0,0 +1,574 @@
+#!/usr/bin/python3
+#
+# Caching reverse proxy for the OBIEE web services used by Insights
+#
+# Sits between the browser and WebLogic, forwarding every request. The results of the queries
+# js/obiee.js sends to /analytics-ws/saw.dll and /insights/obi-ws (executeSQLQuery and executeXMLQuery)
+# are kept in memory, so users opening the same dashboard within the TTL share a single run of
+# each query on the BI Server.
+#
+# Results are keyed on the normalised query together with the caller's security context: the
+# user (--scope user) or the sorted list of application roles (--scope roles), looked up once per
+# session from the BI Server. Use roles only when row level security does not depend on the user.
+# A session's context is looked up again after --context-ttl seconds, and forgotten when it logs
+# off, so results are not served to sessions that have ended.
+# Entries are evicted least recently used first, once --memory is reached, and after --ttl seconds.
+#
+# Identical calls that arrive while one is still running upstream wait for it and share its
+# response, rather than running again. Queries and subject area metadata are shared within the
+# security context, while calls returning details of the session, such as its variables, are only
+# shared within the session. The number of calls absorbed this way is reported as coalesced. The
+# proxy's own security context lookups are shared in the same way, and reported as coalescedLookups.
+# Asynchronous queries, and queries with more rows than maxRowsPerPage, are not cached or shared,
+# as the remaining pages can only be fetched by the session that ran the query.
+#
+# Admin endpoints, only available from the --admin addresses:
+#	GET		/lsql-cache/stats								Hit, miss and coalesced counts, overall and per subject area or operation
+#	POST	/lsql-cache/invalidate?subjectArea=<name>	Remove results for a subject area (repeatable), or all results
+#
+# Requests with a Cache-Control: no-cache header bypass the cache and refresh the stored result.
+# Responses to query calls have an X-Cache header of HIT, MISS, COALESCED or BYPASS.
+#
+# Usage:
+#	python3 lsql_cache.py -u http://biserver:9502 -p 9503 --memory 512 --ttl 600
+#
+# Requires Python 3, for asyncio. Only the standard library is used.
+#
+
+# Standard python distribution libraries:
+import os, sys, re, ssl, signal
+import json, time, hashlib, asyncio, argparse
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+SOAP_PATHS = ['/analytics-ws/saw.dll', '/insights/obi-ws'] # The obi-ws servlet is mapped within the Insights web app
+ADMIN_PATH = '/lsql-cache/'
+CACHEABLE_OPS = ['executeSQLQuery', 'executeXMLQuery']
+CONTEXT_OPS = ['describeSubjectArea', 'getSubjectAreas'] # Shared between identical requests in the same security context
+SESSION_OPS = ['getCurUser', 'getGroups'] # Only shared between identical requests in the same session
+SHARED_OPS = CACHEABLE_OPS + CONTEXT_OPS + SESSION_OPS
+KEY_OPTIONS = ['outputFormat', 'maxRowsPerPage', 'presentationInfo'] # Execution options that change the response
+HOP_HEADERS = set(['connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailer', 'transfer-encoding', 'upgrade', 'content-length'])
+ENTRY_OVERHEAD = 256 # Approximate bytes used by an entry besides the response
+MAX_SESSIONS = 10000 # Security contexts kept, oldest sessions are forgotten first
+
+SOAP_REQUEST = '<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:ws="%s"><soapenv:Header/><soapenv:Body>%s</soapenv:Body></soapenv:Envelope>'
+
+# Tag name without its namespace
+def localName(tag):
+	return tag.split('}')[-1]
+
+# Namespace of a tag, e.g. urn://oracle.bi.webservices/v10
+def namespace(tag):
+	return tag[1:].split('}')[0] if tag.startswith('{') else ''
+
+# Format a number of bytes for the report
+def formatBytes(size):
+	for unit in ['B', 'KB', 'MB', 'GB']:
+		if abs(size) < 1024 or unit == 'GB':
+			break
+		size = size / 1024.0
+	return '%.1f %s' % (size, unit)
+
+# Normalise logical SQL so that formatting differences share a result: whitespace is collapsed and
+# text outside quotes is upper cased, as keywords and unquoted identifiers are case insensitive
+def normaliseSQL(sql):
+	parts = re.split(r"""('(?:[^']|'')*'|"[^"]*")""", sql)
+	for i in range(0, len(parts), 2):
+		text = re.sub(r'\s+', ' ', parts[i]).upper()
+		parts[i] = re.sub(r' ?([(),=<>+*/-]) ?', r'\1', text)
+	return ''.join(parts).strip().rstrip(';').strip()
+
+# Subject areas referenced by a logical SQL query
+def sqlSubjectAreas(sql):
+	return sorted(set(re.findall(r'\bFROM\s+"([^"]+)"', sql, re.IGNORECASE)))
+
+# Read a SOAP call that can be shared between identical requests. Returns the operation, namespace,
+# session ID and subject areas, a key of the normalised query or parameters, whether the result
+# can be cached and whether it can be shared within the security context or only the session.
+def parseCall(body):
+	root = ElementTree.fromstring(body)
+	bodies = [e for e in root if localName(e.tag) == 'Body']
+	if not bodies or len(bodies[0]) == 0:
+		return None
+	op = bodies[0][0]
+	name = localName(op.tag)
+	if name not in SHARED_OPS:
+		return None
+
+	values, params = {}, []
+	for elem in op.iter():
+		if len(elem) == 0:
+			tag, text = localName(elem.tag), (elem.text or '').strip()
+			values.setdefault(tag, text)
+			if tag != 'sessionID':
+				params.append('%s=%s' % (tag, text))
+
+	call = {'op' : name, 'ns' : namespace(op.tag), 'sessionID' : values.get('sessionID', ''), 'subjectAreas' : [],
+		'cacheable' : name in CACHEABLE_OPS, 'session' : name in SESSION_OPS}
+	if name == 'executeSQLQuery':
+		if values.get('async', '').upper() == 'TRUE': # Pages are fetched by query ID, which only the session can use
+			return None
+		sql = values.get('sql', '')
+		if re.match(r'\s*SELECT\b', sql, re.IGNORECASE):
+			query, call['subjectAreas'] = normaliseSQL(sql), sqlSubjectAreas(sql)
+		else: # Procedure calls, e.g. session variables, are specific to the session and not cached
+			query, call['cacheable'], call['session'] = sql.strip(), False, True
+	elif name == 'executeXMLQuery':
+		xml = values.get('reportXml', '')
+		query = re.sub(r'>\s+<', '><', xml.strip())
+		call['subjectAreas'] = sorted(set(s.replace('&quot;', '') for s in re.findall(r'subjectArea="([^"]+)"', xml)))
+	else:
+		query = '|'.join(params)
+	if name in CACHEABLE_OPS:
+		query = '|'.join('%s=%s' % (o, values.get(o, '').upper()) for o in KEY_OPTIONS) + '|' + query
+	call['key'] = '%s|%s' % (name, query)
+	return call
+
+# Session ID of a logoff call, or None for any other request
+def logoffSession(body):
+	root = ElementTree.fromstring(body)
+	bodies = [e for e in root if localName(e.tag) == 'Body']
+	if not bodies or len(bodies[0]) == 0 or localName(bodies[0][0].tag) != 'logoff':
+		return None
+	return ''.join(e.text or '' for e in bodies[0][0].iter() if localName(e.tag) == 'sessionID').strip()
+
+# Whether a SOAP response is a fault
+def isFault(body):
+	return re.search(br'<(\w+:)?Fault[\s>]', body[:4096]) is not None
+
+# Whether a query response holds all of the rows, rather than the first page of a query whose
+# remaining pages are fetched by the session with fetchNext
+def isFinished(body):
+	return re.search(br'<(\w+:)?finished>false<', body[-4096:]) is None
+
+# Read a message body using its length, chunked encoding, or until the connection closes
+async def readBody(reader, headers, untilClose):
+	if 'chunked' in headers.get('transfer-encoding', '').lower():
+		chunks = []
+		while True:
+			size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+			if size == 0:
+				while (await reader.readline()) not in (b'\r\n', b'\n', b''): # Trailers
+					pass
+				return b''.join(chunks)
+			chunks.append(await reader.readexactly(size))
+			await reader.readline()
+	if 'content-length' in headers:
+		length = int(headers['content-length'])
+		return await reader.readexactly(length) if length else b''
+	return await reader.read() if untilClose else b''
+
+# Read the start line and headers of a message. Headers are returned as a list, to keep repeated
+# ones such as Set-Cookie, and as a dictionary of lower case names.
+async def readHead(reader):
+	line = await reader.readline()
+	if not line:
+		return None
+	headerList, headers = [], {}
+	while True:
+		header = await reader.readline()
+		if header in (b'\r\n', b'\n', b''):
+			break
+		name, value = header.decode('latin-1').split(':', 1)
+		headerList.append((name.strip(), value.strip()))
+		headers[name.strip().lower()] = value.strip()
+	return line.decode('latin-1').rstrip('\r\n'), headerList, headers
+
+# Connections to the upstream server, reused between requests
+class Upstream(object):
+	def __init__(self, url):
+		url = urlsplit(url)
+		self.host = url.hostname
+		self.port = url.port or (443 if url.scheme == 'https' else 80)
+		self.ssl = ssl.create_default_context() if url.scheme == 'https' else None
+		self.idle = []
+
+	# Send a request, returning the status line, headers and body of the response
+	async def request(self, method, target, headerList, body):
+		head = ['%s %s HTTP/1.1' % (method, target), 'Host: %s:%d' % (self.host, self.port), 'Content-Length: %d' % len(body), 'Connection: keep-alive']
+		head += ['%s: %s' % (k, v) for k, v in headerList if k.lower() not in HOP_HEADERS and k.lower() != 'host']
+		message = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+		for attempt in range(2):
+			reused = bool(self.idle)
+			reader, writer = self.idle.pop() if reused else await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+			try:
+				writer.write(message)
+				await writer.drain()
+				response = await readHead(reader)
+				if response is None:
+					raise ConnectionError('Upstream closed the connection')
+				status, responseList, responseHeaders = response
+				code = int(status.split(' ')[1])
+				close = responseHeaders.get('connection', '').lower() == 'close'
+				noBody = method == 'HEAD' or code in (204, 304) or code < 200
+				responseBody = b'' if noBody else await readBody(reader, responseHeaders, True)
+			except (ConnectionError, asyncio.IncompleteReadError):
+				writer.close()
+				if reused and attempt == 0:
+					continue # Idle connection was closed by the server, try a new one
+				raise
+
+			if close or (not noBody and 'content-length' not in responseHeaders and 'chunked' not in responseHeaders.get('transfer-encoding', '')):
+				writer.close()
+			else:
+				self.idle.append((reader, writer))
+			return status, responseList, responseBody
+
+# Query results held in memory, evicted least recently used first and when they expire
+class ResultCache(object):
+	def __init__(self, budget, ttl, maxEntry):
+		self.budget = budget
+		self.ttl = ttl
+		self.maxEntry = maxEntry
+		self.entries = OrderedDict()
+		self.size = 0
+		self.stats = {'hits' : 0, 'misses' : 0, 'bypassed' : 0, 'stored' : 0, 'tooLarge' : 0, 'faults' : 0,
+			'evicted' : 0, 'expired' : 0, 'invalidated' : 0, 'bytesServed' : 0, 'secondsSaved' : 0.0}
+		self.subjectAreas = {}
+
+	# Count a hit or miss for each subject area of a query
+	def count(self, subjectAreas, result):
+		self.stats[result] += 1
+		for subjectArea in subjectAreas:
+			stat = self.subjectAreas.setdefault(subjectArea, {'hits' : 0, 'misses' : 0})
+			stat[result] += 1
+
+	def remove(self, key):
+		entry = self.entries.pop(key)
+		self.size -= entry['size']
+
+	# Stored response for a key, if it has not expired
+	def get(self, key):
+		entry = self.entries.get(key)
+		if entry is None:
+			return None
+		if entry['expires'] < time.time():
+			self.remove(key)
+			self.stats['expired'] += 1
+			return None
+		self.entries.move_to_end(key)
+		self.stats['bytesServed'] += len(entry['body'])
+		self.stats['secondsSaved'] += entry['seconds']
+		return entry
+
+	# Store a response, evicting the least recently used entries to stay within the memory budget
+	def put(self, key, contentType, body, subjectAreas, seconds):
+		size = len(body) + len(key) + ENTRY_OVERHEAD
+		if size > self.maxEntry:
+			self.stats['tooLarge'] += 1
+			return
+		if key in self.entries:
+			self.remove(key)
+		self.entries[key] = {'contentType' : contentType, 'body' : body, 'subjectAreas' : subjectAreas, 'seconds' : seconds,
+			'expires' : time.time() + self.ttl, 'size' : size}
+		self.size += size
+		self.stats['stored'] += 1
+		while self.size > self.budget:
+			self.remove(next(iter(self.entries)))
+			self.stats['evicted'] += 1
+
+	# Remove expired entries
+	def sweep(self):
+		now = time.time()
+		for key in [k for k, e in self.entries.items() if e['expires'] < now]:
+			self.remove(key)
+			self.stats['expired'] += 1
+
+	# Remove the entries using any of the given subject areas, or every entry
+	def invalidate(self, subjectAreas=None):
+		keys = [k for k, e in self.entries.items() if not subjectAreas or set(e['subjectAreas']) & set(subjectAreas)]
+		for key in keys:
+			self.remove(key)
+		self.stats['invalidated'] += len(keys)
+		return len(keys)
+
+	def report(self):
+		lookups = self.stats['hits'] + self.stats['misses']
+		return dict(self.stats, entries=len(self.entries), bytes=self.size, budget=self.budget, ttl=self.ttl,
+			hitRatio=float(self.stats['hits']) / lookups if lookups else 0.0, subjectAreas=self.subjectAreas)
+
+# Forward requests upstream, answering repeated queries from the cache and sharing identical calls in progress
+class CachingProxy(object):
+	def __init__(self, options):
+		self.options = options
+		self.upstream = Upstream(options.upstream)
+		self.cache = ResultCache(options.memory * 1048576, options.ttl, options.max_entry * 1048576)
+		self.contexts = OrderedDict() # Security context of each session, and when it must be looked up again
+		self.inflight = {} # Future for each call running upstream, by key
+		self.stats = {'coalesced' : 0, 'coalescedLookups' : 0, 'operations' : {}}
+
+	# Security context of a session, if it was looked up within the last --context-ttl seconds
+	def knownContext(self, sessionID):
+		context, expires = self.contexts.get(sessionID, (None, 0))
+		if expires < time.time():
+			self.contexts.pop(sessionID, None)
+			return None
+		return context
+
+	# Security context of a session, from the BI Server. Fails, giving None, if the session has ended.
+	async def securityContext(self, sessionID, ns, target, headerList):
+		context = self.knownContext(sessionID)
+		if context:
+			return context
+
+		if self.options.scope == 'user':
+			body = '<ws:getCurUser><ws:sessionID>%s</ws:sessionID></ws:getCurUser>' % escape(sessionID)
+			service = 'nQSessionService'
+		else:
+			body = "<ws:executeSQLQuery><ws:sql>Call NQSGetSessionValues('%%')</ws:sql><ws:outputFormat>SAWRowsetData</ws:outputFormat>" \
+				'<ws:executionOptions><ws:async>FALSE</ws:async><ws:maxRowsPerPage>10000</ws:maxRowsPerPage><ws:refresh>TRUE</ws:refresh>' \
+				'<ws:presentationInfo>FALSE</ws:presentationInfo><ws:type>query</ws:type></ws:executionOptions>' \
+				'<ws:sessionID>%s</ws:sessionID></ws:executeSQLQuery>' % escape(sessionID)
+			service = 'xmlViewService'
+		path = urlsplit(target).path
+		headerList = [(k, v) for k, v in headerList if k.lower() in ('cookie', 'authorization', 'content-type')]
+		status, responseList, response = await self.upstream.request('POST', '%s?SOAPImpl=%s' % (path, service), headerList, (SOAP_REQUEST % (ns, body)).encode('utf-8'))
+		if not status.split(' ')[1] == '200' or isFault(response):
+			return None
+
+		root = ElementTree.fromstring(response)
+		if self.options.scope == 'user':
+			user = [e.text for e in root.iter() if localName(e.tag) == 'return']
+			context = 'user:%s' % user[0] if user and user[0] else None
+		else:
+			rowset = [e.text for e in root.iter() if localName(e.tag) == 'rowset']
+			roles = None
+			if rowset and rowset[0]:
+				for row in ElementTree.fromstring(rowset[0]):
+					values = dict((localName(c.tag), c.text or '') for c in row)
+					if values.get('Column0') == 'NQ_SESSION.ROLES':
+						roles = sorted(r for r in values.get('Column3', '').split(';') if r)
+			context = 'roles:%s' % ';'.join(roles) if roles is not None else None
+
+		if context:
+			self.contexts.pop(sessionID, None)
+			self.contexts[sessionID] = (context, time.time() + self.options.context_ttl)
+			while len(self.contexts) > MAX_SESSIONS:
+				self.contexts.popitem(last=False)
+		return context
+
+	# Forward a request, returning the status line, headers and body for the client
+	async def forward(self, method, target, headerList, body):
+		try:
+			return await self.upstream.request(method, target, headerList, body)
+		except (OSError, asyncio.IncompleteReadError) as err:
+			return 'HTTP/1.1 502 Bad Gateway', [('Content-Type', 'text/plain')], ('Upstream error: %s' % err).encode('utf-8')
+
+	# Count a call to an operation, and whether it shared the response of an identical call, in the given total
+	def countCall(self, op, coalesced, total):
+		stat = self.stats['operations'].setdefault(op, {'requests' : 0, 'coalesced' : 0})
+		stat['requests'] += 1
+		if coalesced:
+			stat['coalesced'] += 1
+			self.stats[total] += 1
+
+	# Run a request, or wait for an identical one already running and share its response
+	async def coalesce(self, key, fetch):
+		if key in self.inflight:
+			return await asyncio.shield(self.inflight[key]), True
+
+		future = asyncio.get_running_loop().create_future()
+		self.inflight[key] = future
+		try:
+			result = await fetch()
+		except Exception as err:
+			future.set_exception(err)
+			future.exception() # Retrieved here, as there may be no other requests waiting
+			raise
+		else:
+			future.set_result(result)
+		finally:
+			del self.inflight[key]
+		return result, False
+
+	# Answer a call from the cache or by sharing an identical call in progress, otherwise forward it
+	# and store the result
+	async def call(self, method, target, headerList, headers, body, call):
+		# Shared responses are stored and replayed uncompressed, whatever each client accepts
+		headerList = [(k, v) for k, v in headerList if k.lower() != 'accept-encoding']
+		if call['session']:
+			context = 'session:%s' % call['sessionID'] if call['sessionID'] else None
+		else:
+			context = self.knownContext(call['sessionID'])
+			if context is None and call['sessionID']:
+				try:
+					context, coalesced = await self.coalesce('context\n' + call['sessionID'],
+						lambda: self.securityContext(call['sessionID'], call['ns'], target, headerList))
+				except (OSError, asyncio.IncompleteReadError, ElementTree.ParseError):
+					context, coalesced = None, False
+				self.countCall('securityContext', coalesced, 'coalescedLookups') # Made by the proxy, not the client
+		if context is None:
+			status, responseList, response = await self.forward(method, target, headerList, body)
+			if call['cacheable']:
+				self.cache.stats['bypassed'] += 1
+				responseList = responseList + [('X-Cache', 'BYPASS')]
+			return status, responseList, response
+
+		key = hashlib.sha1(('%s\n%s' % (context, call['key'])).encode('utf-8')).hexdigest()
+		refresh = 'no-cache' in headers.get('cache-control', '').lower() or 'no-cache' in headers.get('pragma', '').lower()
+		if call['cacheable'] and not refresh:
+			entry = self.cache.get(key)
+			if entry:
+				self.cache.count(call['subjectAreas'], 'hits')
+				return 'HTTP/1.1 200 OK', [('Content-Type', entry['contentType']), ('X-Cache', 'HIT')], entry['body']
+
+		async def fetch():
+			start = time.time()
+			status, responseList, response = await self.forward(method, target, headerList, body)
+			if call['cacheable']:
+				self.cache.count(call['subjectAreas'], 'misses')
+				if status.split(' ')[1] == '200' and not isFault(response):
+					if isFinished(response):
+						contentType = dict((k.lower(), v) for k, v in responseList).get('content-type', 'text/xml; charset=utf-8')
+						self.cache.put(key, contentType, response, call['subjectAreas'], time.time() - start)
+				else:
+					self.cache.stats['faults'] += 1
+			return status, responseList, response
+
+		(status, responseList, response), coalesced = await self.coalesce(key, fetch)
+		if coalesced and call['cacheable'] and not isFinished(response): # Another session's paged query
+			status, responseList, response = await self.forward(method, target, headerList, body)
+			coalesced = False
+		self.countCall(call['op'], coalesced, 'coalesced')
+		if coalesced: # Headers such as Set-Cookie belong to the session that made the call
+			responseList = [(k, v) for k, v in responseList if k.lower() == 'content-type']
+		if call['cacheable']:
+			responseList = responseList + [('X-Cache', 'COALESCED' if coalesced else 'MISS')]
+		return status, responseList, response
+
+	def report(self):
+		return dict(self.cache.report(), coalesced=self.stats['coalesced'], coalescedLookups=self.stats['coalescedLookups'],
+			inFlight=len(self.inflight), operations=self.stats['operations'])
+
+	# Stats and invalidation endpoints
+	def admin(self, method, target, peer):
+		if peer not in self.options.admin:
+			return 'HTTP/1.1 403 Forbidden', [('Content-Type', 'text/plain')], b'Forbidden'
+		url = urlsplit(target)
+		action = url.path[len(ADMIN_PATH):]
+		if action == 'stats' and method == 'GET':
+			result = self.report()
+		elif action == 'invalidate' and method == 'POST':
+			subjectAreas = parse_qs(url.query).get('subjectArea', [])
+			result = {'invalidated' : self.cache.invalidate(subjectAreas), 'subjectAreas' : subjectAreas or 'all'}
+		else:
+			return 'HTTP/1.1 404 Not Found', [('Content-Type', 'text/plain')], b'Not found'
+		return 'HTTP/1.1 200 OK', [('Content-Type', 'application/json')], json.dumps(result, indent=1, sort_keys=True).encode('utf-8')
+
+	# Route a request from a client
+	async def handle(self, method, target, headerList, headers, body, peer):
+		path = urlsplit(target).path
+		if path.startswith(ADMIN_PATH):
+			return self.admin(method, target, peer)
+
+		if path in SOAP_PATHS and method == 'POST' and b'logoff' in body:
+			try:
+				sessionID = logoffSession(body)
+			except ElementTree.ParseError:
+				sessionID = None
+			if sessionID:
+				self.contexts.pop(sessionID, None)
+
+		if path in SOAP_PATHS and method == 'POST' and any(op.encode('ascii') in body for op in SHARED_OPS):
+			try:
+				call = parseCall(body)
+			except ElementTree.ParseError:
+				call = None
+			if call:
+				return await self.call(method, target, headerList, headers, body, call)
+		return await self.forward(method, target, headerList, body)
+
+	# Serve requests on one client connection until it is closed
+	async def connection(self, reader, writer):
+		peer = (writer.get_extra_info('peername') or ('',))[0]
+		try:
+			while True:
+				request = await readHead(reader)
+				if request is None:
+					break
+				line, headerList, headers = request
+				method, target, version = line.split(' ', 2)
+				body = await readBody(reader, headers, False)
+				keepAlive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+				status, responseList, response = await self.handle(method, target, headerList + [('X-Forwarded-For', peer)], headers, body, peer)
+				head = [status.replace('HTTP/1.0', 'HTTP/1.1')] + ['%s: %s' % (k, v) for k, v in responseList if k.lower() not in HOP_HEADERS]
+				head += ['Content-Length: %d' % len(response), 'Connection: %s' % ('keep-alive' if keepAlive else 'close')]
+				writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+				if method != 'HEAD':
+					writer.write(response)
+				await writer.drain()
+				if not keepAlive:
+					break
+		except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+			pass
+		finally:
+			writer.close()
+
+	# Remove expired results and print the cache statistics periodically
+	async def housekeeping(self):
+		interval = min(self.options.ttl, self.options.report or 60, 60)
+		last = time.time()
+		while True:
+			await asyncio.sleep(interval)
+			self.cache.sweep()
+			if self.options.report and time.time() - last >= self.options.report:
+				last = time.time()
+				printStats(self.report())
+
+# Print a one line summary of the cache statistics
+def printStats(report):
+	print('%s  hits %d, misses %d (%.1f%%), coalesced %d, bypassed %d, entries %d, %s of %s, evicted %d, expired %d, %.1fs saved' %
+		(time.strftime('%H:%M:%S'), report['hits'], report['misses'], 100 * report['hitRatio'], report['coalesced'], report['bypassed'],
+		report['entries'], formatBytes(report['bytes']), formatBytes(report['budget']), report['evicted'], report['expired'], report['secondsSaved']))
+	sys.stdout.flush()
+
+# Serve until interrupted or terminated
+async def serve(proxy, host, port):
+	stop = asyncio.Event()
+	for sig in (signal.SIGINT, signal.SIGTERM):
+		try:
+			asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+		except NotImplementedError:
+			pass # Windows, where Ctrl+C raises KeyboardInterrupt instead
+
+	server = await asyncio.start_server(proxy.connection, host, port)
+	housekeeping = asyncio.ensure_future(proxy.housekeeping())
+	print('LSQL cache listening on http://%s:%d, forwarding to %s' % (host, port, proxy.options.upstream))
+	sys.stdout.flush()
+	async with server:
+		await stop.wait()
+	housekeeping.cancel()
+
+def main():
+	parser = argparse.ArgumentParser(description="Rittman Mead Insights LSQL Result Cache")
+	parser.add_argument('-u', '--upstream', action='store', default='http://127.0.0.1:9502', help='URL of the WebLogic server hosting OBIEE and Insights.')
+	parser.add_argument('-H', '--host', action='store', default='0.0.0.0', help='Address to listen on.')
+	parser.add_argument('-p', '--port', action='store', type=int, default=9503, help='Port to listen on.')
+	parser.add_argument('-m', '--memory', action='store', type=float, default=256, help='Memory budget for cached results, in MB.')
+	parser.add_argument('-t', '--ttl', action='store', type=float, default=300, help='Seconds a result is kept for.')
+	parser.add_argument('--max-entry', action='store', type=float, default=32, help='Largest result to cache, in MB.')
+	parser.add_argument('--context-ttl', action='store', type=float, default=60, help='Seconds a session\'s security context is trusted before it is looked up again.')
+	parser.add_argument('-s', '--scope', action='store', choices=['user', 'roles'], default='user', help='Security context results are shared within.')
+	parser.add_argument('--admin', action='store', default='127.0.0.1,::1', help='Comma separated client addresses allowed to use the admin endpoints.')
+	parser.add_argument('--report', action='store', type=float, default=0, help='Print the cache statistics every this many seconds.')
+	args = parser.parse_args()
+
+	if not args.upstream.startswith(('http://', 'https://')):
+		print('\n\tError: upstream must be an http:// or https:// URL. Exiting.')
+		sys.exit(1)
+	args.admin = set(a.strip() for a in args.admin.split(',') if a.strip())
+
+	proxy = CachingProxy(args)
+	try:
+		asyncio.run(serve(proxy, args.host, args.port))
+	except KeyboardInterrupt:
+		pass
+	printStats(proxy.report())
+
+if __name__ == "__main__":
+	main()
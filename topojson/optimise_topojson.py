@@ -0,0 +1,328 @@
+#!/usr/bin/python
+#
+# Script to write simplified, re-quantised variants of the TopoJSON map files at several levels of detail
+#
+# Each arc is simplified once (Douglas-Peucker, in units of the output grid) and keeps its end
+# points, so neighbouring features still share their borders exactly. Feature properties and ids
+# are kept, as the plugins join data to the maps on a property chosen by the user.
+#
+# Output, in the output folder:
+#	<level>/<path>	Variant of each map file, e.g. low/us/counties.json
+#	manifest.json	Sizes of each map file and its variants, also used to skip unchanged files
+#
+# Variants can be used like any other map file, e.g. adding {'name': 'US - Counties (Low)', 'path': 'low/us/counties.json'}
+# to InsightsConfig.MapFeatures.
+#
+
+# Standard python distribution libraries:
+import os, sys
+import json, zlib, hashlib, argparse
+import multiprocessing
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(sys.argv[0]))
+
+# Name, quantisation (grid cells along each axis) and simplification tolerance (in grid cells)
+LEVELS = [
+	('high', 100000, 2),
+	('medium', 20000, 1),
+	('low', 4000, 1)
+]
+
+# Hash the contents of a file
+def hashFile(filename):
+	with open(filename, 'rb') as f:
+		return hashlib.sha1(f.read()).hexdigest()
+
+# Format a number of bytes for the report
+def formatBytes(size):
+	for unit in ['B', 'KB', 'MB']:
+		if abs(size) < 1024 or unit == 'MB':
+			break
+		size = size / 1024.0
+	return '%.1f %s' % (size, unit)
+
+# Parse a level given on the command line as name:quantisation:tolerance
+def parseLevel(value):
+	try:
+		name, quantisation, tolerance = value.split(':')
+		return (name, int(quantisation), float(tolerance))
+	except ValueError:
+		raise argparse.ArgumentTypeError('Levels must be given as name:quantisation:tolerance, e.g. low:4000:1')
+
+# Decode the arcs of a topology to absolute coordinates
+def decodeArcs(topology):
+	transform = topology.get('transform')
+	arcs = []
+	for arc in topology['arcs']:
+		if transform:
+			sx, sy = transform['scale']
+			tx, ty = transform['translate']
+			x, y, points = 0, 0, []
+			for p in arc:
+				x += p[0]
+				y += p[1]
+				points.append((x * sx + tx, y * sy + ty))
+		else:
+			points = [(p[0], p[1]) for p in arc]
+		arcs.append(points)
+	return arcs
+
+# Decode a point geometry's position, which is quantised but not delta encoded
+def decodePosition(position, transform):
+	if transform:
+		return (position[0] * transform['scale'][0] + transform['translate'][0], position[1] * transform['scale'][1] + transform['translate'][1])
+	return (position[0], position[1])
+
+# Call a function for every point and multipoint geometry in an object
+def eachPointGeometry(geometry, callback):
+	if geometry.get('type') == 'GeometryCollection':
+		for child in geometry.get('geometries', []):
+			eachPointGeometry(child, callback)
+	elif geometry.get('type') in ('Point', 'MultiPoint'):
+		callback(geometry)
+
+# Distance squared from a point to the segment between two others
+def segmentDistance(p, a, b):
+	dx, dy = b[0] - a[0], b[1] - a[1]
+	if dx == 0 and dy == 0:
+		return (p[0] - a[0]) ** 2 + (p[1] - a[1]) ** 2
+	t = max(0, min(1, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / float(dx * dx + dy * dy)))
+	x, y = a[0] + t * dx, a[1] + t * dy
+	return (p[0] - x) ** 2 + (p[1] - y) ** 2
+
+# Mark the points between first and last to keep, using Douglas-Peucker
+def markPoints(points, first, last, tolerance, keep):
+	stack = [(first, last)]
+	while stack:
+		first, last = stack.pop()
+		furthest, distance = None, tolerance
+		for i in range(first + 1, last):
+			d = segmentDistance(points[i], points[first], points[last])
+			if d > distance:
+				furthest, distance = i, d
+		if furthest is not None:
+			keep[furthest] = True
+			stack.append((first, furthest))
+			stack.append((furthest, last))
+
+# Simplify an arc, keeping its end points. Closed arcs (rings on their own) keep at least
+# four points so that they do not collapse.
+def simplifyArc(points, tolerance):
+	last = len(points) - 1
+	if last < 2:
+		return points
+	keep = [False] * len(points)
+	keep[0] = keep[last] = True
+	tolerance = tolerance ** 2
+
+	if points[0] == points[last]:
+		split = max(range(1, last), key=lambda i: segmentDistance(points[i], points[0], points[0]))
+		furthest = max(range(1, last), key=lambda i: segmentDistance(points[i], points[0], points[split]) if i != split else -1)
+		keep[split] = keep[furthest] = True
+		bounds = sorted([0, split, furthest, last])
+		for first, end in zip(bounds, bounds[1:]):
+			markPoints(points, first, end, tolerance, keep)
+	else:
+		markPoints(points, 0, last, tolerance, keep)
+
+	return [p for p, k in zip(points, keep) if k]
+
+# Quantise and delta encode the simplified arcs, dropping points that round to the previous one
+def encodeArc(points, grid):
+	arc, last = [], None
+	for x, y in points:
+		q = (int(round((x - grid[0]) / grid[2])), int(round((y - grid[1]) / grid[3])))
+		if q != last:
+			arc.append([q[0] - last[0], q[1] - last[1]] if last else list(q))
+			last = q
+	if len(arc) == 1:
+		arc.append([0, 0]) # Arcs need two positions, even when they round to a single point
+	return arc
+
+# Write a variant of a topology at a quantisation and tolerance, keeping only the given
+# properties, or all of them if none are given
+def simplifyTopology(topology, arcs, quantisation, tolerance, properties=None):
+	transform = topology.get('transform')
+	positions = []
+	def decodePoints(geometry):
+		coords = geometry['coordinates']
+		positions.extend([decodePosition(c, transform) for c in (coords if geometry['type'] == 'MultiPoint' else [coords])])
+	for obj in topology['objects'].values():
+		eachPointGeometry(obj, decodePoints)
+
+	# Grid of the output: origin and size of each cell
+	xs = [p[0] for arc in arcs for p in arc] + [p[0] for p in positions]
+	ys = [p[1] for arc in arcs for p in arc] + [p[1] for p in positions]
+	bbox = [min(xs), min(ys), max(xs), max(ys)] if xs else [0, 0, 0, 0]
+	cell = ((bbox[2] - bbox[0]) / (quantisation - 1) or 1, (bbox[3] - bbox[1]) / (quantisation - 1) or 1)
+
+	# The tolerance is in cells of the level's grid, but a finer grid than the source's would only add digits
+	if transform:
+		cells = max((bbox[2] - bbox[0]) / transform['scale'][0], (bbox[3] - bbox[1]) / transform['scale'][1])
+		quantisation = min(quantisation, int(round(cells)) + 1)
+	grid = (bbox[0], bbox[1], (bbox[2] - bbox[0]) / (quantisation - 1) or 1, (bbox[3] - bbox[1]) / (quantisation - 1) or 1)
+
+	variant = {
+		'type' : 'Topology',
+		'transform' : {'scale' : [grid[2], grid[3]], 'translate' : [grid[0], grid[1]]},
+		'arcs' : [],
+		'objects' : {}
+	}
+	if 'bbox' in topology:
+		variant['bbox'] = bbox
+
+	# Simplify in cells of the level's grid, so a tolerance means the same for every map
+	points = 0
+	for arc in arcs:
+		scaled = [((x - bbox[0]) / cell[0], (y - bbox[1]) / cell[1]) for x, y in arc]
+		simplified = [(x * cell[0] + bbox[0], y * cell[1] + bbox[1]) for x, y in simplifyArc(scaled, tolerance)]
+		encoded = encodeArc(simplified, grid)
+		variant['arcs'].append(encoded)
+		points += len(encoded)
+
+	def encodeGeometry(geometry):
+		geometry = dict(geometry)
+		if properties is not None and 'properties' in geometry:
+			geometry['properties'] = dict((k, v) for k, v in geometry['properties'].items() if k in properties)
+		if geometry.get('type') == 'GeometryCollection':
+			geometry['geometries'] = [encodeGeometry(g) for g in geometry.get('geometries', [])]
+		elif geometry.get('type') in ('Point', 'MultiPoint'):
+			coords = geometry['coordinates']
+			coords = [encodeArc([decodePosition(c, transform)], grid)[0] for c in (coords if geometry['type'] == 'MultiPoint' else [coords])]
+			geometry['coordinates'] = coords if geometry['type'] == 'MultiPoint' else coords[0]
+		return geometry
+
+	for name, obj in topology['objects'].items():
+		variant['objects'][name] = encodeGeometry(obj)
+	return variant, points
+
+# Write the variants of a map file, returning its manifest entry
+def optimiseMap(job):
+	src, rel, outDir, options = job
+	with open(src, 'rb') as f:
+		data = f.read()
+	topology = json.loads(data)
+	arcs = decodeArcs(topology)
+
+	entry = {
+		'hash' : options['hash'],
+		'options' : options['key'],
+		'size' : len(data),
+		'gzip' : len(zlib.compress(data, 9)),
+		'points' : sum(len(arc) for arc in arcs),
+		'objects' : dict((name, len(obj.get('geometries', [obj]))) for name, obj in topology['objects'].items()),
+		'variants' : {}
+	}
+
+	for name, quantisation, tolerance in options['levels']:
+		variant, points = simplifyTopology(topology, arcs, quantisation, tolerance, options['properties'])
+		text = json.dumps(variant, separators=(',', ':'), ensure_ascii=False)
+		if isinstance(text, unicode):
+			text = text.encode('utf-8')
+
+		out = os.path.join(outDir, name, rel)
+		if not os.path.exists(os.path.dirname(out)):
+			os.makedirs(os.path.dirname(out))
+		with open(out, 'wb') as f:
+			f.write(text)
+
+		entry['variants'][name] = {
+			'path' : '%s/%s' % (name, rel),
+			'quantisation' : quantisation,
+			'tolerance' : tolerance,
+			'size' : len(text),
+			'gzip' : len(zlib.compress(text, 9)),
+			'points' : points
+		}
+
+	return rel, entry
+
+# Print the size of each map file and its variants
+def printReport(manifest, levels):
+	names = [level[0] for level in levels]
+	print '\n%-28s %10s %10s' % ('Map', 'Points', 'Size') + ''.join(' %20s' % name.capitalize() for name in names)
+	for rel in sorted(manifest):
+		entry = manifest[rel]
+		line = '%-28s %10d %10s' % (rel, entry['points'], formatBytes(entry['size']))
+		for name in names:
+			variant = entry['variants'].get(name)
+			line += ' %20s' % ('%s (%.0f%%)' % (formatBytes(variant['size']), 100.0 * variant['size'] / entry['size']) if variant else '-')
+		print line
+
+def main():
+	parser = argparse.ArgumentParser(description="Rittman Mead Insights TopoJSON Optimiser")
+	parser.add_argument('path', action='store', nargs='?', default=SCRIPT_DIR, help='Directory of TopoJSON map files.')
+	parser.add_argument('-o', '--output', action='store', help='Directory to write the variants and manifest to. Defaults to the map directory.')
+	parser.add_argument('-l', '--level', action='append', type=parseLevel, dest='levels', help='Level of detail as name:quantisation:tolerance, replacing the defaults. Can be repeated.')
+	parser.add_argument('-p', '--property', action='append', dest='properties', help='Feature property to keep, e.g. the one data is joined on. Can be repeated. Keeps all properties by default.')
+	parser.add_argument('-f', '--force', action='store_true', default=False, help='Rewrite the variants of every map file, even if unchanged.')
+	parser.add_argument('-j', '--jobs', action='store', type=int, default=0, help='Number of map files to process in parallel. 0 uses one per CPU core.')
+	args = parser.parse_args()
+
+	srcDir = os.path.abspath(args.path)
+	outDir = os.path.abspath(args.output or args.path)
+	manifestFile = os.path.join(outDir, 'manifest.json')
+	levels = args.levels or LEVELS
+	optionKey = ','.join('%s:%d:%g' % level for level in levels) + ('|' + ','.join(sorted(args.properties)) if args.properties else '')
+
+	if os.path.isfile(manifestFile):
+		with open(manifestFile, 'r') as f:
+			manifest = json.load(f)
+	else:
+		manifest = {}
+
+	# Variants from earlier runs may be in the map folder itself
+	names = set([level[0] for level in LEVELS + levels])
+	for entry in manifest.values():
+		names.update(entry['variants'])
+	skip = set(os.path.join(folder, name) for folder in [srcDir, outDir] for name in names)
+
+	# Find map files that are new, changed or were processed with different options
+	jobs, found = [], set()
+	for root, subDirs, files in os.walk(srcDir):
+		subDirs[:] = [d for d in subDirs if os.path.join(root, d) not in skip]
+		for file in files:
+			if not file.endswith('.json') or os.path.join(root, file) in (manifestFile, os.path.join(srcDir, 'manifest.json')):
+				continue
+
+			src = os.path.join(root, file)
+			rel = os.path.relpath(src, srcDir).replace('\\', '/')
+			found.add(rel)
+
+			sha = hashFile(src)
+			entry = manifest.get(rel)
+			if not args.force and entry and entry['hash'] == sha and entry['options'] == optionKey and \
+				all(os.path.exists(os.path.join(outDir, v['path'])) for v in entry['variants'].values()):
+				continue
+			jobs.append((src, rel, outDir, {'hash' : sha, 'key' : optionKey, 'levels' : levels, 'properties' : args.properties}))
+
+	print 'Optimising %d of %d map files...' % (len(jobs), len(found))
+	if jobs:
+		pool = multiprocessing.Pool(args.jobs or None)
+		try:
+			for rel, entry in pool.imap_unordered(optimiseMap, jobs):
+				old = manifest.get(rel)
+				if old:
+					for name in old['variants']:
+						if name not in entry['variants'] and os.path.exists(os.path.join(outDir, old['variants'][name]['path'])):
+							os.remove(os.path.join(outDir, old['variants'][name]['path']))
+				manifest[rel] = entry
+		finally:
+			pool.close()
+			pool.join()
+
+	# Forget map files whose source has been removed
+	for rel in list(manifest):
+		if rel not in found:
+			for variant in manifest[rel]['variants'].values():
+				if os.path.exists(os.path.join(outDir, variant['path'])):
+					os.remove(os.path.join(outDir, variant['path']))
+			del manifest[rel]
+
+	with open(manifestFile, 'wb') as f:
+		f.write(json.dumps(manifest, indent=1, sort_keys=True, separators=(',', ': ')))
+
+	printReport(manifest, levels)
+
+if __name__ == "__main__":
+	main()